@@ -0,0 +1,210 @@
+"""Benchmarks for the status collection and parsing pipeline.
+
+Runs every stage against the fake systemctl/journalctl in `benchmarks/shim.py` for several unit
+counts and reports timings, Python allocations and subprocess counts. Save a baseline on the Pi
+with `--save`; later runs compare against it and exit non-zero on a regression.
+
+    uv run python -m benchmarks.run --units 20,100,1000
+"""
+
+import json
+import math
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import typer
+
+from benchmarks import shim
+from src.collector import Snapshot
+from src.discovery import UnitDiscovery, scan_unit_dirs
+from src.engine import CollectionEngine
+from src.journal import JournalReader
+from src.query import ServiceQuery, SnapshotIndex
+from src.services import (
+    SHOW_PROPERTIES,
+    parse_cpu,
+    parse_last_error,
+    parse_memory,
+    parse_service_name,
+    parse_systemctl_show,
+    parse_uptime,
+    status_from_properties,
+)
+
+DEFAULT_BASELINE = Path(__file__).parent / "baseline.json"
+DEFAULT_THRESHOLD = 0.25  # Fail when a stage is more than 25% slower than its baseline
+NOISE_FLOOR_MS = 0.01  # Smaller differences are timer noise, not regressions
+STATUS_LOG_LINES = 20
+MIN_SAMPLE_SECONDS = 0.02
+
+
+@dataclass(slots=True)
+class StageResult:
+    median_ms: float
+    min_ms: float
+    peak_kb: float  # Peak Python allocations (tracemalloc) during one run
+    subprocesses: int  # Fake systemctl/journalctl calls per run
+
+
+class _StaticCI:
+    """CI lookups are network-bound and cached; keep them out of collection timings."""
+
+    def get_statuses(self, repos: list[str]) -> dict[str, str]:
+        return dict.fromkeys(repos, "success")
+
+
+def measure(fn: Callable[[], object], repeat: int, shim_dir: Path) -> StageResult:
+    calls = shim.call_count(shim_dir)
+    start = time.perf_counter()
+    fn()  # Warm-up, also counts subprocesses and sizes the timing loop
+    elapsed = time.perf_counter() - start
+    subprocesses = shim.call_count(shim_dir) - calls
+
+    # Fast stages are looped so every sample spans at least MIN_SAMPLE_SECONDS of work
+    number = max(1, math.ceil(MIN_SAMPLE_SECONDS / max(elapsed, 1e-9)))
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        timings.append((time.perf_counter() - start) * 1000 / number)
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return StageResult(
+        median_ms=round(statistics.median(timings), 4),
+        min_ms=round(min(timings), 4),
+        peak_kb=round(peak / 1024, 1),
+        subprocesses=subprocesses,
+    )
+
+
+def stages(units: list[dict], unit_dir: Path) -> dict[str, Callable[[], object]]:
+    """Benchmark stages for one unit table, named after the functions they exercise."""
+    engine = CollectionEngine(ci=_StaticCI())
+    discovery = UnitDiscovery([unit_dir])
+    names = [unit["Id"] for unit in units]
+    show_output = "\n\n".join("\n".join(f"{key}={unit[key]}" for key in SHOW_PROPERTIES) for unit in units)
+    status_texts = [shim.status_text(unit, STATUS_LOG_LINES) for unit in units]
+    snapshot = Snapshot(
+        1, tuple(status_from_properties(properties) for properties in parse_systemctl_show(show_output))
+    )
+    reader = JournalReader()
+
+    def parse_status_texts():
+        for text in status_texts:
+            parse_uptime(text), parse_memory(text), parse_cpu(text), parse_last_error(text)
+
+    return {
+        # What every refresh pays (a stat of the unmodified directory), and the scan after a change
+        "get_services": discovery.units,
+        "scan_unit_dirs": lambda: scan_unit_dirs([unit_dir], discovery.include, discovery.exclude),
+        "get_service_statuses": lambda: engine.run(engine.collect_statuses(names)),
+        "get_service_status": lambda: engine.run(engine.collect_statuses(names[:1])),
+        "get_info_for_service": lambda: engine.run(engine.collect_info(names[0], STATUS_LOG_LINES)),
+        "journal_latest": lambda: reader.latest(names[0]),
+        "parse_service_name": lambda: [parse_service_name(name) for name in names],
+        "parse_status_text": parse_status_texts,
+        "parse_systemctl_show": lambda: [
+            status_from_properties(properties) for properties in parse_systemctl_show(show_output)
+        ],
+        "snapshot_index": lambda: SnapshotIndex.build(snapshot).query(ServiceQuery(sort="memory", limit=10)),
+    }
+
+
+def run(unit_counts: list[int], repeat: int) -> dict[str, dict[str, StageResult]]:
+    """Results per unit count and stage, with the shim first on PATH."""
+    results = {}
+    path = os.environ.get("PATH", "")
+    with tempfile.TemporaryDirectory(prefix="fake-systemd-") as directory:
+        shim_dir = Path(directory)
+        os.environ["PATH"] = f"{shim_dir}{os.pathsep}{path}"
+        try:
+            for count in unit_counts:
+                units = shim.make_units(count)
+                shim.install(shim_dir, units)
+                results[str(count)] = {
+                    name: measure(fn, repeat, shim_dir)
+                    for name, fn in stages(units, shim.unit_dir_of(shim_dir)).items()
+                }
+        finally:
+            os.environ["PATH"] = path
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Regressions against a baseline: slower than `threshold` or more subprocesses.
+
+    Fastest runs are compared rather than medians; they are the least affected by other load on the Pi.
+    """
+    regressions = []
+    for count, stage_results in results.items():
+        for name, result in stage_results.items():
+            base = baseline.get(count, {}).get(name)
+            if base is None:
+                continue
+            slower = result["min_ms"] - base["min_ms"]
+            if slower > NOISE_FLOOR_MS and result["min_ms"] > base["min_ms"] * (1 + threshold):
+                regressions.append(
+                    f"{name} @ {count} units: {result['min_ms']:.2f}ms vs {base['min_ms']:.2f}ms baseline"
+                )
+            if result["subprocesses"] > base["subprocesses"]:
+                regressions.append(
+                    f"{name} @ {count} units: {result['subprocesses']} subprocesses vs {base['subprocesses']}"
+                )
+    return regressions
+
+
+def _print_table(results: dict, baseline: dict) -> None:
+    typer.echo(
+        f"{'units':>6} {'stage':<22} {'median ms':>10} {'min ms':>10} {'peak KB':>10} {'procs':>6} {'vs base':>8}"
+    )
+    for count, stage_results in results.items():
+        for name, result in stage_results.items():
+            base = baseline.get(count, {}).get(name)
+            change = f"{(result['min_ms'] / base['min_ms'] - 1) * 100:+.0f}%" if base else ""
+            typer.echo(
+                f"{count:>6} {name:<22} {result['median_ms']:>10.2f} {result['min_ms']:>10.2f} "
+                f"{result['peak_kb']:>10.1f} {result['subprocesses']:>6} {change:>8}"
+            )
+
+
+def benchmark_cli(
+    units: str = typer.Option("20,100,1000", help="Comma-separated unit counts to simulate"),
+    repeat: int = typer.Option(5, help="Timed runs per stage"),
+    baseline_file: str = typer.Option(str(DEFAULT_BASELINE), "--baseline", help="Baseline JSON file"),
+    save: bool = typer.Option(False, "--save", help="Save the results as the new baseline"),
+    threshold: float = typer.Option(DEFAULT_THRESHOLD, help="Allowed slowdown before failing, e.g. 0.25"),
+) -> None:
+    """Benchmark status collection and parsing against a fake systemd."""
+    baseline = Path(baseline_file)
+    results = {
+        count: {name: asdict(result) for name, result in stage_results.items()}
+        for count, stage_results in run([int(count) for count in units.split(",")], repeat).items()
+    }
+    previous = json.loads(baseline.read_text()) if baseline.exists() else {}
+    _print_table(results, previous)
+
+    if save:
+        baseline.write_text(json.dumps(results, indent=2) + "\n")
+        typer.echo(f"Saved baseline to {baseline}")
+        return
+    if regressions := compare(results, previous, threshold):
+        typer.secho("Regressions:\n  " + "\n  ".join(regressions), fg=typer.colors.RED, err=True)
+        raise typer.Exit(1)
+
+
+def main():
+    typer.run(benchmark_cli)
+
+
+if __name__ == "__main__":
+    main()
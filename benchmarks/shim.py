@@ -0,0 +1,152 @@
+"""Fake `systemctl` and `journalctl` for benchmarks.
+
+`install(directory, units)` writes `systemctl`/`journalctl` wrappers that run this file, plus the
+unit table they serve and a unit directory with a file per unit. Units are cloned from `canned_service_statuses` so names, groups and
+suffixes look like the real Pi; every call is logged so benchmarks can count subprocesses.
+"""
+
+import json
+import os
+import random
+import sys
+from fnmatch import fnmatch
+from pathlib import Path
+
+STATE_ENV = "FAKE_SYSTEMD_DIR"
+JOURNAL_MESSAGE = "INFO:src.app:127.0.0.1 - - GET /api/services HTTP/1.1 200 -"
+
+
+def make_units(count: int) -> list[dict]:
+    """`count` unit property dicts modelled on the canned statuses (about 1 in 20 failed)."""
+    from src.canned_info import canned_service_statuses
+
+    rng = random.Random(count)
+    units = []
+    for i in range(count):
+        base = canned_service_statuses[i % len(canned_service_statuses)]
+        copy = i // len(canned_service_statuses)
+        group = base.project_group if copy == 0 else f"{base.project_group}-{copy}"
+        name = f"projects_{group}" + (f"_{base.suffix}" if base.suffix else "") + ".service"
+        failed = i % 20 == 19
+        units.append(
+            {
+                "Id": name,
+                "Description": base.project_group,
+                "ActiveState": "failed" if failed else "active",
+                "SubState": "failed" if failed else "running",
+                "Result": "exit-code" if failed else "success",
+                "ExecMainStatus": "1" if failed else "0",
+                "MemoryCurrent": str(rng.randint(20, 400) * 1024**2),
+                "CPUUsageNSec": str(base.cpu_nsec or 0),
+                "ActiveEnterTimestamp": "Sat 2026-10-17 08:02:11 CEST",
+                "ActiveEnterTimestampMonotonic": str(rng.randint(1, 10**5) * 10**6),
+                "UnitFileState": "enabled",
+            }
+        )
+    return units
+
+
+def install(directory: Path, units: list[dict]) -> None:
+    """Write the unit table, unit files (in `unit_dir`) and `systemctl`/`journalctl` wrappers."""
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / "units.json").write_text(json.dumps(units))
+    unit_dir = unit_dir_of(directory)
+    unit_dir.mkdir(exist_ok=True)
+    for unit in units:
+        (unit_dir / unit["Id"]).write_text(f"[Unit]\nDescription={unit['Description']}\n")
+    # Backdate the directory, as on the Pi: a just-changed directory is rescanned on every lookup
+    os.utime(unit_dir, (1_000_000_000, 1_000_000_000))
+    (directory / "calls.log").write_text("")
+    for command in ("systemctl", "journalctl"):
+        wrapper = directory / command
+        wrapper.write_text(
+            f'#!/bin/sh\n{STATE_ENV}="{directory}" exec "{sys.executable}" "{Path(__file__).resolve()}" '
+            f'{command} "$@"\n'
+        )
+        wrapper.chmod(0o755)
+
+
+def unit_dir_of(directory: Path) -> Path:
+    """The fake /etc/systemd/system written by `install`."""
+    return directory / "system"
+
+
+def call_count(directory: Path) -> int:
+    """Number of fake systemctl/journalctl invocations so far."""
+    with (directory / "calls.log").open() as f:
+        return sum(1 for _ in f)
+
+
+def status_text(unit: dict, lines: int) -> str:
+    """`systemctl status` output for a unit, with `lines` journal lines."""
+    active = unit["ActiveState"] == "active"
+    state = "active (running)" if active else "failed (Result: exit-code)"
+    text = [
+        f"● {unit['Id']} - {unit['Description']}",
+        f"     Loaded: loaded (/lib/systemd/system/{unit['Id']}; enabled; preset: enabled)",
+        f"     Active: {state} since {unit['ActiveEnterTimestamp']}; 1h 58min ago",
+        "   Main PID: 1234 (python)",
+        "      Tasks: 3 (limit: 4915)",
+        f"     Memory: {int(unit['MemoryCurrent']) / 1024**2:.1f}M",
+        f"        CPU: {int(unit['CPUUsageNSec']) / 1e9:.3f}s",
+        f"     CGroup: /system.slice/{unit['Id']}",
+        "             └─1234 /home/mnalavadi/.local/bin/uv run app",
+    ]
+    if not active:
+        text.append(
+            f"Oct 17 08:02:11 raspberrypi systemd[1]: {unit['Id']}: Main process exited, status=1/FAILURE"
+        )
+    if lines:
+        text.append("")
+        text += [f"Oct 17 08:02:{i % 60:02d} raspberrypi uv[1234]: {JOURNAL_MESSAGE}" for i in range(lines)]
+    return "\n".join(text)
+
+
+def _option(args: list[str], name: str, default: str | None = None) -> str | None:
+    return next((arg.split("=", 1)[1] for arg in args if arg.startswith(f"--{name}=")), default)
+
+
+def _systemctl(units: dict[str, dict], args: list[str]) -> int:
+    command, rest = args[0], args[1:]
+    names = [arg for arg in rest if not arg.startswith("-") and arg.endswith(".service")]
+    if command == "list-units":
+        pattern = next((arg for arg in rest if not arg.startswith("-")), "*")
+        for name, unit in units.items():
+            if fnmatch(name, pattern):
+                print(f"{name} loaded {unit['ActiveState']} {unit['SubState']} {unit['Description']}")
+    elif command == "show":
+        properties = rest[rest.index("-p") + 1].split(",")
+        blocks = ["\n".join(f"{key}={units[name].get(key, '')}" for key in properties) for name in names]
+        print("\n\n".join(blocks))
+    elif command == "status":
+        unit = units[names[0]]
+        print(status_text(unit, int(_option(rest, "lines", "10"))))
+        return 0 if unit["ActiveState"] == "active" else 3
+    return 0
+
+
+def _journalctl(args: list[str]) -> int:
+    lines = int(_option(args, "lines", "10"))
+    for i in range(lines):
+        record = {
+            "__CURSOR": f"s=fake;i={i:x}",
+            "__REALTIME_TIMESTAMP": str(1_760_680_000_000_000 + i * 1_000_000),
+            "PRIORITY": "6",
+            "MESSAGE": JOURNAL_MESSAGE,
+        }
+        print(json.dumps(record))
+    return 0
+
+
+def main() -> int:
+    state = Path(os.environ[STATE_ENV])
+    with (state / "calls.log").open("a") as log:
+        log.write(" ".join(sys.argv[1:]) + "\n")
+    if sys.argv[1] == "journalctl":
+        return _journalctl(sys.argv[2:])
+    units = {unit["Id"]: unit for unit in json.loads((state / "units.json").read_text())}
+    return _systemctl(units, sys.argv[2:])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
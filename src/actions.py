@@ -0,0 +1,371 @@
+import asyncio
+import json
+import logging
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from src.config import ACTION_MAX_PARALLEL, ACTIONS, DATA_DIR
+from src.database import (
+    SLOTS_SCHEMA,
+    SerialWriter,
+    add_column,
+    claim_slot,
+    connect,
+    process_alive,
+    release_slot,
+)
+from src.engine import CollectionEngine, engine
+from src.events import HEARTBEAT_SECONDS, Event
+from src.metrics import SUBPROCESS_DURATION, SUBPROCESS_FAILURES
+
+logger = logging.getLogger(__name__)
+
+ACTIONS_DB_PATH = DATA_DIR / "actions.db"
+DEFAULT_TIMEOUT_SECONDS = 600
+FINISHED_STATES = ("succeeded", "failed", "timed_out")
+MAX_OUTPUT_LINES = 2000  # Kept per run; older lines are dropped
+MAX_LINE_LENGTH = 4096
+MAX_RUNS = 100
+FLUSH_SECONDS = 0.25  # Output is written in batches at most this far apart
+POLL_SECONDS = 0.25  # How often output streams check for new lines
+INTERRUPTED = "Interrupted: the process running the action exited"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (id TEXT PRIMARY KEY, created_at REAL, data TEXT, pid INTEGER);
+CREATE TABLE IF NOT EXISTS output (run_id TEXT, seq INTEGER, stream TEXT, text TEXT, PRIMARY KEY (run_id, seq));
+""" + SLOTS_SCHEMA
+
+
+@dataclass(frozen=True, slots=True)
+class Action:
+    """A command that can be run for a service from its page, e.g. a maintenance script."""
+
+    name: str
+    label: str
+    service: str
+    command: tuple[str, ...]
+    cwd: str | None = None
+    timeout_seconds: float = DEFAULT_TIMEOUT_SECONDS
+
+
+def load_actions(configs: list[dict]) -> dict[str, Action]:
+    """Build actions from `[[tool.config.actions]]` tables, by name."""
+    actions = {}
+    for config in configs:
+        name = config["name"]
+        if name in actions:
+            raise ValueError(f"Duplicate action {name!r}")
+        command = config["command"]
+        if not isinstance(command, list) or not command or not all(isinstance(arg, str) for arg in command):
+            raise ValueError(f"Action {name!r} needs a command as a list of strings")
+        actions[name] = Action(
+            name=name,
+            label=config.get("label", name),
+            service=config["service"],
+            command=tuple(command),
+            cwd=config.get("cwd"),
+            timeout_seconds=config.get("timeout_seconds", DEFAULT_TIMEOUT_SECONDS),
+        )
+    return actions
+
+
+@dataclass
+class ActionRun:
+    id: str
+    action: str
+    service: str
+    state: str = "queued"  # queued, running, succeeded, failed or timed_out
+    exit_code: int | None = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: float | None = None
+
+    @property
+    def finished(self) -> bool:
+        return self.state in FINISHED_STATES
+
+
+@dataclass(frozen=True, slots=True)
+class OutputLine:
+    seq: int
+    stream: str  # stdout or stderr
+    text: str
+
+
+class ActionStore:
+    """Runs and their output in SQLite, so any gunicorn worker can stream a run started by another.
+
+    Each run keeps its last `max_lines` output lines; only the newest `max_runs` runs are kept.
+    Runs left unfinished by a process that no longer exists are marked failed when the store is
+    opened and by `fail_orphans` (run by the collector process at startup and every minute). The runner writes through `save_async`/`append_async`, off the engine's event loop.
+    """
+
+    def __init__(
+        self,
+        path: Path | str | None = ACTIONS_DB_PATH,
+        max_lines: int = MAX_OUTPUT_LINES,
+        max_runs: int = MAX_RUNS,
+    ):
+        self._path = path
+        self.max_lines = max_lines
+        self.max_runs = max_runs
+        self._db: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._writer = SerialWriter("action-store")
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database on first use (call with the lock held)."""
+        if self._db is None:
+            self._db = connect(self._path, _SCHEMA)
+            add_column(self._db, "runs", "pid", "INTEGER")  # Databases of older versions
+            with self._db:
+                self._fail_orphans(self._db)
+        return self._db
+
+    def fail_orphans(self) -> None:
+        """Mark runs of processes that exited failed."""
+        with self._lock, self._connect() as db:
+            self._fail_orphans(db)
+
+    def _fail_orphans(self, db: sqlite3.Connection) -> None:
+        rows = db.execute(
+            "SELECT data, pid FROM runs WHERE json_extract(data, '$.finished_at') IS NULL"
+        ).fetchall()
+        for data, pid in rows:
+            if pid is not None and process_alive(pid):
+                continue
+            run = ActionRun(**json.loads(data))
+            run.state, run.finished_at = "failed", time.time()
+            db.execute("UPDATE runs SET data = ? WHERE id = ?", (json.dumps(asdict(run)), run.id))
+            db.execute(
+                "INSERT INTO output SELECT ?, COALESCE(MAX(seq), 0) + 1, 'stderr', ? FROM output "
+                "WHERE run_id = ?",
+                (run.id, INTERRUPTED, run.id),
+            )
+            logger.warning("Action run %s was interrupted, marked failed", run.id)
+
+    async def claim_async(self, key: str, limit: int) -> bool:
+        """`claim_slot` on the store's writer thread."""
+        return await self._writer.run(self._claim, key, limit)
+
+    def _claim(self, key: str, limit: int) -> bool:
+        with self._lock:
+            return claim_slot(self._connect(), key, limit)
+
+    async def release_async(self, key: str) -> None:
+        await self._writer.run(self._release, key)
+
+    def _release(self, key: str) -> None:
+        with self._lock:
+            release_slot(self._connect(), key)
+
+    def save(self, run: ActionRun) -> None:
+        self._write(run.id, run.created_at, json.dumps(asdict(run)))
+
+    async def save_async(self, run: ActionRun) -> None:
+        await self._writer.run(self._write, run.id, run.created_at, json.dumps(asdict(run)))
+
+    def _write(self, run_id: str, created_at: float, data: str) -> None:
+        with self._lock, self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?)", (run_id, created_at, data, os.getpid())
+            )
+            old = "SELECT id FROM runs ORDER BY created_at DESC LIMIT -1 OFFSET ?"
+            db.execute(f"DELETE FROM output WHERE run_id IN ({old})", (self.max_runs,))
+            db.execute(f"DELETE FROM runs WHERE id IN ({old})", (self.max_runs,))
+
+    def get(self, run_id: str) -> ActionRun | None:
+        with self._lock:
+            row = self._connect().execute("SELECT data FROM runs WHERE id = ?", (run_id,)).fetchone()
+        return ActionRun(**json.loads(row[0])) if row else None
+
+    async def append_async(self, run_id: str, lines: list[OutputLine]) -> None:
+        if lines:
+            await self._writer.run(self.append, run_id, lines)
+
+    def append(self, run_id: str, lines: list[OutputLine]) -> None:
+        if not lines:
+            return
+        with self._lock, self._connect() as db:
+            db.executemany(
+                "INSERT INTO output VALUES (?, ?, ?, ?)",
+                [(run_id, line.seq, line.stream, line.text) for line in lines],
+            )
+            db.execute(
+                "DELETE FROM output WHERE run_id = ? AND seq <= ?", (run_id, lines[-1].seq - self.max_lines)
+            )
+
+    def output(self, run_id: str, after: int = 0, limit: int = 500) -> list[OutputLine]:
+        """Output lines with a sequence number above `after`, oldest first."""
+        with self._lock:
+            rows = (
+                self._connect()
+                .execute(
+                    "SELECT seq, stream, text FROM output WHERE run_id = ? AND seq > ? ORDER BY seq LIMIT ?",
+                    (run_id, after, limit),
+                )
+                .fetchall()
+            )
+        return [OutputLine(*row) for row in rows]
+
+
+class _OutputBuffer:
+    """Collects a run's output lines and writes them to the store in batches."""
+
+    def __init__(self, store: ActionStore, run_id: str):
+        self._store = store
+        self._run_id = run_id
+        self._pending: list[OutputLine] = []
+        self._seq = 0
+
+    def add(self, stream: str, text: str) -> None:
+        self._seq += 1
+        self._pending.append(OutputLine(self._seq, stream, text[:MAX_LINE_LENGTH]))
+
+    async def flush(self) -> None:
+        lines, self._pending = self._pending, []
+        await self._store.append_async(self._run_id, lines)
+
+
+class ActionRunner:
+    """Runs service actions in the background on the collection engine's event loop.
+
+    At most `max_parallel` actions run at once across all gunicorn workers (slots claimed in the
+    shared store); others wait as `queued`. An action that exceeds
+    its `timeout_seconds` is killed. stdout and stderr are written to the store as they arrive.
+    """
+
+    def __init__(
+        self,
+        actions: dict[str, Action],
+        store: ActionStore,
+        engine: CollectionEngine = engine,
+        max_parallel: int = ACTION_MAX_PARALLEL,
+        poll_interval: float = POLL_SECONDS,
+    ):
+        self.actions = actions
+        self.store = store
+        self._engine = engine
+        self.max_parallel = max_parallel
+        self.poll_interval = poll_interval
+
+    def for_service(self, service: str | None) -> list[Action]:
+        return [action for action in self.actions.values() if action.service == service]
+
+    def submit(self, name: str) -> ActionRun:
+        """Queue a run of the named action (KeyError if unknown); returns immediately."""
+        action = self.actions[name]
+        run = ActionRun(id=secrets.token_hex(6), action=name, service=action.service)
+        self.store.save(run)
+        self._engine.submit(self._run(run, action))
+        logger.info("Action %s queued as run %s", name, run.id)
+        return run
+
+    async def _run(self, run: ActionRun, action: Action) -> None:
+        while not await self.store.claim_async(run.id, self.max_parallel):
+            await asyncio.sleep(self.poll_interval)
+        try:
+            run.state = "running"
+            await self.store.save_async(run)
+            output = _OutputBuffer(self.store, run.id)
+            try:
+                with SUBPROCESS_DURATION.time(command=f"action {action.name}"):
+                    run.state, run.exit_code = await self._execute(action, output)
+            except Exception as exc:
+                logger.exception("Action %s failed to run", action.name)
+                output.add("stderr", str(exc))
+                run.state = "failed"
+            if run.state != "succeeded":
+                SUBPROCESS_FAILURES.inc(command=f"action {action.name}")
+            await output.flush()
+            run.finished_at = time.time()
+            await self.store.save_async(run)
+            logger.info("Action run %s (%s) %s", run.id, action.name, run.state)
+        finally:
+            await self.store.release_async(run.id)
+
+    async def _execute(self, action: Action, output: _OutputBuffer) -> tuple[str, int | None]:
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *action.command,
+                cwd=action.cwd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+        except OSError as exc:
+            output.add("stderr", f"{action.command[0]} unavailable: {exc}")
+            return "failed", None
+
+        flusher = asyncio.create_task(self._flush_periodically(output))
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(
+                    self._pump(process.stdout, "stdout", output),
+                    self._pump(process.stderr, "stderr", output),
+                    process.wait(),
+                ),
+                action.timeout_seconds,
+            )
+        except TimeoutError:
+            process.kill()
+            await process.wait()
+            output.add("stderr", f"Killed after {action.timeout_seconds}s")
+            return "timed_out", process.returncode
+        finally:
+            flusher.cancel()
+        return ("succeeded" if process.returncode == 0 else "failed"), process.returncode
+
+    @staticmethod
+    async def _pump(stream: asyncio.StreamReader, name: str, output: _OutputBuffer) -> None:
+        while True:
+            try:
+                line = await stream.readline()
+            except ValueError:  # Longer than the stream's buffer limit; the line is discarded
+                output.add(name, "[line too long]")
+                continue
+            if not line:
+                return
+            output.add(name, line.decode(errors="replace").rstrip("\n"))
+
+    @staticmethod
+    async def _flush_periodically(output: _OutputBuffer) -> None:
+        while True:
+            await asyncio.sleep(FLUSH_SECONDS)
+            await output.flush()
+
+
+def stream_output(
+    store: ActionStore, run_id: str, after: int = 0, poll_interval: float = POLL_SECONDS
+) -> Iterator[str]:
+    """Yield SSE messages with a run's output until it has finished.
+
+    `output` events carry one line each and use its sequence number as the event ID, so a
+    reconnecting browser resumes where it left off. The final `done` event carries the run.
+    """
+    yield "retry: 2000\n\n"
+    idle = 0.0
+    while True:
+        run = store.get(run_id)
+        lines = store.output(run_id, after)
+        for line in lines:
+            yield Event(id=line.seq, type="output", data=json.dumps(asdict(line))).encode()
+            after = line.seq
+        if run is None or (run.finished and not lines):
+            yield Event(id=None, type="done", data=json.dumps(asdict(run) if run else {})).encode()
+            return
+        if lines:
+            idle = 0.0
+            continue
+        if idle >= HEARTBEAT_SECONDS:
+            yield ": heartbeat\n\n"
+            idle = 0.0
+        time.sleep(poll_interval)
+        idle += poll_interval
+
+
+action_runner = ActionRunner(load_actions(ACTIONS), ActionStore())
@@ -0,0 +1,52 @@
+"""Agent mode: serve this host's snapshot to a dashboard aggregating several Pis (`src/nodes.py`).
+
+    python -m src.app --agent --port 5002
+
+The agent collects like the dashboard does but only serves `/api/snapshot`: no pages, alerts or
+history, which stay with the aggregating dashboard.
+"""
+
+from flask import Flask, jsonify, request
+from werkzeug.serving import WSGIRequestHandler
+
+from src.assets import compress_response
+from src.collector import StatusCollector, collector, snapshot_payload
+from src.config import WATCH_UNIT_EVENTS
+from src.services import is_linux
+from src.watcher import JournalEventSource, UnitWatcher
+
+
+class KeepAliveRequestHandler(WSGIRequestHandler):
+    """HTTP/1.1, so the dashboard reuses one connection per agent instead of reconnecting every poll."""
+
+    protocol_version = "HTTP/1.1"
+
+
+def create_agent_app(source: StatusCollector = collector) -> Flask:
+    agent_app = Flask(__name__)
+    agent_app.after_request(compress_response)
+
+    @agent_app.route("/api/snapshot")
+    def api_snapshot():
+        """The snapshot as in `/api/services`: 304 while unchanged, deltas with `?since=&epoch=`."""
+        snapshot = source.get_snapshot()
+        etag = f"{source.epoch}-{snapshot.version}"
+        if request.if_none_match.contains_weak(etag):
+            response = agent_app.response_class(status=304)
+            response.set_etag(etag)
+            return response
+        since = request.args.get("since", type=int)
+        if request.args.get("epoch") != source.epoch:
+            since = None
+        response = jsonify(snapshot_payload(snapshot, source.epoch, since))
+        response.set_etag(etag)
+        return response
+
+    return agent_app
+
+
+def start_agent_threads() -> None:
+    """Start the status collector and unit watcher (no scheduler: alerts come from the dashboard)."""
+    collector.start()
+    if WATCH_UNIT_EVENTS and is_linux():
+        UnitWatcher(JournalEventSource(), collector).start()
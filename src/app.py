@@ -1,12 +1,54 @@
 import logging
 import os
-import subprocess
+import time
+from dataclasses import asdict, replace
+from typing import TYPE_CHECKING, Annotated
 
-from flask import Flask, redirect, render_template, request, url_for
+import typer
+from flask import (
+    Flask,
+    Response,
+    abort,
+    jsonify,
+    redirect,
+    render_template,
+    request,
+    url_for,
+)
+from markupsafe import Markup
+from werkzeug.http import is_resource_modified
 
-from src.canned_info import canned_service_statuses, websites
-from src.scheduler import start_threads
-from src.services import get_info_for_service, get_service_status, get_services, is_linux
+from src.assets import AssetRegistry, send_encoded
+from src.collector import Snapshot, collector, snapshot_payload
+from src.config import DATA_DIR, FLASK_PORT, NODES, STREAM_MAX_CLIENTS
+from src.discovery import is_monitored
+from src.engine import get_info_for_service
+from src.events import broker, missed_events, snapshot_publisher, stream
+from src.metrics import CONTENT_TYPE, REGISTRY, CallbackGauge, Histogram
+from src.pages import (
+    RENDER_CACHE_LOOKUPS,
+    RenderedPage,
+    fragment_cache,
+    last_modified,
+    page_cache,
+    page_etag,
+)
+from src.query import SORT_KEYS, ServiceQuery, get_index
+from src.services import (
+    SERVICE_STATES,
+    ServiceStatus,
+    parse_duration_seconds,
+    service_state,
+    with_current_uptime,
+)
+from src.websites import websites
+
+if TYPE_CHECKING:
+    from src.jobs import RestartJob
+
+# Modules only some routes need (actions, jobs, journal, search, history, availability) and the
+# scheduler are imported by those routes and `app_cli`, so importing the app for gunicorn or a test
+# does not load them all up front
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -15,72 +57,553 @@ logger = logging.getLogger(__name__)
 template_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "templates")
 static_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "static")
 app = Flask(__name__, template_folder=template_dir, static_folder=static_dir)
+assets = AssetRegistry(static_dir, cache_dir=DATA_DIR / "assets")
+assets.init_app(app)
+
+RENDER_DURATION = Histogram(
+    "service_monitor_render_duration_seconds", "Template render duration", ("template",)
+)
 
 
 @app.route("/restart", methods=["POST"])
 def restart_service():
-    """Restart a given service and redirect back to the index view."""
+    """Start a background restart job for a service.
+
+    JSON clients get `202` with the job (poll `/api/jobs/<id>`); plain form posts are redirected
+    back to the service while the restart runs.
+    """
+    from src.jobs import restart_jobs
+
     service = request.form.get("service", "")
-    try:
-        # Requires appropriate sudoers configuration for the running user
-        subprocess.run(["sudo", "systemctl", "restart", service], check=True, text=True, capture_output=True)
-        logger.info("Successfully restarted service %s", service)
-    except subprocess.CalledProcessError as exc:
-        logger.error("Failed to restart %s: %s", service, exc.stderr)
-        return (exc.stderr or f"Failed to restart {service}"), 500
+    if not is_monitored(service):
+        return f"Unknown service {service}", 400
+    return _job_response(restart_jobs.submit(service, [service]), url_for("index", service=service))
 
-    return redirect(url_for("index", service=service))
 
+@app.route("/restart-group", methods=["POST"])
+def restart_group():
+    """Start a background job restarting every unit of a project group, a few at a time."""
+    from src.jobs import restart_jobs
 
-@app.route("/inspector-detector/check", methods=["POST"])
-def inspector_detector_check():
-    """Run the Inspector Detector inspections check command."""
-    service = request.form.get("service", "")
-    cmd = [
-        "/home/mnalavadi/.local/bin/uv",
-        "run",
-        "-m",
-        "scripts.check_inspections",
+    group = request.form.get("group", "")
+    units = [
+        status.name
+        for status in collector.get_snapshot().services
+        if status.project_group == group and status.node is None  # Units of other nodes restart there
     ]
+    if not units:
+        return f"Unknown project group {group}", 404
+    return _job_response(restart_jobs.submit(group, units), url_for("index"))
+
+
+def _job_response(job: "RestartJob", redirect_url: str):
+    if request.accept_mimetypes.best != "application/json":
+        return redirect(redirect_url)
+    return jsonify(job.to_dict()), 202, {"Location": url_for("api_job", job_id=job.id)}
+
+
+@app.route("/api/jobs")
+def api_jobs():
+    """Most recent restart jobs, newest first."""
+    from src.jobs import restart_jobs
+
+    return jsonify(jobs=[job.to_dict() for job in restart_jobs.store.recent()])
 
-    try:
-        result = subprocess.run(
-            cmd, check=True, text=True, capture_output=True, cwd="/home/mnalavadi/inspector_detector"
-        )
-        logger.info("inspector-detector check completed. stdout: %s", (result.stdout or "").strip())
-        if result.stderr:
-            logger.warning("inspector-detector check stderr: %s", result.stderr.strip())
-    except subprocess.CalledProcessError as exc:
-        logger.error("inspector-detector check failed: %s", exc.stderr)
-        return (exc.stderr or "inspector-detector check failed"), 500
 
-    return redirect(url_for("index", service=service))
+@app.route("/api/jobs/<job_id>")
+def api_job(job_id: str):
+    """Status of one restart job: queued, running, active or failed, with per-unit progress."""
+    from src.jobs import restart_jobs
+
+    job = restart_jobs.store.get(job_id)
+    if job is None:
+        return f"Unknown job {job_id}", 404
+    return jsonify(job.to_dict())
+
+
+@app.route("/actions/<name>", methods=["POST"])
+def run_action(name: str):
+    """Start a background run of a service action from `[[tool.config.actions]]`.
+
+    JSON clients get `202` with the run (stream its output from `/api/actions/runs/<id>/stream`);
+    plain form posts are redirected back to the service while it runs.
+    """
+    from src.actions import action_runner
+
+    if name not in action_runner.actions:
+        return f"Unknown action {name}", 404
+    run = action_runner.submit(name)
+    if request.accept_mimetypes.best != "application/json":
+        return redirect(url_for("index", service=run.service))
+    return jsonify(asdict(run)), 202, {"Location": url_for("api_action_run", run_id=run.id)}
+
+
+@app.route("/api/actions/runs/<run_id>")
+def api_action_run(run_id: str):
+    """State of an action run and its output lines after `?after=<seq>` (for polling clients)."""
+    from src.actions import action_runner
+
+    run = action_runner.store.get(run_id)
+    if run is None:
+        return f"Unknown run {run_id}", 404
+    lines = action_runner.store.output(run_id, request.args.get("after", 0, type=int))
+    return jsonify(run=asdict(run), output=[asdict(line) for line in lines])
+
+
+@app.route("/api/actions/runs/<run_id>/stream")
+def api_action_stream(run_id: str):
+    """Server-Sent Events stream of an action run's output, ending with a `done` event."""
+    from src.actions import action_runner, stream_output
+
+    if action_runner.store.get(run_id) is None:
+        return f"Unknown run {run_id}", 404
+    after = request.headers.get("Last-Event-ID", type=int) or request.args.get("after", 0, type=int)
+    return Response(
+        stream_output(action_runner.store, run_id, after),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.route("/")
 def index():
+    """Dashboard, rendered once per snapshot version and selected service.
+
+    Repeat loads of an unchanged page get a 304 from its ETag or Last-Modified without rendering
+    or calling systemctl. Sidebar rows are cached per service version, so a new snapshot only
+    re-renders the services that changed.
+    """
+    service = request.args.get("service") or None
+    snapshot = collector.get_snapshot()
+    # Only pages of current services are rendered and cached, so arbitrary strings cannot fill the cache
+    if service is not None and all(status.name != service for status in snapshot.services):
+        abort(404)
+    epoch = collector.epoch
+    etag = page_etag(epoch, snapshot, service)
+    modified = last_modified(snapshot)
+    if not is_resource_modified(request.environ, etag=etag, last_modified=modified):
+        RENDER_CACHE_LOOKUPS.inc(cache="page", result="not_modified")
+        return _page_response(None, etag, modified, status=304)
+
+    page = page_cache.get_or_render(etag, lambda: RenderedPage(_render_index(snapshot, epoch, service)))
+    return _page_response(page, etag, modified)
+
+
+def _render_index(snapshot: Snapshot, epoch: str, service: str | None) -> str:
+    from src.actions import action_runner
+
+    status = next((s for s in snapshot.services if s.name == service), None)
+    current_group = status.project_group if status else None
+    current_node = status.node if status else None
+    if current_node:
+        # Units of other nodes (src/nodes.py) are only known from their agent's snapshot
+        selected_service_info = _remote_service_info(status)
+    else:
+        # Status header only for the selected service; its logs are paged in from /api/logs
+        selected_service_info = get_info_for_service(service, lines=0) if service else ""
+
+    with RENDER_DURATION.time(template="index.html"):
+        return render_template(
+            "index.html",
+            services=snapshot.services,
+            sidebar_items=_render_sidebar(snapshot, epoch, service),
+            snapshot_version=snapshot.version,
+            snapshot_epoch=epoch,
+            current=service,
+            current_group=current_group,
+            current_node=current_node,
+            current_group_size=sum(
+                s.project_group == current_group and s.node is None for s in snapshot.services
+            ),
+            actions=action_runner.for_service(service),
+            selected_service_info=selected_service_info,
+            websites=websites,
+        )
+
+
+def _remote_service_info(status: ServiceStatus) -> str:
+    status = with_current_uptime(status)
+    lines = [f"{status.name} ({service_state(status)}) on node {status.node}"]
+    lines += [
+        f"{label}: {value}"
+        for label, value in (
+            ("Uptime", status.uptime),
+            ("Memory", status.memory),
+            ("CPU", status.cpu),
+            ("Last error", status.last_error),
+            ("Collection error", status.collection_error),
+        )
+        if value
+    ]
+    return "\n".join(lines)
+
+
+def _render_row(snapshot: Snapshot, epoch: str, status: ServiceStatus, selected: bool = False) -> str:
+    """Sidebar row of a service from `_service_item.html`, for pages and /api/services payloads."""
+    key = (epoch, status.name, snapshot.service_versions.get(status.name, snapshot.version), selected)
+    return fragment_cache.get_or_render(
+        key,
+        lambda: app.jinja_env.get_template("_service_item.html").render(
+            svc=with_current_uptime(status), selected=selected
+        ),
+    )
+
+
+def _render_sidebar(snapshot: Snapshot, epoch: str, current: str | None) -> Markup:
+    return Markup(
+        "\n".join(
+            _render_row(snapshot, epoch, status, status.name == current) for status in snapshot.services
+        )
+    )
+
+
+# Live updates carry the changed rows rendered from the same partial as the page
+collector.add_listener(snapshot_publisher(_render_row))
+
+
+def _page_response(page: RenderedPage | None, etag: str, modified, status: int = 200) -> Response:
+    response = Response(status=status, mimetype="text/html")
+    response.set_etag(etag)
+    response.last_modified = modified
+    # Browsers may keep the page but must revalidate it, which is a cheap 304 while nothing changed
+    response.cache_control.no_cache = True
+    if page is None:
+        return response
+    # The cached page keeps its compressed bodies, so a hit is not compressed again
+    return send_encoded(response, page.body, len(page))
+
+
+@app.route("/api/services")
+def api_services():
+    """Service statuses as JSON.
+
+    The ETag is the snapshot version, so an unchanged snapshot costs a 304. With
+    `?since=<version>&epoch=<epoch>` only services that changed after that version are returned;
+    `names` always lists every current service so clients can drop removed ones.
+
+    Query: `group`, `state` (active|failed|inactive|unknown), `suffix` and `q` (name substring) filter;
+    `sort` (name|memory|cpu|uptime, numeric ones largest first) and `limit` return the top k.
+    Filtered responses add `total` matches and per-group/state/suffix `facets`.
+    """
+    query = ServiceQuery(
+        group=request.args.get("group") or None,
+        state=request.args.get("state") or None,
+        suffix=request.args.get("suffix") or None,
+        search=request.args.get("q") or None,
+        sort=request.args.get("sort") or None,
+        limit=request.args.get("limit", type=int),
+    )
+    if query.state is not None and query.state not in SERVICE_STATES:
+        return f"Unknown state {query.state}", 400
+    if query.sort is not None and query.sort != "name" and query.sort not in SORT_KEYS:
+        return f"Unknown sort {query.sort}", 400
+    if query.limit is not None and query.limit < 1:
+        return "limit must be positive", 400
+
+    snapshot = collector.get_snapshot()
+    etag = f"{collector.epoch}-{snapshot.version}"
+    # Weak comparison: compressed responses carry the ETag as W/"..."
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+
+    since = request.args.get("since", type=int)
+    if request.args.get("epoch") != collector.epoch:
+        since = None
+    if query == ServiceQuery():
+        payload = snapshot_payload(snapshot, collector.epoch, since, render_row=_render_row)
+    else:
+        index = get_index(snapshot)
+        services, total = index.query(query)
+        payload = snapshot_payload(
+            replace(snapshot, services=tuple(services)), collector.epoch, since, render_row=_render_row
+        )
+        payload.update(total=total, facets=index.facets())
+    response = jsonify(payload)
+    response.set_etag(etag)
+    return response
+
+
+@app.route("/api/stream")
+def api_stream():
+    """Server-Sent Events stream of snapshot changes.
+
+    Every event carries the same payload as `/api/services?since=<previous version>`. Reconnecting
+    clients send `Last-Event-ID` and get what they missed as one delta, or a `resync` event. Each open
+    stream holds a server thread, so past `stream_max_clients` per worker clients get `503` and poll.
+    """
+    if broker.client_count >= STREAM_MAX_CLIENTS:
+        return "Too many open streams", 503, {"Retry-After": "30"}
+    last_event_id = request.headers.get("Last-Event-ID")
+    subscription = broker.subscribe(lambda: missed_events(last_event_id, _render_row))
+    return Response(
+        stream(subscription),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.route("/api/logs/<service>")
+def api_logs(service: str):
+    """Page through a service's journal.
+
+    Without a cursor the newest entries are returned. `?before=<cursor>` loads older entries,
+    `?after=<cursor>` returns entries written since (live tail). `limit` caps the page size.
+    """
+    from src.journal import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, journal_reader
+
+    if not is_monitored(service):
+        return f"Unknown service {service}", 404
+    limit = max(1, min(request.args.get("limit", DEFAULT_PAGE_SIZE, type=int), MAX_PAGE_SIZE))
+    if before := request.args.get("before"):
+        page = journal_reader.before(service, before, limit)
+    elif after := request.args.get("after"):
+        page = journal_reader.after(service, after, limit)
+    else:
+        page = journal_reader.latest(service, limit)
+    return jsonify(asdict(page))
+
+
+@app.route("/api/search")
+def api_search():
+    """Full-text search over the indexed journals of all monitored units.
+
+    Query: `q` (every word must match, `word*` for prefixes), optional `unit`, `since` (Unix
+    seconds, or an age like `7d`/`12h`), `order` (rank|oldest|newest), `limit` and `context`
+    (entries of the same unit shown before and after each hit).
+    """
+    from src.search import (
+        DEFAULT_HITS,
+        MAX_CONTEXT_LINES,
+        MAX_HITS,
+        ORDERS,
+        search_index,
+    )
+
+    query = request.args.get("q", "").strip()
+    unit = request.args.get("unit") or None
+    order = request.args.get("order", "rank")
+    if not query:
+        return "Missing q", 400
+    if unit is not None and not is_monitored(unit):
+        return f"Unknown service {unit}", 404
+    if order not in ORDERS:
+        return f"Unknown order {order}", 400
+    since = None
+    if since_arg := request.args.get("since"):
+        try:
+            since = float(since_arg)
+        except ValueError:
+            age = parse_duration_seconds(since_arg)
+            if age is None:
+                return f"Invalid since {since_arg}", 400
+            since = time.time() - age
+    limit = max(1, min(request.args.get("limit", DEFAULT_HITS, type=int), MAX_HITS))
+    context = max(0, min(request.args.get("context", 2, type=int), MAX_CONTEXT_LINES))
+
+    started = time.perf_counter()
+    try:
+        hits = search_index.search(
+            query,
+            unit=unit,
+            since=int(since * 1e6) if since else None,
+            limit=limit,
+            context=context,
+            order=order,
+        )
+    except ValueError as exc:
+        return str(exc), 400
+    took_ms = round((time.perf_counter() - started) * 1000, 2)
+    return jsonify(query=query, hits=[asdict(hit) for hit in hits], took_ms=took_ms)
+
+
+@app.route("/api/history")
+def api_history():
+    """Memory (bytes) or CPU (% of one core) history per service, for sidebar sparklines.
+
+    Query: `metric` (memory|cpu), `window` in seconds (default 1 day), `points` per series
+    (default 60), optional `service` to limit to one unit.
+    """
+    from src.history import METRICS, downsample, history_store
+
+    metric = request.args.get("metric", "memory")
+    if metric not in METRICS:
+        return f"Unknown metric {metric}", 400
+    window = request.args.get("window", 86400, type=int)
+    max_points = max(1, request.args.get("points", 60, type=int))
     service = request.args.get("service")
-    if is_linux():
-        services = get_services()
-        service_statuses = [get_service_status(svc) for svc in services]
+    names = [service] if service else [status.name for status in collector.get_snapshot().services]
+
+    series = {}
+    step = None
+    for name in names:
+        step, points = history_store.query(name, metric, window)
+        series[name] = downsample(points, max_points)
+    return jsonify(metric=metric, window=window, step=step, series=series)
+
+
+@app.route("/api/availability")
+def api_availability():
+    """Share of time active per service and project group over the last 24h, 7d and 30d.
+
+    Query: optional `service` or `group` to limit to one. Read from hourly and daily rollups,
+    so the cost does not grow with the history.
+    """
+    from src.availability import WINDOWS, availability_store, group_name
+
+    service = request.args.get("service")
+    group = request.args.get("group")
+    if service or group:
+        services = availability_store.availability("service", [service]) if service else {}
+        groups = availability_store.availability("group", [group]) if group else {}
     else:
-        service_statuses = canned_service_statuses
+        statuses = collector.get_snapshot().services
+        services = availability_store.availability("service", [status.name for status in statuses])
+        groups = availability_store.availability("group", sorted({group_name(status) for status in statuses}))
+    return jsonify(windows=[label for label, _, _ in WINDOWS], services=services, groups=groups)
+
+
+@app.route("/api/incidents")
+def api_incidents():
+    """Outages (from the first failed/inactive state until active again), newest first.
 
-    # Get detailed info for selected service if one is selected
-    selected_service_info = get_info_for_service(service) if service else ""
+    Query: optional `service` or `group`, and `limit`. Ongoing incidents have no `ended_at`.
+    """
+    from src.availability import DEFAULT_INCIDENTS, MAX_INCIDENTS, availability_store
 
-    return render_template(
-        "index.html",
-        services=service_statuses,
-        current=service,
-        selected_service_info=selected_service_info,
-        websites=websites,
+    limit = max(1, min(request.args.get("limit", DEFAULT_INCIDENTS, type=int), MAX_INCIDENTS))
+    incidents = availability_store.incidents(
+        service=request.args.get("service"), group=request.args.get("group"), limit=limit
     )
+    return jsonify(
+        incidents=[
+            {**asdict(incident), "duration_seconds": incident.duration_seconds} for incident in incidents
+        ]
+    )
+
+
+@app.route("/metrics")
+def metrics():
+    """Prometheus metrics: instrumentation counters and histograms plus per-service gauges."""
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
+
+
+def _service_samples(value_fn):
+    """Gauge callback yielding one sample per service in the current snapshot."""
+
+    def samples():
+        return [
+            ({"service": status.name, "group": status.project_group}, value_fn(status))
+            for status in collector.get_snapshot().services
+        ]
+
+    return samples
+
+
+def _snapshot_age() -> list:
+    collected_at = collector.get_snapshot().collected_at
+    return [({}, time.time() - collected_at)] if collected_at else []
+
+
+SERVICE_LABELS = ("service", "group")
+# Every worker serves the same shared snapshot, so these are not added up across processes
+CallbackGauge(
+    "service_monitor_service_up",
+    "1 if the service is active",
+    _service_samples(lambda s: int(s.is_active)),
+    SERVICE_LABELS,
+    shared=False,
+)
+CallbackGauge(
+    "service_monitor_service_failed",
+    "1 if the service failed",
+    _service_samples(lambda s: int(s.is_failed)),
+    SERVICE_LABELS,
+    shared=False,
+)
+CallbackGauge(
+    "service_monitor_service_memory_bytes",
+    "Current memory usage",
+    _service_samples(lambda s: s.memory_bytes),
+    SERVICE_LABELS,
+    shared=False,
+)
+CallbackGauge(
+    "service_monitor_service_cpu_seconds",
+    "CPU time used since the service started",
+    _service_samples(lambda s: s.cpu_nsec / 1e9 if s.cpu_nsec is not None else None),
+    SERVICE_LABELS,
+    shared=False,
+)
+CallbackGauge(
+    "service_monitor_service_uptime_seconds",
+    "Time since the service became active",
+    _service_samples(lambda s: with_current_uptime(s).uptime_seconds),
+    SERVICE_LABELS,
+    shared=False,
+)
+CallbackGauge(
+    "service_monitor_snapshot_version",
+    "Current snapshot version",
+    lambda: [({}, collector.get_snapshot().version)],
+    shared=False,
+)
+CallbackGauge(
+    "service_monitor_snapshot_age_seconds", "Seconds since the last collection", _snapshot_age, shared=False
+)
+CallbackGauge(
+    "service_monitor_stream_clients",
+    "Connected Server-Sent Events clients",
+    lambda: [({}, broker.client_count)],
+)
+
+
+def app_cli(
+    port: int = typer.Option(FLASK_PORT, help="HTTP port"),
+    agent: bool = typer.Option(False, "--agent", help="Only collect and serve /api/snapshot for a dashboard"),
+    node: Annotated[
+        list[str] | None, typer.Option(help="Agent to aggregate as name=url (repeatable)")
+    ] = None,
+    profile_startup: bool = typer.Option(
+        False, "--profile-startup", help="Log the time spent in each startup phase and import"
+    ),
+) -> None:
+    """Run the dashboard (aggregating any configured nodes), or an agent for another dashboard.
+
+    The port is bound before the collector starts, so the server accepts connections while the
+    first collection runs; early requests wait for that collection instead of being refused.
+    """
+    from werkzeug.serving import make_server
+
+    from src.agent import KeepAliveRequestHandler, create_agent_app, start_agent_threads
+    from src.nodes import aggregate, load_nodes, parse_node
+    from src.scheduler import start_threads
+    from src.startup import StartupProfile, report_when_ready
+
+    profile = StartupProfile()
+
+    if agent:
+        server = make_server(
+            "0.0.0.0", port, create_agent_app(), threaded=True, request_handler=KeepAliveRequestHandler
+        )
+        start = start_agent_threads
+    else:
+        if nodes := load_nodes(NODES) + [parse_node(spec) for spec in node or []]:
+            aggregate(collector, nodes)
+        server = make_server("0.0.0.0", port, app, threaded=True)
+        start = start_threads
+    profile.mark("port bound")
+    start()
+    profile.mark("threads started")
+    if profile_startup:
+        report_when_ready(profile, collector.get_snapshot, "src.app")
+    logger.info("Serving on http://0.0.0.0:%s", port)
+    server.serve_forever()
 
 
 def main():
-    start_threads()
-    app.run(host="0.0.0.0", port=5001, debug=False)
+    typer.run(app_cli)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,199 @@
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+
+from flask import Flask, Response, current_app, request
+
+try:
+    import brotli
+except ImportError:  # Optional: install `brotli` to serve br (smaller than gzip) to browsers that accept it
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+COMPRESSIBLE_TYPES = {"text/css", "text/javascript", "application/javascript", "image/svg+xml"}
+DYNAMIC_TYPES = {"text/html", "application/json"}  # Responses compressed on the fly
+MIN_COMPRESS_BYTES = 512  # Smaller bodies are not worth the CPU or the Content-Encoding header
+HASH_LENGTH = 12
+
+
+def encodings() -> tuple[str, ...]:
+    """Supported content encodings, best first."""
+    return ("br", "gzip") if brotli else ("gzip",)
+
+
+def compress(content: bytes, encoding: str, dynamic: bool = False) -> bytes:
+    """Compress with maximum effort for static assets (once at startup), cheaply for responses."""
+    if encoding == "br":
+        return brotli.compress(content, quality=4 if dynamic else 11)
+    return gzip.compress(content, compresslevel=6 if dynamic else 9, mtime=0)
+
+
+def fingerprint(name: str, content: bytes) -> str:
+    """`app.css` -> `app.<content hash>.css`."""
+    digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+    stem, dot, suffix = name.rpartition(".")
+    return f"{stem}.{digest}.{suffix}" if dot else f"{name}.{digest}"
+
+
+def _negotiate(available) -> str | None:
+    """The best encoding in `available` that the client accepts, or None for identity."""
+    accepted = request.accept_encodings
+    return next((encoding for encoding in encodings() if encoding in available and accepted[encoding]), None)
+
+
+@dataclass(frozen=True)
+class Asset:
+    mimetype: str
+    variants: dict[str, bytes]  # Body per content encoding ("identity", "gzip", "br")
+
+
+class AssetRegistry:
+    """Static files under content-hashed names, precompressed on first use.
+
+    `url_for('static', filename='app.js')` returns `/static/app.<hash>.js`, which is served from
+    memory with an immutable `Cache-Control`, so browsers only fetch a file again after it changes.
+    Unhashed names are still served from disk by Flask, e.g. for pages cached before a deploy.
+
+    Maximum-effort compression (brotli at quality 11 above all) is slow on a Pi, so with a
+    `cache_dir` the compressed files are kept there by fingerprinted name and a restart only
+    recompresses files that changed. The files are read with the first request rather than at
+    import, so importing the app stays fast (`load()` does it up front, e.g. before gunicorn forks).
+    """
+
+    def __init__(self, static_dir: Path | str, cache_dir: Path | str | None = None):
+        self.static_dir = Path(static_dir)
+        self.names: dict[str, str] = {}  # filename -> fingerprinted filename
+        self.assets: dict[str, Asset] = {}  # fingerprinted filename -> asset
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def load(self) -> None:
+        """Fingerprint and compress the static files, once."""
+        if self._loaded:
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            for path in sorted(self.static_dir.rglob("*")):
+                if path.is_file() and not path.name.startswith("."):
+                    self._add(path.relative_to(self.static_dir).as_posix(), path.read_bytes())
+            self._prune_cache()
+            self._loaded = True
+        logger.info("Fingerprinted %d static files", len(self.assets))
+
+    def _add(self, name: str, content: bytes) -> None:
+        mimetype = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        variants = {"identity": content}
+        hashed = fingerprint(name, content)
+        if mimetype in COMPRESSIBLE_TYPES and len(content) >= MIN_COMPRESS_BYTES:
+            for encoding in encodings():
+                variants[encoding] = self._compressed(hashed, content, encoding)
+        self.names[name] = hashed
+        self.assets[hashed] = Asset(mimetype, variants)
+
+    def _cache_path(self, hashed: str, encoding: str) -> Path:
+        return self.cache_dir / f"{hashed.replace('/', '__')}.{encoding}"
+
+    def _compressed(self, hashed: str, content: bytes, encoding: str) -> bytes:
+        if self.cache_dir is None:
+            return compress(content, encoding)
+        path = self._cache_path(hashed, encoding)
+        try:
+            return path.read_bytes()
+        except FileNotFoundError:
+            pass
+        body = compress(content, encoding)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            partial = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            partial.write_bytes(body)
+            partial.replace(path)  # Atomic, for gunicorn workers starting at the same time
+        except OSError as exc:
+            logger.warning("Could not cache compressed %s: %s", hashed, exc)
+        return body
+
+    def _prune_cache(self) -> None:
+        """Drop compressed files of assets that changed or were removed."""
+        if self.cache_dir is None or not self.cache_dir.is_dir():
+            return
+        current = {
+            self._cache_path(hashed, encoding).name
+            for hashed, asset in self.assets.items()
+            for encoding in asset.variants
+        }
+        for path in self.cache_dir.iterdir():
+            if path.name not in current and not path.name.endswith(".tmp"):
+                path.unlink(missing_ok=True)
+
+    def init_app(self, app: Flask) -> None:
+        app.url_defaults(self._url_defaults)
+        app.view_functions["static"] = self.send
+        app.after_request(compress_response)
+
+    def _url_defaults(self, endpoint: str, values: dict) -> None:
+        if endpoint != "static":
+            return
+        self.load()
+        if values.get("filename") in self.names:
+            values["filename"] = self.names[values["filename"]]
+
+    def send(self, filename: str) -> Response:
+        """View for `/static/<filename>`."""
+        self.load()
+        asset = self.assets.get(filename)
+        if asset is None:
+            return current_app.send_static_file(filename)
+        encoding = _negotiate(asset.variants)
+        response = Response(asset.variants[encoding or "identity"], mimetype=asset.mimetype)
+        response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        response.vary.add("Accept-Encoding")
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        return response
+
+
+def send_encoded(response: Response, body: Callable[[str], bytes], length: int) -> Response:
+    """Set the response body in the best encoding the client accepts.
+
+    `body(encoding)` returns the `length`-byte content in that encoding ("identity" for none), so
+    callers that keep compressed bodies around (`src/pages.py`) do not compress them again.
+    """
+    response.vary.add("Accept-Encoding")
+    encoding = _negotiate(encodings())
+    if encoding is None or length < MIN_COMPRESS_BYTES:
+        response.set_data(body("identity"))
+        return response
+    response.set_data(body(encoding))
+    response.headers["Content-Encoding"] = encoding
+    # The compressed body differs byte for byte, so a strong validator becomes a weak one
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def compress_response(response: Response) -> Response:
+    """after_request hook: compress HTML and JSON responses for clients that accept it."""
+    if (
+        response.mimetype not in DYNAMIC_TYPES
+        or response.status_code != 200
+        or response.is_streamed
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+    ):
+        return response
+    data = response.get_data()
+    return send_encoded(
+        response,
+        lambda encoding: data if encoding == "identity" else compress(data, encoding, dynamic=True),
+        len(data),
+    )
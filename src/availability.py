@@ -0,0 +1,370 @@
+"""State-transition history and availability rollups per service and project group.
+
+Every state change seen in a snapshot is appended to a `transitions` table. Up and total seconds
+are added incrementally to hourly and daily rollups, and outages are kept as `incidents` rows,
+so 24h/7d/30d availability and incident timelines are read from a bounded number of rows instead
+of replaying the history.
+
+A service counts as up while active and as down while failed or inactive. Time where its state is
+unknown (collection errors, or while the monitor itself was not running) counts as neither, and so
+does time while it is not in the snapshot, e.g. while a disabled unit is stopped (`is_retired`).
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from src.collector import Snapshot
+from src.config import AVAILABILITY_RETENTION_DAYS, DATA_DIR
+from src.database import connect
+from src.metrics import Counter
+from src.services import ServiceStatus, service_state
+
+logger = logging.getLogger(__name__)
+
+AVAILABILITY_DB_PATH = DATA_DIR / "availability.db"
+HOUR = 3600
+DAY = 86400
+# Rollup bucket seconds and how long they are kept
+ROLLUPS = ((HOUR, 31 * DAY), (DAY, 400 * DAY))
+# Reported windows and the rollup they are summed from, rounded to whole buckets
+WINDOWS = (("24h", DAY, HOUR), ("7d", 7 * DAY, DAY), ("30d", 30 * DAY, DAY))
+UP_STATES = ("active",)
+DOWN_STATES = ("failed", "inactive")
+# States that end an outage without counting as up: the unit left the snapshot (disabled or uninstalled)
+RETIRED_STATES = ("removed",)
+# Gaps between snapshots longer than this (the monitor was stopped) are not accounted
+MAX_GAP_SECONDS = 300
+FLUSH_INTERVAL_SECONDS = 60
+PRUNE_INTERVAL_SECONDS = 3600
+DEFAULT_INCIDENTS = 20
+MAX_INCIDENTS = 200
+
+STATE_TRANSITIONS = Counter(
+    "service_monitor_state_transitions_total", "Service state transitions recorded", ("state",)
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transitions (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    service TEXT NOT NULL,
+    project_group TEXT NOT NULL,
+    node TEXT,
+    from_state TEXT,
+    to_state TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS transitions_service ON transitions (service, ts);
+CREATE INDEX IF NOT EXISTS transitions_ts ON transitions (ts);
+CREATE TABLE IF NOT EXISTS rollups (
+    scope TEXT NOT NULL,
+    name TEXT NOT NULL,
+    step INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    up REAL NOT NULL,
+    total REAL NOT NULL,
+    PRIMARY KEY (scope, name, step, bucket)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS rollups_bucket ON rollups (step, bucket);
+CREATE TABLE IF NOT EXISTS incidents (
+    id INTEGER PRIMARY KEY,
+    service TEXT NOT NULL,
+    project_group TEXT NOT NULL,
+    node TEXT,
+    state TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    ended_at REAL
+);
+CREATE INDEX IF NOT EXISTS incidents_service ON incidents (service, started_at);
+CREATE INDEX IF NOT EXISTS incidents_group ON incidents (project_group, started_at);
+CREATE INDEX IF NOT EXISTS incidents_started ON incidents (started_at);
+-- Last known state of every unit, accounted into the rollups up to accounted_until
+CREATE TABLE IF NOT EXISTS units (
+    service TEXT PRIMARY KEY,
+    project_group TEXT NOT NULL,
+    node TEXT,
+    state TEXT NOT NULL,
+    since REAL NOT NULL,
+    accounted_until REAL NOT NULL,
+    incident_id INTEGER
+);
+"""
+
+
+def group_name(status: ServiceStatus) -> str:
+    """Project group, qualified like the unit names of other nodes (src/nodes.py)."""
+    return f"{status.node}/{status.project_group}" if status.node else status.project_group
+
+
+@dataclass
+class _Unit:
+    project_group: str
+    node: str | None
+    state: str
+    since: float
+    accounted_until: float
+    incident_id: int | None = None
+
+
+@dataclass
+class Incident:
+    id: int
+    service: str
+    project_group: str
+    node: str | None
+    state: str
+    started_at: float
+    ended_at: float | None
+
+    @property
+    def duration_seconds(self) -> float | None:
+        return self.ended_at - self.started_at if self.ended_at is not None else None
+
+
+def _split(start: float, end: float, step: int) -> list[tuple[int, float]]:
+    """(bucket, seconds) pieces of [start, end) on `step`-second bucket boundaries."""
+    pieces = []
+    while start < end:
+        bucket = _bucket_start(start, step)
+        piece_end = min(end, bucket + step)
+        pieces.append((bucket, piece_end - start))
+        start = piece_end
+    return pieces
+
+
+def _bucket_start(timestamp: float, step: int) -> int:
+    return int(timestamp // step * step)
+
+
+def _percent(up: float, total: float) -> float | None:
+    return round(up / total * 100, 3) if total else None
+
+
+class AvailabilityStore:
+    """Append-only transition log with incrementally maintained rollups and incidents.
+
+    Only the collector process records; it keeps the last state of every unit in memory and
+    accounts the time since the previous flush on every transition, or at least every
+    FLUSH_INTERVAL_SECONDS (a scheduler job records the current snapshot, since an unchanged
+    snapshot is not published to listeners). Reads only use the database, so web workers see the same numbers,
+    including the not yet flushed time of each unit's current state.
+    """
+
+    def __init__(
+        self,
+        path: Path | str | None = AVAILABILITY_DB_PATH,
+        clock=time.time,
+        retention_days: float = AVAILABILITY_RETENTION_DAYS,
+    ):
+        self._path = path
+        self._clock = clock
+        self.retention_seconds = retention_days * DAY
+        self._db: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._units: dict[str, _Unit] | None = None
+        self._last_flush = 0.0
+        self._last_prune = 0.0
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database on first use (call with the lock held)."""
+        if self._db is None:
+            self._db = connect(self._path, _SCHEMA)
+        return self._db
+
+    def _load_units(self, db: sqlite3.Connection) -> dict[str, _Unit]:
+        if self._units is None:
+            rows = db.execute(
+                "SELECT service, project_group, node, state, since, accounted_until, incident_id FROM units"
+            )
+            self._units = {row[0]: _Unit(*row[1:]) for row in rows}
+        return self._units
+
+    def record(self, snapshot: Snapshot) -> int:
+        """Record the state of every service in the snapshot, returning the number of transitions."""
+        now = snapshot.collected_at or self._clock()
+        with self._lock, self._connect() as db:
+            units = self._load_units(db)
+            changes = []
+            for status in snapshot.services:
+                state = service_state(status)
+                unit = units.get(status.name)
+                if unit is None or unit.state != state:
+                    changes.append((status.name, unit, state, status))
+            names = {status.name for status in snapshot.services}
+            changes += [(name, unit, "removed", None) for name, unit in units.items() if name not in names]
+            if not changes and now - self._last_flush < FLUSH_INTERVAL_SECONDS:
+                return 0
+            self._accrue(db, units, now)
+            for name, unit, state, status in changes:
+                self._transition(db, units, name, unit, state, status, now)
+            db.executemany(
+                "INSERT OR REPLACE INTO units VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (name, u.project_group, u.node, u.state, u.since, u.accounted_until, u.incident_id)
+                    for name, u in units.items()
+                ],
+            )
+            self._last_flush = now
+            if now - self._last_prune >= PRUNE_INTERVAL_SECONDS:
+                self._prune(db, now)
+                self._last_prune = now
+        return len(changes)
+
+    def _accrue(self, db: sqlite3.Connection, units: dict[str, _Unit], now: float) -> None:
+        """Add the time since each unit was last accounted to the rollups of its current state."""
+        totals: dict[tuple[str, str, int, int], list[float]] = {}
+        for name, unit in units.items():
+            start, unit.accounted_until = unit.accounted_until, now
+            if unit.state not in UP_STATES + DOWN_STATES or not 0 < now - start <= MAX_GAP_SECONDS:
+                continue
+            for step, _ in ROLLUPS:
+                for bucket, seconds in _split(start, now, step):
+                    for key in (("service", name, step, bucket), ("group", unit.project_group, step, bucket)):
+                        row = totals.setdefault(key, [0.0, 0.0])
+                        row[0] += seconds if unit.state in UP_STATES else 0.0
+                        row[1] += seconds
+        db.executemany(
+            "INSERT INTO rollups VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT DO UPDATE "
+            "SET up = up + excluded.up, total = total + excluded.total",
+            [(*key, up, total) for key, (up, total) in totals.items()],
+        )
+
+    def _transition(
+        self,
+        db: sqlite3.Connection,
+        units: dict[str, _Unit],
+        name: str,
+        unit: _Unit | None,
+        state: str,
+        status: ServiceStatus | None,
+        now: float,
+    ) -> None:
+        if unit is None:
+            unit = units[name] = _Unit(group_name(status), status.node, state, now, now)
+            from_state = None
+        else:
+            from_state = unit.state
+            unit.state, unit.since = state, now
+        db.execute(
+            "INSERT INTO transitions (ts, service, project_group, node, from_state, to_state) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (now, name, unit.project_group, unit.node, from_state, state),
+        )
+        STATE_TRANSITIONS.inc(state=state)
+        # An outage lasts from the first down state until the unit is up again (or removed from the
+        # snapshot, e.g. disabled); unknown states in between neither end nor start one
+        if state in DOWN_STATES and unit.incident_id is None:
+            unit.incident_id = db.execute(
+                "INSERT INTO incidents (service, project_group, node, state, started_at) VALUES (?, ?, ?, ?, ?)",
+                (name, unit.project_group, unit.node, state, now),
+            ).lastrowid
+        elif (state in UP_STATES or state in RETIRED_STATES) and unit.incident_id is not None:
+            db.execute("UPDATE incidents SET ended_at = ? WHERE id = ?", (now, unit.incident_id))
+            unit.incident_id = None
+        if state == "removed":
+            del units[name]
+            db.execute("DELETE FROM units WHERE service = ?", (name,))
+
+    def _prune(self, db: sqlite3.Connection, now: float) -> None:
+        for step, kept in ROLLUPS:
+            db.execute("DELETE FROM rollups WHERE step = ? AND bucket < ?", (step, now - kept))
+        cutoff = now - self.retention_seconds
+        db.execute("DELETE FROM transitions WHERE ts < ?", (cutoff,))
+        db.execute("DELETE FROM incidents WHERE ended_at < ?", (cutoff,))
+
+    def availability(self, scope: str = "service", names: list[str] | None = None) -> dict[str, dict]:
+        """Availability per service (or `scope="group"`) over each of WINDOWS.
+
+        Returns {name: {window: {"percent", "up_seconds", "down_seconds"}}}; percent is None
+        while nothing was accounted in a window.
+        """
+        now = self._clock()
+        # Oldest bucket needed of each rollup
+        earliest: dict[int, float] = {}
+        for _, window, step in WINDOWS:
+            earliest[step] = min(earliest.get(step, now), _bucket_start(now - window, step))
+        query = "SELECT name, step, bucket, up, total FROM rollups WHERE scope = ? AND ({})".format(
+            " OR ".join("(step = ? AND bucket >= ?)" for _ in earliest)
+        )
+        params: list = [scope, *(value for item in earliest.items() for value in item)]
+        if names is not None:
+            query += f" AND name IN ({', '.join('?' * len(names))})"
+            params += names
+        column = "service" if scope == "service" else "project_group"
+        live = (
+            f"SELECT {column}, state, accounted_until FROM units "
+            f"WHERE state IN ({', '.join('?' * len(UP_STATES + DOWN_STATES))}) AND accounted_until > ?"
+        )
+        with self._lock:
+            db = self._connect()
+            rows = db.execute(query, params).fetchall()
+            live_rows = db.execute(live, (*UP_STATES, *DOWN_STATES, now - MAX_GAP_SECONDS)).fetchall()
+
+        totals: dict[str, dict[str, list[float]]] = {}
+        for name, step, bucket, up, total in rows:
+            for label, window, window_step in WINDOWS:
+                if step == window_step and bucket >= _bucket_start(now - window, step):
+                    sums = totals.setdefault(name, {}).setdefault(label, [0.0, 0.0])
+                    sums[0] += up
+                    sums[1] += total
+        # Time since the last flush, not in the rollups yet
+        for name, state, accounted_until in live_rows:
+            if names is not None and name not in names:
+                continue
+            for label, _, _ in WINDOWS:
+                sums = totals.setdefault(name, {}).setdefault(label, [0.0, 0.0])
+                sums[0] += now - accounted_until if state in UP_STATES else 0.0
+                sums[1] += now - accounted_until
+
+        result = {}
+        for name in names if names is not None else totals:
+            windows = totals.get(name, {})
+            result[name] = {}
+            for label, _, _ in WINDOWS:
+                up, total = windows.get(label, (0.0, 0.0))
+                result[name][label] = {
+                    "percent": _percent(up, total),
+                    "up_seconds": round(up, 1),
+                    "down_seconds": round(total - up, 1),
+                }
+        return result
+
+    def incidents(
+        self,
+        service: str | None = None,
+        group: str | None = None,
+        limit: int = DEFAULT_INCIDENTS,
+    ) -> list[Incident]:
+        """Outages, newest first, optionally of one service or project group."""
+        query = "SELECT id, service, project_group, node, state, started_at, ended_at FROM incidents WHERE 1"
+        params: list = []
+        if service is not None:
+            query += " AND service = ?"
+            params.append(service)
+        if group is not None:
+            query += " AND project_group = ?"
+            params.append(group)
+        query += " ORDER BY started_at DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._connect().execute(query, params).fetchall()
+        return [Incident(*row) for row in rows]
+
+
+availability_store = AvailabilityStore()
+
+
+def record_availability(snapshot: Snapshot) -> None:
+    """Record state transitions and account availability up to the snapshot's collection."""
+    try:
+        availability_store.record(snapshot)
+    except sqlite3.Error:
+        logger.exception("Failed to record service availability")
+
+
+def record_transitions(previous: Snapshot, current: Snapshot) -> None:
+    """Snapshot listener: record transitions as soon as a snapshot changes."""
+    record_availability(current)
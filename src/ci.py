@@ -0,0 +1,157 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from src.config import CI_CACHE_TTL_SECONDS, CI_MAX_WORKERS, CI_STALE_SECONDS
+from src.metrics import Counter, Histogram
+from src.sessions import LazySession
+
+try:
+    from src.values import GITHUB_TOKEN
+except ImportError:
+    GITHUB_TOKEN = None
+
+logger = logging.getLogger(__name__)
+
+GITHUB_API_URL = "https://api.github.com"
+REQUEST_TIMEOUT_SECONDS = 5
+
+CI_CACHE_LOOKUPS = Counter(
+    "service_monitor_ci_cache_lookups_total",
+    "CI status cache lookups by result (fresh, stale, miss)",
+    ("result",),
+)
+GITHUB_REQUESTS = Counter(
+    "service_monitor_github_requests_total", "GitHub API requests by HTTP status", ("status",)
+)
+GITHUB_REQUEST_DURATION = Histogram(
+    "service_monitor_github_request_duration_seconds", "GitHub API request duration"
+)
+
+
+@dataclass(slots=True)
+class _CIEntry:
+    status: str
+    etag: str | None
+    fetched_at: float
+
+
+def _status_from_runs(data: dict, repo_name: str) -> str:
+    """Map the latest workflow run to 'success', 'failure' or 'error'."""
+    if not data.get("workflow_runs"):
+        logger.warning("No workflow runs found for %s", repo_name)
+        return "error"
+    conclusion = data["workflow_runs"][0].get("conclusion")
+    if conclusion in ("success", "failure"):
+        return conclusion
+    return "error"
+
+
+class CIStatusCache:
+    """Caches GitHub Actions CI status per repo.
+
+    - Entries younger than `ttl` are served from memory.
+    - Entries younger than `ttl + stale_ttl` are served immediately and revalidated in the background.
+    - Missing or expired entries are fetched concurrently on a bounded worker pool.
+    Revalidation sends `If-None-Match` with the last ETag, so an unchanged run costs a 304
+    (which GitHub does not count against the rate limit).
+    """
+
+    def __init__(
+        self,
+        base_url: str = GITHUB_API_URL,
+        ttl: float = CI_CACHE_TTL_SECONDS,
+        stale_ttl: float = CI_STALE_SECONDS,
+        max_workers: int = CI_MAX_WORKERS,
+        clock=time.monotonic,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._clock = clock
+        self._entries: dict[str, _CIEntry] = {}
+        self._revalidating: set[str] = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ci-fetch")
+        self._session = LazySession(pool_connections=1, pool_maxsize=max_workers)
+
+    def get_status(self, repo_name: str) -> str:
+        return self.get_statuses([repo_name])[repo_name]
+
+    def get_statuses(self, repo_names: list[str]) -> dict[str, str]:
+        """Get CI status for all repos, fetching only what is missing or expired."""
+        results = {}
+        to_fetch = []
+        now = self._clock()
+        for repo_name in dict.fromkeys(repo_names):
+            entry = self._entries.get(repo_name)
+            age = now - entry.fetched_at if entry else None
+            if entry and age < self.ttl:
+                CI_CACHE_LOOKUPS.inc(result="fresh")
+                results[repo_name] = entry.status
+            elif entry and age < self.ttl + self.stale_ttl:
+                CI_CACHE_LOOKUPS.inc(result="stale")
+                results[repo_name] = entry.status
+                self._revalidate_in_background(repo_name)
+            else:
+                CI_CACHE_LOOKUPS.inc(result="miss")
+                to_fetch.append(repo_name)
+
+        futures = {repo_name: self._executor.submit(self._refresh, repo_name) for repo_name in to_fetch}
+        for repo_name, future in futures.items():
+            results[repo_name] = future.result()
+        return results
+
+    def _revalidate_in_background(self, repo_name: str) -> None:
+        with self._lock:
+            if repo_name in self._revalidating:
+                return
+            self._revalidating.add(repo_name)
+        self._executor.submit(self._refresh, repo_name)
+
+    def _refresh(self, repo_name: str) -> str:
+        try:
+            entry = self._entries.get(repo_name)
+            status, etag = self._fetch(repo_name, entry)
+            self._entries[repo_name] = _CIEntry(status=status, etag=etag, fetched_at=self._clock())
+            return status
+        finally:
+            with self._lock:
+                self._revalidating.discard(repo_name)
+
+    def _fetch(self, repo_name: str, entry: _CIEntry | None) -> tuple[str, str | None]:
+        """Fetch the latest run, returning (status, etag). Falls back to the cached status on errors."""
+        import requests
+
+        url = f"{self.base_url}/repos/momonala/{repo_name}/actions/workflows/ci.yml/runs?per_page=1"
+        headers = {}
+        if GITHUB_TOKEN:
+            headers["Authorization"] = f"token {GITHUB_TOKEN}"
+        if entry and entry.etag:
+            headers["If-None-Match"] = entry.etag
+        fallback = (entry.status, entry.etag) if entry else ("error", None)
+
+        try:
+            with GITHUB_REQUEST_DURATION.time():
+                response = self._session.get().get(url, headers=headers, timeout=REQUEST_TIMEOUT_SECONDS)
+            GITHUB_REQUESTS.inc(status=response.status_code)
+            if response.status_code == 304 and entry:
+                return entry.status, entry.etag
+            if response.status_code == 403 and response.headers.get("X-RateLimit-Remaining") == "0":
+                logger.warning("GitHub rate limit exhausted while fetching CI status for %s", repo_name)
+                return fallback
+            response.raise_for_status()
+            return _status_from_runs(response.json(), repo_name), response.headers.get("ETag")
+        except requests.RequestException as exc:
+            if exc.response is None:
+                GITHUB_REQUESTS.inc(status="error")
+            logger.error("Failed to fetch CI status for %s: %s", repo_name, exc)
+            return fallback
+        except (KeyError, ValueError) as exc:
+            logger.error("Unexpected API response format for %s: %s", repo_name, exc)
+            return fallback
+
+
+ci_cache = CIStatusCache()
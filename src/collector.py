@@ -0,0 +1,253 @@
+import logging
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, field, replace
+
+from src.config import COLLECTOR_INTERVAL_SECONDS
+from src.engine import get_service_statuses, get_services
+from src.metrics import Histogram
+from src.services import ServiceStatus, is_linux, is_retired, with_current_uptime
+
+logger = logging.getLogger(__name__)
+
+COLLECTION_DURATION = Histogram(
+    "service_monitor_collection_duration_seconds",
+    "Status collection duration (full or selected units)",
+    ("kind",),
+)
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """Immutable view of all service statuses at a point in time.
+
+    `version` only increases when the collected statuses actually change, so it can be used
+    as a cheap cache key by readers.
+    """
+
+    version: int
+    services: tuple[ServiceStatus, ...] = field(default_factory=tuple)
+    collected_at: float | None = None
+    # Snapshot version in which each service last changed, for delta responses
+    service_versions: dict[str, int] = field(default_factory=dict)
+    # When this version was published (collected_at moves on with every unchanged collection)
+    changed_at: float | None = None
+
+    def changed_since(self, version: int) -> list[ServiceStatus]:
+        """Services whose status changed after the given snapshot version."""
+        return [status for status in self.services if self.service_versions.get(status.name, 0) > version]
+
+
+# Called with (previous, current) whenever a new snapshot version is published
+SnapshotListener = Callable[[Snapshot, Snapshot], None]
+
+
+# Renders the dashboard's sidebar row of a service (src/app.py), called with (snapshot, epoch, status)
+RowRenderer = Callable[[Snapshot, str, ServiceStatus], str]
+
+
+def snapshot_payload(
+    snapshot: Snapshot, epoch: str, since: int | None = None, render_row: RowRenderer | None = None
+) -> dict:
+    """JSON-ready view of a snapshot, limited to services changed after `since` if given.
+
+    `names` always lists every current service so clients can drop removed ones. With
+    `render_row`, every service also carries its sidebar row as `html`.
+    """
+    services = snapshot.services if since is None else snapshot.changed_since(since)
+    now = time.time()
+    return {
+        "epoch": epoch,
+        "version": snapshot.version,
+        "since": since,
+        "names": [status.name for status in snapshot.services],
+        "summary": {
+            "active": sum(status.is_active for status in snapshot.services),
+            "failed": sum(status.is_failed for status in snapshot.services),
+        },
+        "services": [_service_payload(snapshot, epoch, status, now, render_row) for status in services],
+    }
+
+
+def _service_payload(
+    snapshot: Snapshot, epoch: str, status: ServiceStatus, now: float, render_row: RowRenderer | None
+) -> dict:
+    payload = asdict(with_current_uptime(status, now))
+    if render_row is not None:
+        payload["html"] = render_row(snapshot, epoch, status)
+    return payload
+
+
+def collect_service_statuses() -> list[ServiceStatus]:
+    """Collect the status of every monitored service (canned data when not on Linux)."""
+    if not is_linux():
+        from src.canned_info import canned_service_statuses
+
+        return list(canned_service_statuses)
+    return get_service_statuses(get_services())
+
+
+class StatusCollector:
+    """Refreshes a versioned snapshot of service statuses in the background.
+
+    Readers get the latest snapshot with `get_snapshot()`, which is a plain attribute read.
+    Concurrent calls to `refresh()` are coalesced: while a collection is running, other callers
+    wait for it and share its result instead of starting their own.
+
+    With `follower` set (production web workers), the collector never collects; snapshots
+    collected by another process are passed in with `adopt()` instead.
+    """
+
+    def __init__(
+        self,
+        collect_fn=collect_service_statuses,
+        collect_units_fn=get_service_statuses,
+        interval: float = COLLECTOR_INTERVAL_SECONDS,
+    ):
+        self.collect_fn = collect_fn
+        # Identifies this process' version sequence, so clients notice when versions restart from 0
+        self.epoch = format(time.time_ns(), "x")
+        self._collect_units_fn = collect_units_fn
+        self.interval = interval
+        self._snapshot = Snapshot(version=0)
+        self._lock = threading.Lock()
+        self._collect_lock = threading.Lock()
+        self._inflight: threading.Event | None = None
+        self._listeners: list[SnapshotListener] = []
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.follower = False
+
+    def get_snapshot(self) -> Snapshot:
+        """Return the current snapshot, collecting once if nothing has been collected yet."""
+        snapshot = self._snapshot
+        if snapshot.collected_at is None and not self.follower:
+            return self.refresh()
+        return snapshot
+
+    @property
+    def latest(self) -> Snapshot:
+        """The current snapshot, without collecting if nothing has been collected yet."""
+        return self._snapshot
+
+    def add_listener(self, listener: SnapshotListener) -> None:
+        """Register a callback that runs on the collecting thread after each version change."""
+        self._listeners.append(listener)
+
+    def refresh(self) -> Snapshot:
+        """Collect fresh statuses, joining an in-flight collection if one is already running."""
+        if self.follower:
+            return self._snapshot
+        with self._lock:
+            inflight = self._inflight
+            if inflight is None:
+                self._inflight = threading.Event()
+        if inflight is not None:
+            inflight.wait()
+            return self._snapshot
+
+        try:
+            with self._collect_lock, COLLECTION_DURATION.time(kind="full"):
+                self._publish(tuple(self.collect_fn()))
+        except Exception:
+            logger.exception("Service status collection failed")
+        finally:
+            with self._lock:
+                done, self._inflight = self._inflight, None
+            done.set()
+        return self._snapshot
+
+    def refresh_units(self, units: list[str]) -> Snapshot:
+        """Re-collect only the given units and merge them into the current snapshot."""
+        if self.follower:
+            return self._snapshot
+        try:
+            with self._collect_lock, COLLECTION_DURATION.time(kind="units"):
+                updated = {status.name: status for status in self._collect_units_fn(units)}
+                merged = [updated.pop(status.name, status) for status in self._snapshot.services]
+                self._publish(tuple(merged + list(updated.values())))
+        except Exception:
+            logger.exception("Status collection failed for %s", units)
+        return self._snapshot
+
+    def _publish(self, statuses: tuple[ServiceStatus, ...]) -> None:
+        previous = self._snapshot
+        previous_by_name = {status.name: status for status in previous.services}
+        # A unit that could not be collected keeps its last known status, marked with the error
+        statuses = tuple(
+            (
+                replace(previous_by_name[status.name], collection_error=status.collection_error)
+                if status.collection_error and status.name in previous_by_name
+                else status
+            )
+            for status in statuses
+            # Stopped, disabled units are discovered but not meant to run; not listed like inactive ones
+            if not is_retired(status)
+        )
+        if statuses == previous.services:
+            self._snapshot = replace(previous, collected_at=time.time())
+            return
+
+        version = previous.version + 1
+        service_versions = {
+            status.name: (
+                previous.service_versions[status.name]
+                if previous_by_name.get(status.name) == status
+                else version
+            )
+            for status in statuses
+        }
+        now = time.time()
+        self._snapshot = Snapshot(
+            version=version,
+            services=statuses,
+            collected_at=now,
+            service_versions=service_versions,
+            changed_at=now,
+        )
+        logger.debug("Published snapshot v%d with %d services", self._snapshot.version, len(statuses))
+        self._notify(previous, self._snapshot)
+
+    def adopt(self, snapshot: Snapshot, epoch: str) -> None:
+        """Serve a snapshot collected by another process, keeping its version and epoch.
+
+        Every worker then answers with the same ETags and `since` deltas. Listeners run when the
+        version or epoch changes, as they would after a local collection.
+        """
+        previous, previous_epoch = self._snapshot, self.epoch
+        self.epoch = epoch
+        self._snapshot = snapshot
+        if snapshot.version != previous.version or epoch != previous_epoch:
+            self._notify(previous, snapshot)
+
+    def _notify(self, previous: Snapshot, current: Snapshot) -> None:
+        for listener in self._listeners:
+            try:
+                listener(previous, current)
+            except Exception:
+                logger.exception("Snapshot listener %s failed", listener)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self.refresh()
+            self._stop.wait(self.interval)
+
+    def start(self) -> None:
+        """Start the background refresh thread (no-op if already running)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="status-collector", daemon=True)
+        self._thread.start()
+        logger.info("Started status collector (every %ss)", self.interval)
+
+    def stop(self) -> None:
+        """Stop the background refresh thread."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+
+collector = StatusCollector()
@@ -11,6 +11,34 @@ _project_config = _config["project"]
 _tool_config = _config["tool"]["config"]
 
 FLASK_PORT = _tool_config["flask_port"]
+DATA_DIR = _config_file.parent / _tool_config["data_dir"]
+COLLECTOR_INTERVAL_SECONDS = _tool_config["collector_interval_seconds"]
+WATCH_UNIT_EVENTS = _tool_config["watch_unit_events"]
+CI_CACHE_TTL_SECONDS = _tool_config["ci_cache_ttl_seconds"]
+CI_STALE_SECONDS = _tool_config["ci_stale_seconds"]
+CI_MAX_WORKERS = _tool_config["ci_max_workers"]
+UNIT_DIRS = [Path(directory) for directory in _tool_config["unit_dirs"]]
+UNIT_INCLUDE = _tool_config["unit_include"]
+UNIT_EXCLUDE = _tool_config["unit_exclude"]
+COLLECT_MAX_CONCURRENCY = _tool_config["collect_max_concurrency"]
+COLLECT_TIMEOUT_SECONDS = _tool_config["collect_timeout_seconds"]
+RESTART_MAX_PARALLEL = _tool_config["restart_max_parallel"]
+RESTART_TIMEOUT_SECONDS = _tool_config["restart_timeout_seconds"]
+SERVE_WORKERS = _tool_config["serve_workers"]
+SERVE_THREADS = _tool_config["serve_threads"]
+STREAM_MAX_CLIENTS = _tool_config["stream_max_clients"]
+SHARED_SNAPSHOT_PATH = _config_file.parent / _tool_config["shared_snapshot_path"]
+SHARED_METRICS_DIR = _config_file.parent / _tool_config["shared_metrics_dir"]
+ALERT_RULES = _tool_config.get("alert_rules", [])
+ACTIONS = _tool_config.get("actions", [])
+ACTION_MAX_PARALLEL = _tool_config["action_max_parallel"]
+NODES = _tool_config.get("nodes", [])
+NODE_TIMEOUT_SECONDS = _tool_config["node_timeout_seconds"]
+SEARCH_INDEX = _tool_config["search_index"]
+SEARCH_INDEX_INTERVAL_SECONDS = _tool_config["search_index_interval_seconds"]
+SEARCH_RETENTION_DAYS = _tool_config["search_retention_days"]
+SEARCH_MAX_ENTRIES = _tool_config["search_max_entries"]
+AVAILABILITY_RETENTION_DAYS = _tool_config["availability_retention_days"]
 
 
 # fmt: off
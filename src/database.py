@@ -0,0 +1,84 @@
+"""SQLite helpers shared by the stores in `data/` (jobs, actions, search index, availability).
+
+Every store opens its database lazily with `connect`, in WAL mode: gunicorn workers read while
+another process writes, and with `synchronous=NORMAL` a commit does not wait for the SD card.
+Stores written from the engine's event loop hand their writes to a `SerialWriter`. Limits that
+must hold across all processes (parallel restarts and actions) are slots claimed with `claim_slot`.
+"""
+
+import asyncio
+import os
+import sqlite3
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TypeVar
+
+T = TypeVar("T")
+
+# Slots taken by running work, per process: `claim_slot` counts them across all processes
+SLOTS_SCHEMA = "CREATE TABLE IF NOT EXISTS slots (key TEXT PRIMARY KEY, pid INTEGER NOT NULL);"
+
+
+def connect(path: Path | str | None, schema: str) -> sqlite3.Connection:
+    """Open the database at `path` (in memory if None) and create `schema` where missing."""
+    if path is not None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+    db = sqlite3.connect(str(path or ":memory:"), check_same_thread=False, timeout=5)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    db.executescript(schema)
+    return db
+
+
+def add_column(db: sqlite3.Connection, table: str, column: str, definition: str) -> None:
+    """Add a column to a table created by an older version, if it is not there yet."""
+    if column not in {row[1] for row in db.execute(f"PRAGMA table_info({table})")}:
+        db.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+
+def process_alive(pid: int) -> bool:
+    """Whether a process with this pid exists (for rows left behind by a process that exited)."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def claim_slot(db: sqlite3.Connection, key: str, limit: int) -> bool:
+    """Take one of `limit` slots shared by every process using `db`, or return False if all are taken.
+
+    Counting and taking run in one IMMEDIATE transaction, so processes claiming at the same time
+    are serialized. Slots of processes that exited are freed first.
+    """
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        for slot, pid in db.execute("SELECT key, pid FROM slots").fetchall():
+            if not process_alive(pid):
+                db.execute("DELETE FROM slots WHERE key = ?", (slot,))
+        claimed = db.execute("SELECT COUNT(*) FROM slots").fetchone()[0] < limit
+        if claimed:
+            db.execute("INSERT OR REPLACE INTO slots VALUES (?, ?)", (key, os.getpid()))
+        db.commit()
+    except BaseException:
+        db.rollback()
+        raise
+    return claimed
+
+
+def release_slot(db: sqlite3.Connection, key: str) -> None:
+    with db:
+        db.execute("DELETE FROM slots WHERE key = ?", (key,))
+
+
+class SerialWriter:
+    """Runs a store's writes in order on one background thread, so the event loop never waits on them."""
+
+    def __init__(self, name: str):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+
+    async def run(self, fn: Callable[..., T], *args) -> T:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
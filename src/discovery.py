@@ -0,0 +1,122 @@
+"""Monitored units, discovered from the systemd unit directories.
+
+The set of units only changes when a unit file is installed, removed or masked, so the names are
+read from the unit directories once and cached. Every lookup stats the directories; a directory's
+mtime changes whenever an entry is added, removed or renamed, and only then are they scanned again.
+This replaces the `systemctl list-units` call per refresh with a few `stat` calls.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections.abc import Iterable
+from fnmatch import fnmatch
+from pathlib import Path
+
+from src.config import UNIT_DIRS, UNIT_EXCLUDE, UNIT_INCLUDE
+from src.metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+# A directory changed this recently may change again within the same mtime tick; it is scanned
+# again on the next lookup instead of being trusted (like git's "racily clean" index entries)
+RACY_SECONDS = 2.0
+
+UNIT_DISCOVERY_SCANS = Counter(
+    "service_monitor_unit_discovery_scans_total", "Unit directory scans after a directory changed"
+)
+
+
+def is_monitored(
+    unit: str, include: Iterable[str] = UNIT_INCLUDE, exclude: Iterable[str] = UNIT_EXCLUDE
+) -> bool:
+    """Whether a unit name matches an include pattern and no exclude pattern."""
+    return any(fnmatch(unit, pattern) for pattern in include) and not any(
+        fnmatch(unit, pattern) for pattern in exclude
+    )
+
+
+def _is_unit_file(entry: os.DirEntry) -> bool:
+    """A service unit file, or a symlink to one of the same name (`systemctl link`).
+
+    Templates (`name@.service`) are not units, and symlinks to /dev/null (masked units) or to a
+    differently named file (aliases, listed under their own name) are skipped.
+    """
+    if not entry.name.endswith(".service") or entry.name.endswith("@.service"):
+        return False
+    if not entry.is_symlink():
+        return entry.is_file()
+    target = Path(os.path.realpath(entry.path))
+    return target.name == entry.name and target.is_file()
+
+
+def scan_unit_dirs(unit_dirs: Iterable[Path], include: Iterable[str], exclude: Iterable[str]) -> list[str]:
+    """Sorted names of the monitored service units in `unit_dirs`.
+
+    Directories are in order of precedence, as in systemd: a name found in an earlier directory
+    hides the same name in later ones, so a unit masked in /etc/systemd/system is not monitored.
+    """
+    seen: set[str] = set()
+    units = []
+    for directory in unit_dirs:
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        for entry in sorted(entries, key=lambda entry: entry.name):
+            if entry.name in seen:
+                continue
+            seen.add(entry.name)
+            if _is_unit_file(entry) and is_monitored(entry.name, include, exclude):
+                units.append(entry.name)
+    return sorted(units)
+
+
+class UnitDiscovery:
+    """Names of the monitored units, scanned again only after a unit directory changed."""
+
+    def __init__(
+        self,
+        unit_dirs: Iterable[Path | str] = UNIT_DIRS,
+        include: Iterable[str] = UNIT_INCLUDE,
+        exclude: Iterable[str] = UNIT_EXCLUDE,
+        clock=time.time,
+    ):
+        self.unit_dirs = [Path(directory) for directory in unit_dirs]
+        self.include = list(include)
+        self.exclude = list(exclude)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._signature: tuple | None = None
+        self._units: list[str] = []
+
+    def _dir_signature(self) -> tuple:
+        signature = []
+        for directory in self.unit_dirs:
+            try:
+                stat = directory.stat()
+            except OSError:
+                signature.append(None)
+            else:
+                signature.append((stat.st_ino, stat.st_mtime_ns))
+        return tuple(signature)
+
+    def units(self) -> list[str]:
+        # Stat before scanning: a change during the scan then shows up as a new signature next time
+        signature = self._dir_signature()
+        with self._lock:
+            if signature != self._signature:
+                units = scan_unit_dirs(self.unit_dirs, self.include, self.exclude)
+                UNIT_DISCOVERY_SCANS.inc()
+                if units != self._units:
+                    logger.info("Discovered %d monitored units in %s", len(units), self.unit_dirs)
+                self._units = units
+                racy = any(
+                    entry is not None and entry[1] / 1e9 > self._clock() - RACY_SECONDS for entry in signature
+                )
+                self._signature = None if racy else signature
+            return list(self._units)
+
+
+unit_discovery = UnitDiscovery()
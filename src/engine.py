@@ -0,0 +1,205 @@
+import asyncio
+import concurrent.futures
+import logging
+import threading
+from collections.abc import Coroutine
+from typing import TypeVar
+
+from src.ci import CIStatusCache, ci_cache
+from src.config import COLLECT_MAX_CONCURRENCY, COLLECT_TIMEOUT_SECONDS, UNIT_INCLUDE
+from src.discovery import is_monitored, unit_discovery
+from src.metrics import SUBPROCESS_DURATION, SUBPROCESS_FAILURES
+from src.services import (
+    SHOW_PROPERTIES,
+    ServiceStatus,
+    get_github_repo_name,
+    parse_service_name,
+    parse_systemctl_show,
+    status_from_properties,
+)
+
+logger = logging.getLogger(__name__)
+
+SHOW_BATCH_SIZE = 50  # Units per `systemctl show` call; batches run concurrently
+
+T = TypeVar("T")
+
+
+class CollectionError(Exception):
+    """A systemctl call failed or missed its deadline."""
+
+
+def error_status(service: str, error: str) -> ServiceStatus:
+    """Placeholder for a service whose status could not be collected."""
+    project_group, suffix = parse_service_name(service)
+    return ServiceStatus(
+        name=service,
+        is_active=False,
+        is_failed=False,
+        uptime=None,
+        memory=None,
+        cpu=None,
+        last_error=None,
+        project_group=project_group,
+        suffix=suffix,
+        ci_status=None,
+        collection_error=error,
+    )
+
+
+class CollectionEngine:
+    """Collects service statuses, logs and CI status concurrently on a private event loop.
+
+    Every subprocess runs under a shared semaphore (`max_concurrency`) and a per-call deadline;
+    a call that misses it is killed. Failures are contained: a failed `systemctl show` batch
+    yields placeholder statuses with `collection_error` set, a slow CI lookup leaves `ci_status`
+    empty, and the rest of the results are returned as usual.
+
+    The coroutines can be awaited directly; threaded callers (Flask routes, the collector and
+    scheduler threads) use the blocking wrappers, which run them on the engine's loop thread.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = COLLECT_MAX_CONCURRENCY,
+        timeout: float = COLLECT_TIMEOUT_SECONDS,
+        batch_size: int = SHOW_BATCH_SIZE,
+        ci: CIStatusCache = ci_cache,
+    ):
+        self.timeout = timeout
+        self.batch_size = batch_size
+        self._ci = ci
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._lock = threading.Lock()
+
+    async def _run(self, *args: str, check: bool = True) -> str:
+        """Run a command and return its stdout, killing it if it exceeds the deadline."""
+        command = " ".join(args[:2])
+        async with self._semaphore:
+            try:
+                with SUBPROCESS_DURATION.time(command=command):
+                    return await self._run_process(args, check)
+            except CollectionError:
+                SUBPROCESS_FAILURES.inc(command=command)
+                raise
+
+    async def _run_process(self, args: tuple[str, ...], check: bool) -> str:
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+            )
+        except OSError as exc:
+            raise CollectionError(f"{args[0]} unavailable: {exc}") from exc
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), self.timeout)
+        except TimeoutError:
+            process.kill()
+            await process.wait()
+            raise CollectionError(f"{' '.join(args[:2])} timed out after {self.timeout}s") from None
+        if check and process.returncode != 0:
+            raise CollectionError(f"{' '.join(args[:2])} failed: {stderr.decode(errors='replace').strip()}")
+        return stdout.decode(errors="replace")
+
+    async def list_services(self) -> list[str]:
+        """Monitored units systemd has loaded; `get_services` reads the unit directories instead."""
+        out = await self._run(
+            "systemctl", "list-units", "--type=service", "--no-legend", "--plain", *UNIT_INCLUDE
+        )
+        units = [line.strip().split()[0] for line in out.strip().splitlines()]
+        return [unit for unit in units if is_monitored(unit)]
+
+    async def _show(self, services: list[str]) -> list[ServiceStatus]:
+        try:
+            out = await self._run(
+                "systemctl", "show", "--no-pager", "-p", ",".join(SHOW_PROPERTIES), *services
+            )
+        except CollectionError as exc:
+            logger.warning("Status collection failed for %d units: %s", len(services), exc)
+            return [error_status(service, str(exc)) for service in services]
+        return [status_from_properties(properties) for properties in parse_systemctl_show(out)]
+
+    async def _ci_statuses(self, repos: list[str]) -> dict[str, str]:
+        try:
+            return await asyncio.wait_for(asyncio.to_thread(self._ci.get_statuses, repos), self.timeout)
+        except TimeoutError:
+            logger.warning("CI status lookup timed out after %ss", self.timeout)
+            return {}
+
+    async def collect_statuses(self, services: list[str]) -> list[ServiceStatus]:
+        """Statuses for the given units, with `systemctl show` batches and CI lookups run concurrently."""
+        if not services:
+            return []
+        batches = [services[i : i + self.batch_size] for i in range(0, len(services), self.batch_size)]
+        # Only services without suffixes have a CI status
+        repos = {
+            get_github_repo_name(project_group)
+            for project_group, suffix in map(parse_service_name, services)
+            if suffix is None
+        }
+        *batch_results, ci_statuses = await asyncio.gather(
+            *(self._show(batch) for batch in batches), self._ci_statuses(sorted(repos))
+        )
+        statuses = [status for batch in batch_results for status in batch]
+        for status in statuses:
+            if status.suffix is None and status.collection_error is None:
+                status.ci_status = ci_statuses.get(get_github_repo_name(status.project_group))
+        return statuses
+
+    async def collect_all(self) -> list[ServiceStatus]:
+        return await self.collect_statuses(await self.list_services())
+
+    async def collect_info(self, service: str, lines: int) -> str:
+        """`systemctl status` output for one unit; a failure is returned as text instead of raised."""
+        try:
+            return await self._run(
+                "systemctl", "status", service, "--no-pager", f"--lines={lines}", check=False
+            )
+        except CollectionError as exc:
+            logger.warning("systemctl status failed for %s: %s", service, exc)
+            return str(exc)
+
+    async def restart(self, service: str) -> None:
+        """Queue a restart of the unit; progress is followed with `unit_state`."""
+        # Requires sudoers for the running user; --no-block returns once systemd has queued the job
+        await self._run("sudo", "systemctl", "restart", service, "--no-block")
+
+    async def unit_state(self, service: str) -> dict[str, str]:
+        """ActiveState, SubState and InvocationID (changes on every start) of one unit."""
+        out = await self._run(
+            "systemctl", "show", "--no-pager", "-p", "ActiveState,SubState,InvocationID", service
+        )
+        return next(iter(parse_systemctl_show(out)), {})
+
+    def run(self, coroutine: Coroutine[None, None, T]) -> T:
+        """Run a coroutine on the engine's loop thread and block until it finishes."""
+        return self.submit(coroutine).result()
+
+    def submit(self, coroutine: Coroutine[None, None, T]) -> concurrent.futures.Future[T]:
+        """Start a coroutine on the engine's loop thread without waiting for it."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self._get_loop())
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="collection-engine", daemon=True).start()
+            return self._loop
+
+
+engine = CollectionEngine()
+
+
+def get_services() -> list[str]:
+    """Names of all monitored units, from the unit directories (cached until one of them changes)."""
+    return unit_discovery.units()
+
+
+def get_service_statuses(services: list[str]) -> list[ServiceStatus]:
+    """Statuses of the given units (placeholders with `collection_error` for units that failed)."""
+    return engine.run(engine.collect_statuses(services))
+
+
+def get_info_for_service(service: str, lines: int = 1000) -> str:
+    """Full `systemctl status` output including the last `lines` journal lines."""
+    return engine.run(engine.collect_info(service, lines))
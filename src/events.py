@@ -0,0 +1,168 @@
+import json
+import logging
+import threading
+from collections import deque
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+
+from src.collector import (
+    RowRenderer,
+    Snapshot,
+    SnapshotListener,
+    collector,
+    snapshot_payload,
+)
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_SECONDS = 15
+CLIENT_BUFFER_SIZE = 32  # Events buffered per client before it is told to resync instead
+RECONNECT_DELAY_MS = 5000
+
+
+@dataclass(frozen=True, slots=True)
+class Event:
+    id: str | None
+    type: str
+    data: str
+
+    def encode(self) -> str:
+        """Serialize as a Server-Sent Events message."""
+        event_id = f"id: {self.id}\n" if self.id is not None else ""
+        return f"{event_id}event: {self.type}\ndata: {self.data}\n\n"
+
+
+# Tells a client it missed events and must re-fetch the full snapshot
+RESYNC = Event(id=None, type="resync", data="{}")
+
+
+class Subscription:
+    """One connected client. Holds at most `buffer_size` undelivered events."""
+
+    def __init__(self, buffer_size: int):
+        self._events: deque[Event] = deque()
+        self._buffer_size = buffer_size
+        self._overflowed = False
+        self._condition = threading.Condition()
+
+    def push(self, event: Event) -> None:
+        with self._condition:
+            if len(self._events) >= self._buffer_size:
+                # Slow client: drop its backlog, it will re-fetch the full snapshot instead
+                self._events.clear()
+                self._overflowed = True
+            else:
+                self._events.append(event)
+            self._condition.notify()
+
+    def wait(self, timeout: float) -> list[Event]:
+        """Return pending events, blocking up to `timeout` seconds. Empty list means nothing happened."""
+        with self._condition:
+            if not self._events and not self._overflowed:
+                self._condition.wait(timeout)
+            if self._overflowed:
+                self._overflowed = False
+                self._events.clear()
+                return [RESYNC]
+            events = list(self._events)
+            self._events.clear()
+            return events
+
+
+class EventBroker:
+    """Fans out events to all connected clients.
+
+    Payloads are serialized once at publish time and shared by every subscriber, so the cost of
+    an event does not grow with the number of open dashboards.
+    """
+
+    def __init__(self, buffer_size: int = CLIENT_BUFFER_SIZE):
+        self._buffer_size = buffer_size
+        self._subscriptions: set[Subscription] = set()
+        self._lock = threading.Lock()
+
+    def publish(self, event_type: str, data: dict, event_id: str | None = None) -> Event:
+        event = Event(id=event_id, type=event_type, data=json.dumps(data, separators=(",", ":")))
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            subscription.push(event)
+        return event
+
+    def subscribe(self, replay: Callable[[], Iterable[Event]] | None = None) -> Subscription:
+        """Register a client, first pushing the events `replay` returns (e.g. what it missed).
+
+        `replay` runs under the broker's lock, so an event published meanwhile is never lost: it is
+        either part of the replay or delivered after it.
+        """
+        subscription = Subscription(self._buffer_size)
+        with self._lock:
+            for event in replay() if replay is not None else ():
+                subscription.push(event)
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    @property
+    def client_count(self) -> int:
+        return len(self._subscriptions)
+
+
+def snapshot_event_id(epoch: str, version: int) -> str:
+    """`<epoch>-<version>` of the shared snapshot, so an event ID means the same in every worker."""
+    return f"{epoch}-{version}"
+
+
+def snapshot_publisher(render_row: RowRenderer | None = None) -> SnapshotListener:
+    """Snapshot listener that pushes the changed services (and their sidebar rows) to every dashboard."""
+
+    def publish_snapshot(previous: Snapshot, current: Snapshot) -> None:
+        payload = snapshot_payload(current, collector.epoch, since=previous.version, render_row=render_row)
+        broker.publish("snapshot", payload, snapshot_event_id(collector.epoch, current.version))
+
+    return publish_snapshot
+
+
+def missed_events(last_event_id: str | None, render_row: RowRenderer | None = None) -> list[Event]:
+    """What a client reconnecting with `Last-Event-ID` missed: one delta up to the current snapshot.
+
+    The delta is computed from the snapshot rather than replayed from history, so it works whichever
+    worker the client reconnects to. A client of another epoch (the collector restarted) is told
+    to resync; one ahead of this worker gets the next event as usual.
+    """
+    if not last_event_id:
+        return []
+    epoch, _, version = last_event_id.rpartition("-")
+    if epoch != collector.epoch or not version.isdigit():
+        return [RESYNC]
+    snapshot = collector.get_snapshot()
+    if int(version) >= snapshot.version:
+        return []
+    payload = snapshot_payload(snapshot, epoch, since=int(version), render_row=render_row)
+    return [
+        Event(
+            id=snapshot_event_id(epoch, snapshot.version),
+            type="snapshot",
+            data=json.dumps(payload, separators=(",", ":")),
+        )
+    ]
+
+
+def stream(subscription: Subscription, heartbeat: float = HEARTBEAT_SECONDS):
+    """Yield SSE messages for one client until it disconnects."""
+    try:
+        yield f"retry: {RECONNECT_DELAY_MS}\n\n"
+        while True:
+            events = subscription.wait(timeout=heartbeat)
+            if not events:
+                yield ": heartbeat\n\n"
+            for event in events:
+                yield event.encode()
+    finally:
+        broker.unsubscribe(subscription)
+
+
+broker = EventBroker()
@@ -0,0 +1,189 @@
+import logging
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+
+from src.collector import Snapshot
+from src.config import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+HISTORY_DB_PATH = DATA_DIR / "history.db"
+
+# (name, bucket seconds, buckets kept): 1 day of minutes, 30 days of hours, 1 year of days
+RESOLUTIONS = (("1m", 60, 24 * 60), ("1h", 3600, 30 * 24), ("1d", 86400, 365))
+METRICS = ("memory", "cpu")
+MIN_SAMPLE_INTERVAL_SECONDS = 10
+PRUNE_INTERVAL_SECONDS = 3600
+
+
+class RingSeries:
+    """Fixed-size ring of (bucket timestamp, average) pairs backed by two arrays.
+
+    Samples are averaged into the current bucket; when a sample lands in a new bucket the previous
+    one is closed and written to its slot, overwriting whatever was there `capacity` buckets ago.
+    """
+
+    __slots__ = ("_bucket", "_count", "_sum", "capacity", "step", "timestamps", "values")
+
+    def __init__(self, step: int, capacity: int):
+        self.step = step
+        self.capacity = capacity
+        self.timestamps = array("q", [0]) * capacity
+        self.values = array("d", [0.0]) * capacity
+        self._bucket: int | None = None
+        self._sum = 0.0
+        self._count = 0
+
+    def add(self, timestamp: float, value: float) -> tuple[int, float] | None:
+        """Add a sample, returning the (timestamp, average) of the bucket it closed, if any."""
+        bucket = int(timestamp) // self.step * self.step
+        closed = None
+        if self._bucket is not None and bucket != self._bucket:
+            closed = (self._bucket, self._sum / self._count)
+            self.put(*closed)
+            self._sum, self._count = 0.0, 0
+        self._bucket = bucket
+        self._sum += value
+        self._count += 1
+        return closed
+
+    def put(self, timestamp: int, value: float) -> None:
+        index = timestamp // self.step % self.capacity
+        self.timestamps[index] = timestamp
+        self.values[index] = value
+
+    def query(self, start: float, end: float) -> list[tuple[int, float]]:
+        """Closed buckets plus the in-progress one within [start, end], oldest first."""
+        points = sorted(
+            (ts, value) for ts, value in zip(self.timestamps, self.values) if ts and start <= ts <= end
+        )
+        if self._count and start <= self._bucket <= end:
+            points.append((self._bucket, self._sum / self._count))
+        return points
+
+
+class HistoryStore:
+    """Per-service memory and CPU history with 1m/1h/1d rollups.
+
+    Memory stays bounded: every (service, metric, resolution) series is a fixed-size ring. Closed
+    buckets are also written to SQLite so history survives restarts; rows older than a ring's span
+    are pruned. A `read_only` store (production web workers) loads and samples history but leaves
+    writing to the collector process.
+    """
+
+    def __init__(self, path: Path | str | None = HISTORY_DB_PATH, clock=time.time):
+        self._series: dict[tuple[str, str, int], RingSeries] = {}
+        self._last_cpu: dict[str, tuple[float, int]] = {}
+        self._last_sample = 0.0
+        self._last_prune = 0.0
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._path = path
+        self._db: sqlite3.Connection | None = None
+        self._opened = False
+        self.read_only = False
+
+    def _get_series(self, service: str, metric: str, step: int, capacity: int) -> RingSeries:
+        key = (service, metric, step)
+        if key not in self._series:
+            self._series[key] = RingSeries(step, capacity)
+        return self._series[key]
+
+    def _open(self) -> None:
+        """Open the database and load persisted buckets on first use (call with the lock held)."""
+        if self._opened:
+            return
+        self._opened = True
+        if self._path is None:
+            return
+        Path(self._path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self._path), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS samples "
+            "(service TEXT, metric TEXT, step INTEGER, ts INTEGER, value REAL, "
+            "PRIMARY KEY (service, metric, step, ts))"
+        )
+        now = self._clock()
+        capacities = {step: capacity for _, step, capacity in RESOLUTIONS}
+        rows = self._db.execute("SELECT service, metric, step, ts, value FROM samples ORDER BY ts").fetchall()
+        for service, metric, step, ts, value in rows:
+            if step in capacities and ts >= now - step * capacities[step]:
+                self._get_series(service, metric, step, capacities[step]).put(ts, value)
+
+    def record(self, snapshot: Snapshot) -> None:
+        """Sample memory (bytes) and CPU usage (% of one core) for every service in the snapshot."""
+        timestamp = snapshot.collected_at or self._clock()
+        with self._lock:
+            self._open()
+            if timestamp - self._last_sample < MIN_SAMPLE_INTERVAL_SECONDS:
+                return
+            self._last_sample = timestamp
+            closed = []
+            for status in snapshot.services:
+                samples = {}
+                if status.memory_bytes is not None:
+                    samples["memory"] = float(status.memory_bytes)
+                if status.cpu_nsec is not None:
+                    previous = self._last_cpu.get(status.name)
+                    self._last_cpu[status.name] = (timestamp, status.cpu_nsec)
+                    if previous and status.cpu_nsec >= previous[1]:
+                        samples["cpu"] = (
+                            (status.cpu_nsec - previous[1]) / 1e9 / (timestamp - previous[0]) * 100
+                        )
+                for metric, value in samples.items():
+                    for _, step, capacity in RESOLUTIONS:
+                        bucket = self._get_series(status.name, metric, step, capacity).add(timestamp, value)
+                        if bucket:
+                            closed.append((status.name, metric, step, *bucket))
+            self._persist(closed, timestamp)
+
+    def _persist(self, rows: list[tuple], now: float) -> None:
+        if (
+            self._db is None
+            or self.read_only
+            or (not rows and now - self._last_prune < PRUNE_INTERVAL_SECONDS)
+        ):
+            return
+        with self._db:
+            self._db.executemany("INSERT OR REPLACE INTO samples VALUES (?, ?, ?, ?, ?)", rows)
+            if now - self._last_prune >= PRUNE_INTERVAL_SECONDS:
+                for _, step, capacity in RESOLUTIONS:
+                    self._db.execute(
+                        "DELETE FROM samples WHERE step = ? AND ts < ?", (step, now - step * capacity)
+                    )
+                self._last_prune = now
+
+    def query(self, service: str, metric: str, window: float) -> tuple[int, list[tuple[int, float]]]:
+        """Points for the last `window` seconds at the finest resolution that covers it.
+
+        Returns (bucket seconds, [(timestamp, value), ...]).
+        """
+        now = self._clock()
+        _, step, _ = next((r for r in RESOLUTIONS if r[1] * r[2] >= window), RESOLUTIONS[-1])
+        with self._lock:
+            self._open()
+            series = self._series.get((service, metric, step))
+            return step, series.query(now - window, now) if series else []
+
+
+def downsample(points: list[tuple[int, float]], max_points: int) -> list[tuple[int, float]]:
+    """Average consecutive points so that at most `max_points` remain."""
+    if len(points) <= max_points:
+        return points
+    size = -(-len(points) // max_points)
+    chunks = [points[i : i + size] for i in range(0, len(points), size)]
+    return [(chunk[0][0], sum(value for _, value in chunk) / len(chunk)) for chunk in chunks]
+
+
+history_store = HistoryStore()
+
+
+def record_history(previous: Snapshot, current: Snapshot) -> None:
+    """Snapshot listener: sample every new snapshot into the history store."""
+    try:
+        history_store.record(current)
+    except sqlite3.Error:
+        logger.exception("Failed to persist service history")
@@ -0,0 +1,233 @@
+import asyncio
+import json
+import logging
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from src.config import DATA_DIR, RESTART_MAX_PARALLEL, RESTART_TIMEOUT_SECONDS
+from src.database import (
+    SLOTS_SCHEMA,
+    SerialWriter,
+    add_column,
+    claim_slot,
+    connect,
+    process_alive,
+    release_slot,
+)
+from src.engine import CollectionEngine, CollectionError, engine
+
+logger = logging.getLogger(__name__)
+
+JOBS_DB_PATH = DATA_DIR / "jobs.db"
+JOB_STATES = ("queued", "running", "active", "failed")
+POLL_SECONDS = 1.0
+MAX_JOBS = 200  # Older jobs are deleted
+INTERRUPTED = "Interrupted: the process running the restart exited"
+
+
+@dataclass
+class UnitProgress:
+    unit: str
+    state: str = "queued"
+    error: str | None = None
+
+
+@dataclass
+class RestartJob:
+    """Restart of one unit or of every unit in a project group."""
+
+    id: str
+    target: str  # The unit, or the project group for group restarts
+    units: list[UnitProgress]
+    created_at: float = field(default_factory=time.time)
+    finished_at: float | None = None
+
+    @property
+    def status(self) -> str:
+        """failed if any unit failed, active once all are, running once any has started."""
+        states = {progress.state for progress in self.units}
+        if "failed" in states and self.finished_at is not None:
+            return "failed"
+        if states == {"active"}:
+            return "active"
+        return "queued" if states == {"queued"} else "running"
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), "status": self.status}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RestartJob":
+        data = {key: value for key, value in data.items() if key != "status"}
+        return cls(**{**data, "units": [UnitProgress(**unit) for unit in data["units"]]})
+
+
+class JobStore:
+    """Restart jobs in SQLite, so every gunicorn worker can report on jobs started by another.
+
+    Each job row records the process running it. Jobs left unfinished by a process that no longer
+    exists (the monitor or a worker was restarted mid-job) are marked failed when the store is
+    opened, and by `fail_orphans`, which the collector process runs at startup and every minute.
+    """
+
+    def __init__(self, path: Path | str | None = JOBS_DB_PATH, max_jobs: int = MAX_JOBS):
+        self._path = path
+        self.max_jobs = max_jobs
+        self._db: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._writer = SerialWriter("job-store")
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database on first use (call with the lock held)."""
+        if self._db is None:
+            self._db = connect(
+                self._path,
+                "CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, created_at REAL, data TEXT, pid INTEGER);"
+                + SLOTS_SCHEMA,
+            )
+            add_column(self._db, "jobs", "pid", "INTEGER")  # Databases of older versions
+            with self._db:
+                self._fail_orphans(self._db)
+        return self._db
+
+    def fail_orphans(self) -> None:
+        """Mark jobs of processes that exited failed."""
+        with self._lock, self._connect() as db:
+            self._fail_orphans(db)
+
+    def _fail_orphans(self, db: sqlite3.Connection) -> None:
+        rows = db.execute(
+            "SELECT data, pid FROM jobs WHERE json_extract(data, '$.finished_at') IS NULL"
+        ).fetchall()
+        for data, pid in rows:
+            if pid is not None and process_alive(pid):
+                continue
+            job = RestartJob.from_dict(json.loads(data))
+            for progress in job.units:
+                if progress.state in ("queued", "running"):
+                    progress.state, progress.error = "failed", INTERRUPTED
+            job.finished_at = time.time()
+            db.execute("UPDATE jobs SET data = ? WHERE id = ?", (json.dumps(asdict(job)), job.id))
+            logger.warning("Restart job %s was interrupted, marked failed", job.id)
+
+    async def claim_async(self, key: str, limit: int) -> bool:
+        """`claim_slot` on the store's writer thread."""
+        return await self._writer.run(self._claim, key, limit)
+
+    def _claim(self, key: str, limit: int) -> bool:
+        with self._lock:
+            return claim_slot(self._connect(), key, limit)
+
+    async def release_async(self, key: str) -> None:
+        await self._writer.run(self._release, key)
+
+    def _release(self, key: str) -> None:
+        with self._lock:
+            release_slot(self._connect(), key)
+
+    def save(self, job: RestartJob) -> None:
+        self._write(job.id, job.created_at, json.dumps(asdict(job)))
+
+    async def save_async(self, job: RestartJob) -> None:
+        """`save` on the store's writer thread, for coroutines on the engine's event loop."""
+        data = json.dumps(asdict(job))  # Serialized now: the job keeps changing while the write waits
+        await self._writer.run(self._write, job.id, job.created_at, data)
+
+    def _write(self, job_id: str, created_at: float, data: str) -> None:
+        with self._lock, self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?)", (job_id, created_at, data, os.getpid())
+            )
+            db.execute(
+                "DELETE FROM jobs WHERE id NOT IN (SELECT id FROM jobs ORDER BY created_at DESC LIMIT ?)",
+                (self.max_jobs,),
+            )
+
+    def get(self, job_id: str) -> RestartJob | None:
+        with self._lock:
+            row = self._connect().execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return RestartJob.from_dict(json.loads(row[0])) if row else None
+
+    def recent(self, limit: int = 20) -> list[RestartJob]:
+        with self._lock:
+            rows = (
+                self._connect()
+                .execute("SELECT data FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,))
+                .fetchall()
+            )
+        return [RestartJob.from_dict(json.loads(data)) for (data,) in rows]
+
+
+class RestartJobs:
+    """Runs restarts in the background on the collection engine's event loop.
+
+    At most `max_parallel` units restart at once across all jobs and gunicorn workers: each unit
+    claims a slot in the shared store first, and waits while all are taken. A unit counts as restarted
+    when it is active (running) under a new invocation; it fails when systemd reports it failed
+    or it is not back within `timeout` seconds.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        engine: CollectionEngine = engine,
+        max_parallel: int = RESTART_MAX_PARALLEL,
+        timeout: float = RESTART_TIMEOUT_SECONDS,
+        poll_interval: float = POLL_SECONDS,
+    ):
+        self.store = store
+        self._engine = engine
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.max_parallel = max_parallel
+
+    def submit(self, target: str, units: list[str]) -> RestartJob:
+        """Create a job for `units` and start it; returns immediately with the queued job."""
+        job = RestartJob(id=secrets.token_hex(6), target=target, units=[UnitProgress(unit) for unit in units])
+        self.store.save(job)
+        self._engine.submit(self._run(job))
+        logger.info("Restart job %s queued for %s", job.id, ", ".join(units))
+        return job
+
+    async def _run(self, job: RestartJob) -> None:
+        await asyncio.gather(*(self._restart(job, progress) for progress in job.units))
+        job.finished_at = time.time()
+        await self.store.save_async(job)
+        logger.info("Restart job %s finished: %s", job.id, job.status)
+
+    async def _restart(self, job: RestartJob, progress: UnitProgress) -> None:
+        slot = f"{job.id}/{progress.unit}"
+        while not await self.store.claim_async(slot, self.max_parallel):
+            await asyncio.sleep(self.poll_interval)
+        try:
+            progress.state = "running"
+            await self.store.save_async(job)
+            try:
+                progress.state, progress.error = await self._restart_unit(progress.unit)
+            except CollectionError as exc:
+                progress.state, progress.error = "failed", str(exc)
+            await self.store.save_async(job)
+        finally:
+            await self.store.release_async(slot)
+
+    async def _restart_unit(self, unit: str) -> tuple[str, str | None]:
+        before = (await self._engine.unit_state(unit)).get("InvocationID")
+        await self._engine.restart(unit)
+        deadline = time.monotonic() + self.timeout
+        while True:
+            state = await self._engine.unit_state(unit)
+            restarted = state.get("InvocationID") != before
+            if restarted and state.get("ActiveState") == "active" and state.get("SubState") == "running":
+                return "active", None
+            if restarted and state.get("ActiveState") == "failed":
+                return "failed", f"{unit} failed to start"
+            if time.monotonic() >= deadline:
+                return "failed", f"{unit} not running after {self.timeout}s"
+            await asyncio.sleep(self.poll_interval)
+
+
+restart_jobs = RestartJobs(JobStore())
@@ -0,0 +1,139 @@
+import json
+import logging
+import subprocess
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from src.config import COLLECT_TIMEOUT_SECONDS
+from src.metrics import SUBPROCESS_DURATION, SUBPROCESS_FAILURES
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = 200
+MAX_PAGE_SIZE = 1000
+PAGE_CACHE_SIZE = 64  # Pages kept across all units
+
+
+@dataclass(slots=True)
+class JournalEntry:
+    timestamp: int  # microseconds since the epoch
+    priority: int
+    message: str
+
+
+@dataclass(slots=True)
+class JournalPage:
+    """A contiguous run of journal entries, oldest first.
+
+    `first_cursor` is used to page backwards ("load older"), `last_cursor` to tail forwards.
+    """
+
+    entries: list[JournalEntry] = field(default_factory=list)
+    first_cursor: str | None = None
+    last_cursor: str | None = None
+
+
+def _run_journalctl(unit: str, *args: str) -> list[dict]:
+    try:
+        with SUBPROCESS_DURATION.time(command="journalctl"):
+            result = subprocess.run(
+                [
+                    "journalctl",
+                    f"--unit={unit}",
+                    "--output=json",
+                    "--output-fields=MESSAGE,PRIORITY",
+                    "--no-pager",
+                    *args,
+                ],
+                check=False,
+                text=True,
+                capture_output=True,
+                timeout=COLLECT_TIMEOUT_SECONDS,
+            )
+    except OSError as exc:
+        SUBPROCESS_FAILURES.inc(command="journalctl")
+        logger.warning("journalctl unavailable: %s", exc)
+        return []
+    except subprocess.TimeoutExpired:
+        SUBPROCESS_FAILURES.inc(command="journalctl")
+        logger.warning("journalctl timed out after %ss for %s", COLLECT_TIMEOUT_SECONDS, unit)
+        return []
+    if result.returncode != 0:
+        SUBPROCESS_FAILURES.inc(command="journalctl")
+        logger.warning("journalctl failed for %s: %s", unit, result.stderr.strip())
+        return []
+    records = []
+    for line in result.stdout.splitlines():
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            continue
+    return records
+
+
+def record_message(record: dict) -> str:
+    message = record.get("MESSAGE") or ""
+    # journald stores non-UTF-8 messages as a list of byte values
+    if isinstance(message, list):
+        return bytes(message).decode("utf-8", errors="replace")
+    return message
+
+
+def _to_page(records: list[dict]) -> JournalPage:
+    entries = [
+        JournalEntry(
+            timestamp=int(record.get("__REALTIME_TIMESTAMP", 0)),
+            priority=int(record.get("PRIORITY", 6)),
+            message=record_message(record),
+        )
+        for record in records
+    ]
+    if not records:
+        return JournalPage()
+    return JournalPage(
+        entries=entries, first_cursor=records[0]["__CURSOR"], last_cursor=records[-1]["__CURSOR"]
+    )
+
+
+class JournalReader:
+    """Reads a unit's journal in cursor-delimited pages.
+
+    Pages before a cursor never change, so they are kept in an LRU cache; the latest page and
+    tail reads always go to journald.
+    """
+
+    def __init__(self, cache_size: int = PAGE_CACHE_SIZE):
+        self._cache: OrderedDict[tuple[str, str, int], JournalPage] = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+
+    def latest(self, unit: str, limit: int = DEFAULT_PAGE_SIZE) -> JournalPage:
+        """The newest `limit` entries."""
+        return _to_page(_run_journalctl(unit, f"--lines={limit}"))
+
+    def after(self, unit: str, cursor: str, limit: int = DEFAULT_PAGE_SIZE) -> JournalPage:
+        """Entries written after `cursor` (live tail), at most the newest `limit`."""
+        return _to_page(_run_journalctl(unit, f"--after-cursor={cursor}", f"--lines={limit}"))
+
+    def before(self, unit: str, cursor: str, limit: int = DEFAULT_PAGE_SIZE) -> JournalPage:
+        """Up to `limit` entries older than `cursor` ("load older")."""
+        key = (unit, cursor, limit)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        # Walk backwards starting at the cursor itself, which is then dropped
+        records = _run_journalctl(unit, f"--cursor={cursor}", "--reverse", f"--lines={limit + 1}")
+        records = [record for record in records if record.get("__CURSOR") != cursor][:limit]
+        page = _to_page(records[::-1])
+
+        with self._lock:
+            self._cache[key] = page
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return page
+
+
+journal_reader = JournalReader()
@@ -0,0 +1,335 @@
+import atexit
+import bisect
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+from src.database import process_alive
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Seconds between writes of a process' metrics to the shared metrics directory
+SHARE_INTERVAL_SECONDS = 5.0
+
+# (metric name suffix, labels, value)
+Sample = tuple[str, dict[str, str], float]
+# (labels, value): a value per label set, a list of bucket counts and the sum for histograms
+Entry = tuple[dict[str, str], object]
+# Per metric name: {"type", "help", "entries"} and "buckets" for histograms (Registry.state)
+State = dict[str, dict]
+
+
+class Registry:
+    """Metrics rendered by `/metrics` in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+        # Set by SharedMetrics.start(): values of the other processes are added up with this one's
+        self.shared: SharedMetrics | None = None
+
+    def register(self, metric: "_Metric") -> None:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+
+    def metrics(self) -> list["_Metric"]:
+        with self._lock:
+            return list(self._metrics.values())
+
+    def state(self) -> State:
+        """Current values of the metrics that are added up across processes."""
+        return {metric.name: metric.export() for metric in self.metrics() if metric.shared}
+
+    def render(self) -> str:
+        peers = self.shared.read_peers() if self.shared else []
+        metrics = self.metrics()
+        # Also metrics of modules only other processes imported, e.g. the collector process' scheduler
+        known = {metric.name for metric in metrics}
+        for peer in peers:
+            for name, exported in peer.items():
+                if name not in known:
+                    known.add(name)
+                    metrics.append(_from_export(name, exported))
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            entries = metric.state()
+            if metric.shared and peers:
+                entries = metric.merge(
+                    [entries, *(peer[metric.name]["entries"] for peer in peers if metric.name in peer)]
+                )
+            for suffix, labels, value in metric.samples(entries):
+                lines.append(f"{metric.name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    type = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        registry=REGISTRY,
+        shared: bool = True,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        # Whether the values of all processes are added up (SharedMetrics). Not for values every process
+        # computes the same way, such as gauges of the shared snapshot
+        self.shared = shared
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def _key(self, labels: dict[str, object]) -> tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: tuple[str, ...]) -> dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def state(self) -> list[Entry]:
+        raise NotImplementedError
+
+    def export(self) -> dict:
+        return {"type": self.type, "help": self.documentation, "entries": self.state()}
+
+    @staticmethod
+    def _add(value, other):
+        return value + other
+
+    def merge(self, states: Iterable[list[Entry]]) -> list[Entry]:
+        """Add up the values of the same label set in several processes' states."""
+        merged: dict[tuple, Entry] = {}
+        for entries in states:
+            for labels, value in entries:
+                key = tuple(sorted(labels.items()))
+                merged[key] = (labels, self._add(merged[key][1], value)) if key in merged else (labels, value)
+        return list(merged.values())
+
+    def samples(self, entries: list[Entry]) -> Iterator[Sample]:
+        for labels, value in entries:
+            yield "", labels, value
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def state(self) -> list[Entry]:
+        with self._lock:
+            return [(self._labels(key), value) for key, value in self._values.items()]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class CallbackGauge(_Metric):
+    """A gauge computed at scrape time, e.g. a queue depth or values from the current snapshot."""
+
+    type = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], Iterable[tuple[dict[str, str], float]]],
+        labelnames: tuple[str, ...] = (),
+        registry=REGISTRY,
+        shared: bool = True,
+    ):
+        super().__init__(name, documentation, labelnames, registry, shared)
+        self._callback = callback
+
+    def state(self) -> list[Entry]:
+        return [(labels, value) for labels, value in self._callback() if value is not None]
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, *args, buckets: tuple[float, ...] = DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = buckets
+        # Per label set: [count per bucket..., count above the last bucket, sum]
+        self._values: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * (len(self.buckets) + 2)
+            counts[index] += 1
+            counts[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the `with` block in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        counts = self._values.get(self._key(labels))
+        return int(sum(counts[:-1])) if counts else 0
+
+    def state(self) -> list[Entry]:
+        with self._lock:
+            return [(self._labels(key), list(counts)) for key, counts in self._values.items()]
+
+    def export(self) -> dict:
+        return {**super().export(), "buckets": self.buckets}
+
+    @staticmethod
+    def _add(value, other):
+        return [count + other_count for count, other_count in zip(value, other)]
+
+    def samples(self, entries: list[Entry]) -> Iterator[Sample]:
+        for labels, counts in entries:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts[:-1]):
+                cumulative += count
+                yield "_bucket", {**labels, "le": _format_value(bound)}, cumulative
+            yield "_sum", labels, counts[-1]
+            yield "_count", labels, cumulative
+
+
+def _from_export(name: str, exported: dict) -> _Metric:
+    """An unregistered metric to render another process' values with."""
+    if exported["type"] == "histogram":
+        return Histogram(name, exported["help"], buckets=tuple(exported["buckets"]), registry=Registry())
+    metric_type = Gauge if exported["type"] == "gauge" else Counter
+    return metric_type(name, exported["help"], registry=Registry())
+
+
+class SharedMetrics:
+    """Adds up the metrics of all processes of `uv run serve`: the collector process and every worker.
+
+    Each process writes its registry's state to `<directory>/<pid>.json` every few seconds, and
+    `/metrics` in any worker adds the other processes' files to its own values. Files of exited
+    processes are kept for their counters and histograms, so totals never go down when a worker or
+    the collector is restarted; their gauges are left out.
+    """
+
+    def __init__(
+        self, directory: Path, registry: Registry = REGISTRY, interval: float = SHARE_INTERVAL_SECONDS
+    ):
+        self.directory = directory
+        self.registry = registry
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @staticmethod
+    def reset(directory: Path) -> None:
+        """Remove the previous run's files, before any process of a new run starts writing."""
+        shutil.rmtree(directory, ignore_errors=True)
+        directory.mkdir(parents=True, exist_ok=True)
+
+    def write(self) -> None:
+        path = self.directory / f"{os.getpid()}.json"
+        temporary = path.with_suffix(".tmp")
+        temporary.write_text(json.dumps(self.registry.state()))
+        temporary.replace(path)  # Readers never see a partly written file
+
+    def read_peers(self) -> list[State]:
+        """States written by the other processes."""
+        peers = []
+        for path in self.directory.glob("*.json"):
+            if not path.stem.isdigit() or int(path.stem) == os.getpid():
+                continue
+            try:
+                state = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue  # Removed by a reset or written by another version
+            if not process_alive(int(path.stem)):
+                state = {name: exported for name, exported in state.items() if exported["type"] != "gauge"}
+            peers.append(state)
+        return peers
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.write()
+            except OSError:
+                logger.exception("Failed to write metrics to %s", self.directory)
+
+    def start(self) -> None:
+        """Write this process' metrics periodically and on exit, and add the others' to `/metrics`."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.registry.shared = self
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="shared-metrics", daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self) -> None:
+        self._stop.set()
+        try:
+            self.write()
+        except OSError:
+            pass
+
+
+# Shared by every module that runs commands
+SUBPROCESS_DURATION = Histogram(
+    "service_monitor_subprocess_duration_seconds", "Duration of subprocess calls", ("command",)
+)
+SUBPROCESS_FAILURES = Counter(
+    "service_monitor_subprocess_failures_total", "Subprocess calls that failed or timed out", ("command",)
+)
@@ -0,0 +1,153 @@
+"""Multi-node mode: one dashboard for the monitored units of several Pis.
+
+Every other Pi runs an agent (`python -m src.app --agent`), which only collects and serves its
+snapshot at `/api/snapshot`. The dashboard's collector polls all agents concurrently over pooled
+keep-alive connections and merges their units into its own snapshot, so pages keep reading one
+in-memory snapshot however many nodes there are.
+"""
+
+import logging
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, fields, replace
+
+from src.collector import StatusCollector, collect_service_statuses
+from src.config import NODE_TIMEOUT_SECONDS
+from src.metrics import Gauge, Histogram
+from src.services import ServiceStatus
+from src.sessions import LazySession
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_PATH = "/api/snapshot"
+_STATUS_FIELDS = {f.name for f in fields(ServiceStatus)}
+
+NODE_UP = Gauge("service_monitor_node_up", "1 if the node's agent answered the last poll", ("node",))
+NODE_POLL_DURATION = Histogram(
+    "service_monitor_node_poll_duration_seconds", "Agent snapshot request duration", ("node",)
+)
+
+
+@dataclass(frozen=True, slots=True)
+class Node:
+    name: str
+    url: str  # Agent base URL, e.g. http://pi2.local:5002
+    timeout_seconds: float = NODE_TIMEOUT_SECONDS
+
+
+def load_nodes(configs: list[dict]) -> list[Node]:
+    """Build nodes from `[[tool.config.nodes]]` tables."""
+    nodes = [
+        Node(config["name"], config["url"].rstrip("/"), config.get("timeout_seconds", NODE_TIMEOUT_SECONDS))
+        for config in configs
+    ]
+    names = [node.name for node in nodes]
+    if duplicates := {name for name in names if names.count(name) > 1}:
+        raise ValueError(f"Duplicate nodes {sorted(duplicates)}")
+    return nodes
+
+
+def parse_node(spec: str) -> Node:
+    """`pi2=http://pi2.local:5002` -> Node (for `--node` on the command line)."""
+    name, sep, url = spec.partition("=")
+    if not sep or not name or not url:
+        raise ValueError(f"Expected name=url, got {spec!r}")
+    return Node(name, url.rstrip("/"))
+
+
+@dataclass
+class _NodeState:
+    """Last snapshot received from an agent, to ask for deltas and fall back to on errors."""
+
+    etag: str | None = None
+    epoch: str | None = None
+    version: int | None = None
+    services: dict[str, ServiceStatus] = field(default_factory=dict)  # Agent's unit name -> status
+
+
+class NodeAggregator:
+    """Collect function returning local units plus every node's units.
+
+    Remote units are named `<node>/<unit>` and carry `node`. Each poll sends the last ETag
+    (an unchanged agent answers 304) and asks for units changed since the last version. A node
+    that does not answer within its timeout keeps its last known units, marked with the error.
+    """
+
+    def __init__(
+        self,
+        nodes: list[Node],
+        collect_local: Callable[[], list[ServiceStatus]] | None = collect_service_statuses,
+    ):
+        self.nodes = nodes
+        self._collect_local = collect_local
+        self._states = {node.name: _NodeState() for node in nodes}
+        self._executor = ThreadPoolExecutor(max_workers=max(1, len(nodes)), thread_name_prefix="node-poll")
+        # One keep-alive connection per agent, reused across polls
+        self._session = LazySession(pool_connections=max(1, len(nodes)), pool_maxsize=1)
+
+    def __call__(self) -> list[ServiceStatus]:
+        polls = [self._executor.submit(self._poll, node) for node in self.nodes]
+        local = self._collect_local() if self._collect_local else []
+        remote = [status for poll in polls for status in poll.result()]
+        return list(local) + remote
+
+    def _poll(self, node: Node) -> list[ServiceStatus]:
+        import requests
+
+        state = self._states[node.name]
+        try:
+            with NODE_POLL_DURATION.time(node=node.name):
+                self._fetch(node, state)
+        except (requests.RequestException, ValueError, KeyError, TypeError) as exc:
+            logger.warning("Node %s unavailable: %s", node.name, exc)
+            NODE_UP.set(0, node=node.name)
+            error = f"{node.name} unavailable ({type(exc).__name__})"
+            return [
+                replace(self._qualify(node, status), collection_error=error)
+                for status in state.services.values()
+            ]
+        NODE_UP.set(1, node=node.name)
+        return [self._qualify(node, status) for status in state.services.values()]
+
+    def _fetch(self, node: Node, state: _NodeState) -> None:
+        headers = {"If-None-Match": state.etag} if state.etag else {}
+        params = {"epoch": state.epoch, "since": state.version} if state.version is not None else {}
+        response = self._session.get().get(
+            f"{node.url}{SNAPSHOT_PATH}", params=params, headers=headers, timeout=node.timeout_seconds
+        )
+        if response.status_code == 304:
+            return
+        response.raise_for_status()
+        payload = response.json()
+        updated = {data["name"]: _status_from_dict(data) for data in payload["services"]}
+        if payload["since"] is None:
+            state.services = updated
+        else:
+            state.services = {
+                name: updated.get(name) or state.services[name]
+                for name in payload["names"]
+                if name in updated or name in state.services
+            }
+        state.etag = response.headers.get("ETag")
+        state.epoch, state.version = payload["epoch"], payload["version"]
+
+    @staticmethod
+    def _qualify(node: Node, status: ServiceStatus) -> ServiceStatus:
+        return replace(status, name=f"{node.name}/{status.name}", node=node.name)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._session.close()
+
+
+def aggregate(collector: StatusCollector, nodes: list[Node]) -> NodeAggregator:
+    """Make `collector` collect local units plus the units of `nodes`."""
+    aggregator = NodeAggregator(nodes)
+    collector.collect_fn = aggregator
+    logger.info("Aggregating %d nodes: %s", len(nodes), ", ".join(node.name for node in nodes))
+    return aggregator
+
+
+def _status_from_dict(data: dict) -> ServiceStatus:
+    """Status from an agent's JSON; fields added by newer agents are ignored."""
+    return ServiceStatus(**{key: value for key, value in data.items() if key in _STATUS_FIELDS})
@@ -0,0 +1,95 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from datetime import UTC, datetime
+
+from src.assets import compress
+from src.collector import Snapshot
+from src.metrics import Counter
+
+PAGE_CACHE_SIZE = 64  # Whole pages: one per selected service and snapshot version
+FRAGMENT_CACHE_SIZE = 4096  # Sidebar rows: one per service version and selection state
+
+RENDER_CACHE_LOOKUPS = Counter(
+    "service_monitor_render_cache_lookups_total",
+    "Rendered HTML cache lookups by result (hit, miss, not_modified)",
+    ("cache", "result"),
+)
+
+
+class RenderedPage:
+    """A rendered page and its compressed bodies, each compressed once however often it is served."""
+
+    def __init__(self, html: str):
+        self._bodies = {"identity": html.encode()}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._bodies["identity"])
+
+    def body(self, encoding: str) -> bytes:
+        # Under the lock, so concurrent first requests for an encoding compress the page only once
+        with self._lock:
+            if encoding not in self._bodies:
+                self._bodies[encoding] = compress(self._bodies["identity"], encoding, dynamic=True)
+            return self._bodies[encoding]
+
+
+class RenderCache[T]:
+    """Bounded LRU of rendered HTML (pages as `RenderedPage`, sidebar rows as strings).
+
+    Keys contain the snapshot epoch and version (or a service's version), so an entry never has to
+    be invalidated: once the snapshot changes its old keys are no longer asked for and age out.
+    """
+
+    def __init__(self, name: str, max_entries: int):
+        self.name = name
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, T] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_render(self, key: Hashable, render: Callable[[], T]) -> T:
+        with self._lock:
+            html = self._entries.get(key)
+            if html is not None:
+                self._entries.move_to_end(key)
+        if html is not None:
+            RENDER_CACHE_LOOKUPS.inc(cache=self.name, result="hit")
+            return html
+
+        RENDER_CACHE_LOOKUPS.inc(cache=self.name, result="miss")
+        html = render()
+        with self._lock:
+            self._entries[key] = html
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return html
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def page_etag(epoch: str, snapshot: Snapshot, service: str | None) -> str:
+    """Validator (and page cache key) of the page rendered for `service` from `snapshot`.
+
+    The same in every worker. A strong hash of the whole name, so no other query string can
+    produce the ETag, and with it the cached page, of a service.
+    """
+    digest = hashlib.sha256((service or "").encode()).hexdigest()[:32]
+    return f"{epoch}-{snapshot.version}-{digest}"
+
+
+def last_modified(snapshot: Snapshot) -> datetime | None:
+    """When the snapshot last changed, to the second (HTTP dates have no fractions)."""
+    if snapshot.changed_at is None:
+        return None
+    return datetime.fromtimestamp(int(snapshot.changed_at), UTC)
+
+
+page_cache: RenderCache[RenderedPage] = RenderCache("page", PAGE_CACHE_SIZE)
+fragment_cache: RenderCache[str] = RenderCache("fragment", FRAGMENT_CACHE_SIZE)
@@ -0,0 +1,107 @@
+import heapq
+import threading
+from dataclasses import dataclass, field
+
+from src.collector import Snapshot
+from src.services import SERVICE_STATES, ServiceStatus, service_state
+
+# Sort keys: numeric resources sort largest first, name alphabetically
+SORT_KEYS = {
+    "memory": lambda status: status.memory_bytes,
+    "cpu": lambda status: status.cpu_nsec,
+    # Longest running first: earliest start
+    "uptime": lambda status: -status.active_since if status.active_since is not None else None,
+}
+
+
+@dataclass(frozen=True)
+class ServiceQuery:
+    group: str | None = None
+    state: str | None = None
+    suffix: str | None = None
+    search: str | None = None  # Case-insensitive substring of the service name
+    sort: str | None = None  # "name" or one of SORT_KEYS
+    limit: int | None = None
+
+
+@dataclass
+class SnapshotIndex:
+    """Positions of a snapshot's services by project group, state and suffix.
+
+    Built once per snapshot version, so filtering is a set intersection instead of a scan and
+    only the matching services are sorted.
+    """
+
+    snapshot: Snapshot
+    by_group: dict[str, set[int]] = field(default_factory=dict)
+    by_state: dict[str, set[int]] = field(default_factory=dict)
+    by_suffix: dict[str, set[int]] = field(default_factory=dict)
+    names: list[str] = field(default_factory=list)  # Lowercased, for search
+
+    @classmethod
+    def build(cls, snapshot: Snapshot) -> "SnapshotIndex":
+        index = cls(snapshot)
+        for position, status in enumerate(snapshot.services):
+            index.by_group.setdefault(status.project_group, set()).add(position)
+            index.by_state.setdefault(service_state(status), set()).add(position)
+            if status.suffix:
+                index.by_suffix.setdefault(status.suffix, set()).add(position)
+            index.names.append(status.name.lower())
+        return index
+
+    def facets(self) -> dict[str, dict[str, int]]:
+        """Service counts per group, state and suffix."""
+        return {
+            "group": {group: len(positions) for group, positions in sorted(self.by_group.items())},
+            "state": {state: len(self.by_state.get(state, ())) for state in SERVICE_STATES},
+            "suffix": {suffix: len(positions) for suffix, positions in sorted(self.by_suffix.items())},
+        }
+
+    def query(self, query: ServiceQuery) -> tuple[list[ServiceStatus], int]:
+        """Matching services (sorted and limited as requested) and the total number of matches."""
+        positions: set[int] | None = None
+        for values, key in (
+            (self.by_group, query.group),
+            (self.by_state, query.state),
+            (self.by_suffix, query.suffix),
+        ):
+            if key is not None:
+                matches = values.get(key, set())
+                positions = matches if positions is None else positions & matches
+        candidates = range(len(self.names)) if positions is None else sorted(positions)
+        if query.search:
+            needle = query.search.lower()
+            candidates = [position for position in candidates if needle in self.names[position]]
+
+        services = self.snapshot.services
+        matches = [services[position] for position in candidates]
+        total = len(matches)
+        if query.sort == "name":
+            matches.sort(key=lambda status: status.name)
+        elif query.sort:
+            value = SORT_KEYS[query.sort]
+
+            def key(status: ServiceStatus) -> tuple[bool, float]:
+                # Services without a value (e.g. stopped) sort last
+                number = value(status)
+                return number is not None, number or 0
+
+            if query.limit is not None:
+                return heapq.nlargest(query.limit, matches, key=key), total  # Top-k without a full sort
+            matches.sort(key=key, reverse=True)
+        if query.limit is not None:
+            matches = matches[: query.limit]
+        return matches, total
+
+
+_index: SnapshotIndex | None = None
+_index_lock = threading.Lock()
+
+
+def get_index(snapshot: Snapshot) -> SnapshotIndex:
+    """The index for `snapshot`, rebuilt only when its services change."""
+    global _index
+    with _index_lock:
+        if _index is None or _index.snapshot.services is not snapshot.services:
+            _index = SnapshotIndex.build(snapshot)
+        return _index
@@ -0,0 +1,164 @@
+import logging
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from src.collector import Snapshot
+from src.config import ALERT_RULES, UNIT_INCLUDE
+from src.discovery import is_monitored
+from src.services import ServiceStatus, format_bytes, parse_bytes
+from src.telegram import report_threshold_to_telegram
+
+logger = logging.getLogger(__name__)
+
+METRICS = ("memory", "cpu")
+
+
+@dataclass(frozen=True, slots=True)
+class ThresholdRule:
+    """Alert when a service's metric stays above `above` for `window_seconds`.
+
+    memory: bytes, the lowest value in the window must be above the threshold.
+    cpu: % of one core, averaged over the window (CPU time is cumulative, so this is a rate).
+    """
+
+    metric: str
+    above: float
+    window_seconds: float = 0
+    pattern: str | None = None  # None: every unit matching `unit_include`
+
+    @property
+    def patterns(self) -> list[str]:
+        return [self.pattern] if self.pattern else UNIT_INCLUDE
+
+    def format_value(self, value: float) -> str:
+        return format_bytes(int(value)) if self.metric == "memory" else f"{value:.0f}%"
+
+    def describe(self) -> str:
+        window = f" for {self.window_seconds:g}s" if self.window_seconds else ""
+        return f"{self.metric} above {self.format_value(self.above)}{window}"
+
+
+def load_rules(configs: list[dict]) -> list[ThresholdRule]:
+    """Build rules from `[[tool.config.alert_rules]]` tables. Memory thresholds may be sizes like '1G'."""
+    rules = []
+    for config in configs:
+        metric = config["metric"]
+        if metric not in METRICS:
+            raise ValueError(f"Unknown alert rule metric {metric!r}, expected one of {METRICS}")
+        above = config["above"]
+        if isinstance(above, str):
+            above = parse_bytes(above)
+            if above is None:
+                raise ValueError(f"Invalid size {config['above']!r} in alert rule")
+        rules.append(
+            ThresholdRule(
+                metric=metric,
+                above=float(above),
+                window_seconds=config.get("window_seconds", 0),
+                pattern=config.get("pattern"),
+            )
+        )
+    return rules
+
+
+@dataclass(slots=True)
+class _Sample:
+    timestamp: float
+    memory_bytes: int | None
+    cpu_nsec: int | None
+
+
+# Called with (rule, status, value) once when a service starts breaching a rule
+ThresholdNotifier = Callable[[ThresholdRule, ServiceStatus, float], None]
+
+
+class ThresholdAlerts:
+    """Evaluates threshold rules against collector snapshots.
+
+    Only the numeric fields already in the snapshot are used, so evaluation never runs systemctl.
+    Each service keeps just enough samples to cover the longest rule window. A rule fires once
+    when a service starts breaching it and re-arms when the value drops back below the threshold.
+    """
+
+    def __init__(self, rules: list[ThresholdRule], notify: ThresholdNotifier):
+        self.rules = rules
+        self._notify = notify
+        self._max_window = max((rule.window_seconds for rule in rules), default=0)
+        self._samples: dict[str, deque[_Sample]] = {}
+        self._firing: set[tuple[ThresholdRule, str]] = set()
+        self._lock = threading.Lock()
+
+    def evaluate(self, snapshot: Snapshot) -> list[tuple[ThresholdRule, ServiceStatus, float]]:
+        """Record the snapshot and notify for every new breach. Returns the new breaches."""
+        now = snapshot.collected_at if snapshot.collected_at is not None else time.time()
+        breaches = []
+        with self._lock:
+            for status in snapshot.services:
+                samples = self._record(status, now)
+                for rule in self.rules:
+                    if not is_monitored(status.unit, rule.patterns, ()):
+                        continue
+                    value = self._value(rule, samples, now)
+                    key = (rule, status.name)
+                    if value is None or value <= rule.above:
+                        self._firing.discard(key)
+                    elif key not in self._firing:
+                        self._firing.add(key)
+                        breaches.append((rule, status, value))
+            names = {status.name for status in snapshot.services}
+            for name in self._samples.keys() - names:
+                del self._samples[name]
+
+        for rule, status, value in breaches:
+            logger.warning(f"Service {status.name} breached {rule.describe()}: {rule.format_value(value)}")
+            try:
+                self._notify(rule, status, value)
+            except Exception:
+                logger.exception("Failed to send threshold alert for %s", status.name)
+        return breaches
+
+    def _record(self, status: ServiceStatus, now: float) -> deque[_Sample]:
+        samples = self._samples.setdefault(status.name, deque())
+        if samples and samples[-1].timestamp >= now:
+            return samples  # Same snapshot evaluated again
+        # A restart resets the CPU counter and a stopped unit has no usage: start over
+        if status.memory_bytes is None or (
+            samples
+            and samples[-1].cpu_nsec is not None
+            and (status.cpu_nsec is None or status.cpu_nsec < samples[-1].cpu_nsec)
+        ):
+            samples.clear()
+        if status.memory_bytes is None and status.cpu_nsec is None:
+            return samples
+        samples.append(_Sample(now, status.memory_bytes, status.cpu_nsec))
+        # Keep one sample at or before the start of the longest window
+        while len(samples) > 2 and samples[1].timestamp <= now - self._max_window:
+            samples.popleft()
+        return samples
+
+    @staticmethod
+    def _value(rule: ThresholdRule, samples: deque[_Sample], now: float) -> float | None:
+        """The rule's metric over its window, or None if the samples don't cover the window yet."""
+        if not samples or samples[0].timestamp > now - rule.window_seconds:
+            return None
+        start = max(i for i, sample in enumerate(samples) if sample.timestamp <= now - rule.window_seconds)
+        window = list(samples)[start:]
+        if rule.metric == "memory":
+            values = [sample.memory_bytes for sample in window]
+            return None if None in values else float(min(values))
+        if len(window) < 2:
+            window = list(samples)[-2:]
+        first, last = window[0], window[-1]
+        if len(window) < 2 or first.cpu_nsec is None or last.cpu_nsec is None:
+            return None
+        return (last.cpu_nsec - first.cpu_nsec) / 1e9 / (last.timestamp - first.timestamp) * 100
+
+
+def _notify_telegram(rule: ThresholdRule, status: ServiceStatus, value: float) -> None:
+    report_threshold_to_telegram(status, rule.describe(), rule.format_value(value))
+
+
+threshold_alerts = ThresholdAlerts(load_rules(ALERT_RULES), notify=_notify_telegram)
@@ -5,8 +5,22 @@ from datetime import datetime
 
 import schedule
 
-from src.services import get_service_status, get_services
-from src.telegram import report_error_to_telegram
+from src.actions import action_runner
+from src.availability import (
+    FLUSH_INTERVAL_SECONDS,
+    record_availability,
+    record_transitions,
+)
+from src.collector import Snapshot, collector
+from src.config import COLLECTOR_INTERVAL_SECONDS, SEARCH_INDEX, WATCH_UNIT_EVENTS
+from src.history import record_history
+from src.jobs import restart_jobs
+from src.metrics import Histogram
+from src.rules import threshold_alerts
+from src.search import journal_indexer
+from src.services import ServiceStatus, is_linux
+from src.telegram import dispatcher, report_error_to_telegram
+from src.watcher import JournalEventSource, UnitWatcher
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.INFO)
@@ -16,6 +30,8 @@ _alerted_services: dict[str, datetime] = {}
 _alert_lock = threading.Lock()
 reset_time = 6  # AM
 
+JOB_DURATION = Histogram("service_monitor_job_duration_seconds", "Scheduler job duration", ("job",))
+
 
 def _get_current_day() -> datetime:
     """Get the current 'day' for alerting purposes (resets at 6am)."""
@@ -40,32 +56,80 @@ def _mark_alerted(service_name: str) -> None:
         _alerted_services[service_name] = datetime.now()
 
 
+def _alert_failed_service(service_status: ServiceStatus) -> None:
+    """Send a Telegram alert for a failed service, at most once per day."""
+    logger.warning(f"Service {service_status.name} has failed.")
+    if _should_alert(service_status.name):
+        report_error_to_telegram(service_status)
+        _mark_alerted(service_status.name)
+        logger.info(f"Alert sent for {service_status.name}")
+    else:
+        logger.info(f"Alert already sent today for {service_status.name}, skipping.")
+
+
 def service_health_check():
     """Check the health of services and log their status."""
-    services = get_services()
-    service_statuses = [get_service_status(svc) for svc in services]
-    for service_status in service_statuses:
-        if service_status.is_failed:
-            logger.warning(f"Service {service_status.name} has failed.")
-            if _should_alert(service_status.name):
-                report_error_to_telegram(service_status)
-                _mark_alerted(service_status.name)
-                logger.info(f"Alert sent for {service_status.name}")
-            else:
-                logger.info(f"Alert already sent today for {service_status.name}, skipping.")
+    with JOB_DURATION.time(job="service_health_check"):
+        for service_status in collector.get_snapshot().services:
+            if service_status.is_failed:
+                _alert_failed_service(service_status)
+
+
+def alert_on_new_failures(previous: Snapshot, current: Snapshot) -> None:
+    """Snapshot listener: alert as soon as a service transitions into the failed state."""
+    previously_failed = {status.name for status in previous.services if status.is_failed}
+    for service_status in current.services:
+        if service_status.is_failed and service_status.name not in previously_failed:
+            _alert_failed_service(service_status)
+
+
+def check_thresholds():
+    """Evaluate the threshold alert rules against the cached snapshot."""
+    with JOB_DURATION.time(job="check_thresholds"):
+        threshold_alerts.evaluate(collector.get_snapshot())
+
+
+def flush_availability():
+    """Account availability up to the latest collection, also while the snapshot does not change."""
+    snapshot = collector.get_snapshot()
+    if snapshot.collected_at is None:
+        return  # Nothing collected yet: an empty snapshot would mark every known unit as removed
+    with JOB_DURATION.time(job="flush_availability"):
+        record_availability(snapshot)
+
+
+def fail_interrupted_work():
+    """Mark restart jobs and action runs of processes that exited (e.g. a restarted worker) failed."""
+    with JOB_DURATION.time(job="fail_interrupted_work"):
+        restart_jobs.store.fail_orphans()
+        action_runner.store.fail_orphans()
 
 
 def schedule_loop():
     """Schedule the periodic tasks."""
     schedule.every().hour.at(":00").do(service_health_check)
     logger.info("Scheduled hourly service health check")
+    if threshold_alerts.rules:
+        schedule.every(COLLECTOR_INTERVAL_SECONDS).seconds.do(check_thresholds)
+        logger.info(f"Scheduled threshold checks for {len(threshold_alerts.rules)} rules")
+    schedule.every(FLUSH_INTERVAL_SECONDS).seconds.do(flush_availability)
+    schedule.every(60).seconds.do(fail_interrupted_work)
     while True:
         schedule.run_pending()
         time.sleep(1)
 
 
 def start_threads():
-    """Start the schedule thread."""
+    """Start the status collector, unit watcher, journal indexer and schedule threads."""
+    collector.add_listener(alert_on_new_failures)
+    collector.add_listener(record_history)
+    collector.add_listener(record_transitions)
+    fail_interrupted_work()  # Left behind by the previous run
+    collector.start()
+    if WATCH_UNIT_EVENTS and is_linux():
+        UnitWatcher(JournalEventSource(), collector).start()
+    if SEARCH_INDEX and is_linux():
+        journal_indexer.start()
     schedule_thread = threading.Thread(target=schedule_loop)
     schedule_thread.start()
     # dont join the threads (blocks main thread which flask runs on)
@@ -74,3 +138,4 @@ def start_threads():
 
 if __name__ == "__main__":
     service_health_check()
+    dispatcher.flush(timeout=60)
@@ -0,0 +1,345 @@
+"""Full-text search over the journals of all monitored units.
+
+A background indexer reads new journal entries of the units matching `unit_include` with one
+`journalctl` call per poll, resuming from the last indexed cursor, and appends them to an SQLite
+FTS5 index. Searches (`/api/search`) then only touch the index, never the journal.
+"""
+
+import json
+import logging
+import sqlite3
+import subprocess
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from src.config import (
+    DATA_DIR,
+    SEARCH_INDEX_INTERVAL_SECONDS,
+    SEARCH_MAX_ENTRIES,
+    SEARCH_RETENTION_DAYS,
+    UNIT_INCLUDE,
+)
+from src.database import connect
+from src.journal import JournalEntry, record_message
+from src.metrics import SUBPROCESS_DURATION, SUBPROCESS_FAILURES, Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+SEARCH_DB_PATH = DATA_DIR / "search.db"
+BATCH_SIZE = 5000  # Journal entries read and committed at a time
+PRUNE_INTERVAL_SECONDS = 3600
+# After a prune, at most this many FTS index pages are merged; a full optimize rewrites the whole
+# index while holding the store lock, so it only runs once per OPTIMIZE_INTERVAL_SECONDS
+MERGE_PAGES = 500
+OPTIMIZE_INTERVAL_SECONDS = 86400
+DEFAULT_HITS = 50
+MAX_HITS = 200
+MAX_CONTEXT_LINES = 10
+ORDERS = {"rank": "c.rank", "oldest": "e.id", "newest": "e.id DESC"}
+MAX_RANKED = 10000  # Newest matches considered for best-match ordering
+
+SEARCH_INDEXED = Counter(
+    "service_monitor_search_indexed_entries_total", "Journal entries added to the search index"
+)
+SEARCH_DURATION = Histogram("service_monitor_search_duration_seconds", "Search query duration")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    unit TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    priority INTEGER NOT NULL,
+    message TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_unit ON entries (unit, id);
+CREATE INDEX IF NOT EXISTS entries_timestamp ON entries (timestamp);
+-- The unit is indexed as a single token (see _unit_token), so unit filters are resolved by the index
+CREATE VIRTUAL TABLE IF NOT EXISTS entries_fts USING fts5(message, unit, content='entries', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN
+    INSERT INTO entries_fts (rowid, message, unit) VALUES (new.id, new.message, 'u' || hex(new.unit));
+END;
+CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN
+    INSERT INTO entries_fts (entries_fts, rowid, message, unit) VALUES ('delete', old.id, old.message, 'u' || hex(old.unit));
+END;
+CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+@dataclass(slots=True)
+class SearchHit:
+    unit: str
+    timestamp: int  # microseconds since the epoch
+    priority: int
+    message: str
+    rank: float  # bm25; lower is a better match
+    before: list[JournalEntry] = field(default_factory=list)  # Preceding entries of the same unit
+    after: list[JournalEntry] = field(default_factory=list)
+
+
+def fts_query(text: str) -> str:
+    """User input -> FTS5 query matching entries that contain every word (`word*` for prefixes).
+
+    Words are quoted, so FTS5 operators and punctuation in log messages are matched literally.
+    """
+    terms = []
+    for word in text.split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*").replace('"', '""')
+        if word:
+            terms.append(f'"{word}"*' if prefix else f'"{word}"')
+    if not terms:
+        raise ValueError("Empty search query")
+    return " ".join(terms)
+
+
+def _unit_token(unit: str) -> str:
+    """A unit name as one FTS token: the tokenizer would split `projects_a.service` into words."""
+    return "u" + unit.encode().hex().upper()
+
+
+class SearchIndex:
+    """Journal entries in SQLite with an FTS5 index on their messages.
+
+    The indexer process writes; gunicorn workers read concurrently (WAL mode).
+    """
+
+    def __init__(self, path: Path | str | None = SEARCH_DB_PATH):
+        self._path = path
+        self._db: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database on first use (call with the lock held)."""
+        if self._db is None:
+            self._db = connect(self._path, _SCHEMA)
+        return self._db
+
+    @property
+    def cursor(self) -> str | None:
+        """Journal cursor of the last indexed entry."""
+        with self._lock:
+            row = self._connect().execute("SELECT value FROM state WHERE key = 'cursor'").fetchone()
+        return row[0] if row else None
+
+    def add(self, entries: list[tuple[str, int, int, str]], cursor: str) -> None:
+        """Append (unit, timestamp, priority, message) entries and the cursor they end at, atomically."""
+        with self._lock, self._connect() as db:
+            db.executemany(
+                "INSERT INTO entries (unit, timestamp, priority, message) VALUES (?, ?, ?, ?)", entries
+            )
+            db.execute("INSERT OR REPLACE INTO state VALUES ('cursor', ?)", (cursor,))
+
+    def prune(self, older_than: int, max_entries: int) -> int:
+        """Drop entries older than `older_than` (µs) and all but the newest `max_entries`."""
+        with self._lock, self._connect() as db:
+            deleted = db.execute("DELETE FROM entries WHERE timestamp < ?", (older_than,)).rowcount
+            deleted += db.execute(
+                "DELETE FROM entries WHERE id <= (SELECT MAX(id) FROM entries) - ?", (max_entries,)
+            ).rowcount
+            if deleted:
+                # Merge some of the index segments left behind by the deletes
+                db.execute("INSERT INTO entries_fts (entries_fts, rank) VALUES ('merge', ?)", (MERGE_PAGES,))
+        return deleted
+
+    def optimize(self) -> None:
+        """Merge the whole FTS index into one segment (slow on a large index)."""
+        with self._lock, self._connect() as db:
+            db.execute("INSERT INTO entries_fts (entries_fts) VALUES ('optimize')")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connect().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def search(
+        self,
+        text: str,
+        unit: str | None = None,
+        since: int | None = None,
+        limit: int = DEFAULT_HITS,
+        context: int = 0,
+        order: str = "rank",
+    ) -> list[SearchHit]:
+        """Entries matching every word of `text`, best match first (or `oldest`/`newest` first).
+
+        `since` is in microseconds since the epoch. Each hit carries up to `context` entries of
+        the same unit before and after it. Raises ValueError for an empty or invalid query.
+        Best-match ordering ranks the newest `MAX_RANKED` matches, so common words stay fast.
+        """
+        match = f"message : ({fts_query(text)})"
+        if unit is not None:
+            match += f" AND unit : {_unit_token(unit)}"
+        candidates = "SELECT rowid, rank FROM entries_fts WHERE entries_fts MATCH ?"
+        params: list = [match]
+
+        with SEARCH_DURATION.time(), self._lock:
+            db = self._connect()
+            if since is not None:
+                # Entries are indexed in journal order, so a rowid bound (cheap for FTS5) replaces a time filter
+                row = db.execute(
+                    "SELECT id FROM entries WHERE timestamp >= ? ORDER BY timestamp LIMIT 1", (since,)
+                ).fetchone()
+                if row is None:
+                    return []
+                first_id = row[0]
+                candidates += " AND rowid >= ?"
+                params.append(first_id)
+            # FTS5 returns matches in rowid order, so only ranking needs more than `limit` candidates
+            candidates += f" ORDER BY rowid {'ASC' if order == 'oldest' else 'DESC'} LIMIT ?"
+            params.append(MAX_RANKED if order == "rank" else limit)
+            sql = (
+                f"SELECT e.id, e.unit, e.timestamp, e.priority, e.message, c.rank FROM ({candidates}) c "
+                f"JOIN entries e ON e.id = c.rowid ORDER BY {ORDERS[order]} LIMIT ?"
+            )
+            try:
+                rows = db.execute(sql, [*params, limit]).fetchall()
+            except sqlite3.OperationalError as exc:
+                raise ValueError(f"Invalid search query: {exc}") from exc
+            hits = []
+            for entry_id, hit_unit, timestamp, priority, message, rank in rows:
+                hit = SearchHit(hit_unit, timestamp, priority, message, rank)
+                if context:
+                    hit.before = self._context(db, hit_unit, entry_id, context, before=True)
+                    hit.after = self._context(db, hit_unit, entry_id, context, before=False)
+                hits.append(hit)
+        return hits
+
+    @staticmethod
+    def _context(
+        db: sqlite3.Connection, unit: str, entry_id: int, lines: int, before: bool
+    ) -> list[JournalEntry]:
+        comparison, direction = ("<", "DESC") if before else (">", "ASC")
+        rows = db.execute(
+            f"SELECT timestamp, priority, message FROM entries WHERE unit = ? AND id {comparison} ? "
+            f"ORDER BY id {direction} LIMIT ?",
+            (unit, entry_id, lines),
+        ).fetchall()
+        entries = [JournalEntry(*row) for row in rows]
+        return entries[::-1] if before else entries
+
+
+def read_journal(args: list[str], limit: int) -> list[dict]:
+    """Up to `limit` journal records (oldest first) of all monitored units, as journalctl JSON."""
+    records = []
+    with SUBPROCESS_DURATION.time(command="journalctl"):
+        try:
+            process = subprocess.Popen(
+                [
+                    "journalctl",
+                    *(f"--unit={pattern}" for pattern in UNIT_INCLUDE),
+                    "--output=json",
+                    "--output-fields=MESSAGE,PRIORITY,_SYSTEMD_UNIT,UNIT",
+                    "--no-pager",
+                    *args,
+                ],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+            )
+        except OSError as exc:
+            SUBPROCESS_FAILURES.inc(command="journalctl")
+            logger.warning("journalctl unavailable: %s", exc)
+            return []
+        with process:
+            for line in process.stdout:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+                if len(records) >= limit:
+                    process.terminate()  # The rest is read from the last cursor next time
+                    break
+    return records
+
+
+class JournalIndexer:
+    """Keeps the search index up to date with the journal, and within its retention limits."""
+
+    def __init__(
+        self,
+        index: SearchIndex,
+        read_fn=read_journal,
+        interval: float = SEARCH_INDEX_INTERVAL_SECONDS,
+        retention_seconds: float = SEARCH_RETENTION_DAYS * 86400,
+        max_entries: int = SEARCH_MAX_ENTRIES,
+        batch_size: int = BATCH_SIZE,
+    ):
+        self.index = index
+        self._read_fn = read_fn
+        self.interval = interval
+        self.retention_seconds = retention_seconds
+        self.max_entries = max_entries
+        self.batch_size = batch_size
+        self._pruned_at = 0.0
+        self._optimized_at = time.monotonic()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def index_new_entries(self) -> int:
+        """Index every entry written since the last run; the first run backfills the retention window."""
+        total = 0
+        while True:
+            cursor = self.index.cursor
+            if cursor:
+                args = [f"--after-cursor={cursor}"]
+            else:
+                args = [f"--since=@{int(time.time() - self.retention_seconds)}"]
+            records = self._read_fn(args, self.batch_size)
+            if not records:
+                return total
+            entries = [
+                (
+                    record.get("_SYSTEMD_UNIT") or record.get("UNIT") or "",
+                    int(record.get("__REALTIME_TIMESTAMP", 0)),
+                    int(record.get("PRIORITY", 6)),
+                    record_message(record),
+                )
+                for record in records
+            ]
+            self.index.add(entries, records[-1]["__CURSOR"])
+            SEARCH_INDEXED.inc(len(entries))
+            total += len(entries)
+            if len(records) < self.batch_size:
+                return total
+
+    def prune(self) -> int:
+        older_than = int((time.time() - self.retention_seconds) * 1e6)
+        deleted = self.index.prune(older_than, self.max_entries)
+        self._pruned_at = time.monotonic()
+        if deleted:
+            logger.info("Pruned %d entries from the search index", deleted)
+            if self._pruned_at - self._optimized_at >= OPTIMIZE_INTERVAL_SECONDS:
+                self.index.optimize()
+                self._optimized_at = self._pruned_at
+        return deleted
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                if count := self.index_new_entries():
+                    logger.debug("Indexed %d journal entries", count)
+                if time.monotonic() - self._pruned_at >= PRUNE_INTERVAL_SECONDS:
+                    self.prune()
+            except Exception:
+                logger.exception("Journal indexing failed")
+            self._stop.wait(self.interval)
+
+    def start(self) -> None:
+        """Start the background indexing thread (no-op if already running)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="journal-indexer", daemon=True)
+        self._thread.start()
+        logger.info("Started journal indexer (every %ss)", self.interval)
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+
+search_index = SearchIndex()
+journal_indexer = JournalIndexer(search_index)
@@ -0,0 +1,201 @@
+"""Production server: gunicorn workers serving one shared snapshot.
+
+A single collector process runs the collector, unit watcher and scheduler and publishes every
+snapshot to a memory-mapped file (`src/shared.py`). The gunicorn workers follow that file instead of
+collecting, so adding workers adds request throughput without adding systemctl or GitHub calls.
+
+    uv run serve --workers 4
+"""
+
+import logging
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import typer
+
+from src.collector import collector
+from src.config import (
+    FLASK_PORT,
+    NODES,
+    SERVE_THREADS,
+    SERVE_WORKERS,
+    SHARED_METRICS_DIR,
+    SHARED_SNAPSHOT_PATH,
+    STREAM_MAX_CLIENTS,
+)
+from src.history import history_store, record_history
+from src.metrics import SharedMetrics
+from src.nodes import aggregate, load_nodes
+from src.shared import (
+    SnapshotFollower,
+    SnapshotPublisher,
+    SnapshotReader,
+    SnapshotWriter,
+)
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).parent.parent
+COLLECTOR_COMMAND = [sys.executable, "-m", "src.serve", "--collector-only"]
+# Restart delays of a collector process that exited: doubled after every quick exit, up to the cap
+RESTART_BACKOFF_SECONDS = 1.0
+MAX_RESTART_BACKOFF_SECONDS = 60.0
+# A collector that ran this long before exiting is restarted with the initial delay again
+STABLE_SECONDS = 60.0
+
+
+def run_collector() -> None:
+    """Collector process: the only process that collects, alerts and writes history."""
+    from src.scheduler import start_threads
+
+    if nodes := load_nodes(NODES):
+        aggregate(collector, nodes)
+    start_threads()
+    SharedMetrics(SHARED_METRICS_DIR).start()
+    SnapshotPublisher(collector, SnapshotWriter(SHARED_SNAPSHOT_PATH)).run()
+
+
+class CollectorSupervisor:
+    """Keeps the collector process running: restarted with a growing delay whenever it exits.
+
+    Without a collector the workers keep serving the last shared snapshot, which only goes stale,
+    so the web server itself stays up while the collector is being restarted.
+    """
+
+    def __init__(
+        self,
+        command: list[str] = COLLECTOR_COMMAND,
+        backoff: float = RESTART_BACKOFF_SECONDS,
+        max_backoff: float = MAX_RESTART_BACKOFF_SECONDS,
+        stable_seconds: float = STABLE_SECONDS,
+    ):
+        self.command = command
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.stable_seconds = stable_seconds
+        self.restarts = 0
+        self._process: subprocess.Popen | None = None
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="collector-supervisor", daemon=True)
+        self._thread.start()
+
+    def _spawn(self) -> subprocess.Popen | None:
+        with self._lock:
+            if self._stopped.is_set():
+                return None
+            self._process = subprocess.Popen(self.command, cwd=PROJECT_ROOT)
+            return self._process
+
+    def _run(self) -> None:
+        delay = self.backoff
+        while (process := self._spawn()) is not None:
+            started = time.monotonic()
+            returncode = process.wait()
+            if self._stopped.is_set():
+                return
+            if time.monotonic() - started >= self.stable_seconds:
+                delay = self.backoff
+            logger.error("Collector process exited with %s, restarting in %.0fs", returncode, delay)
+            if self._stopped.wait(delay):
+                return
+            delay = min(delay * 2, self.max_backoff)
+            self.restarts += 1
+
+    def stop(self) -> None:
+        with self._lock:
+            self._stopped.set()
+            process = self._process
+        if process is not None and process.poll() is None:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def post_worker_init(worker) -> None:
+    """gunicorn hook: make the worker follow the collector process' snapshot."""
+    history_store.read_only = True
+    collector.add_listener(record_history)  # Keeps /api/history current in this worker
+    follower = SnapshotFollower(collector, SnapshotReader(SHARED_SNAPSHOT_PATH))
+    # After a restart the file (on tmpfs) still holds the previous run's snapshot, which is served
+    # until the new collector publishes; only a first start after boot serves an empty list briefly
+    if not follower.poll():
+        logger.warning("No shared snapshot yet, serving an empty list until the collector publishes")
+    follower.start()
+    SharedMetrics(SHARED_METRICS_DIR).start()  # /metrics covers the collector process and all workers
+
+
+def run_server(options: dict) -> None:
+    """Run the app under gunicorn. gunicorn is imported here, so the collector process never loads it."""
+    from gunicorn.app.base import BaseApplication
+
+    class ProductionServer(BaseApplication):
+        def load_config(self) -> None:
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from src.app import app, assets
+
+            assets.load()  # Once in the master, so forked workers do not each read and compress them
+            return app
+
+    ProductionServer().run()
+
+
+def server_options(workers: int, threads: int, port: int) -> dict:
+    return {
+        "bind": f"0.0.0.0:{port}",
+        "workers": workers,
+        # Threaded workers, so open /api/stream connections do not block a whole worker
+        "worker_class": "gthread",
+        "threads": threads,
+        "post_worker_init": post_worker_init,
+        # Import the app once in the master; workers are forked with it loaded instead of each
+        # importing Flask and every module themselves
+        "preload_app": True,
+    }
+
+
+def serve_cli(
+    workers: int = typer.Option(SERVE_WORKERS, help="gunicorn worker processes"),
+    threads: int = typer.Option(SERVE_THREADS, help="Threads per worker"),
+    port: int = typer.Option(FLASK_PORT, help="HTTP port"),
+    collector_only: bool = typer.Option(False, "--collector-only", help="Only run the collector process"),
+) -> None:
+    """Run the dashboard under gunicorn with a single collector process."""
+    if collector_only:
+        run_collector()
+        return
+    if threads <= STREAM_MAX_CLIENTS:
+        logger.warning(
+            "%d threads per worker can all be held by open streams (stream_max_clients = %d)",
+            threads,
+            STREAM_MAX_CLIENTS,
+        )
+    SharedMetrics.reset(SHARED_METRICS_DIR)
+    # A separate process rather than threads in the gunicorn master, which forks the workers
+    supervisor = CollectorSupervisor()
+    supervisor.start()
+    try:
+        run_server(server_options(workers, threads, port))
+    finally:
+        supervisor.stop()
+
+
+def main():
+    typer.run(serve_cli)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,33 +1,129 @@
 import logging
 import platform
 import re
-import subprocess
-from dataclasses import dataclass
-
-import requests
-
-try:
-    from src.values import GITHUB_TOKEN
-except ImportError:
-    GITHUB_TOKEN = None
+import time
+from dataclasses import dataclass, field, replace
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+_BYTE_UNITS = {"B": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+_DURATION_UNITS = {
+    "us": 1e-6,
+    "ms": 1e-3,
+    "s": 1,
+    "sec": 1,
+    "min": 60,
+    "h": 3600,
+    "d": 86400,
+    "day": 86400,
+    "days": 86400,
+    "w": 604800,
+    "week": 604800,
+    "weeks": 604800,
+    "month": 2629800,
+    "months": 2629800,
+    "y": 31557600,
+    "year": 31557600,
+    "years": 31557600,
+}
+
+SERVICE_STATES = ("active", "failed", "inactive", "unknown")
+
+# Properties requested from `systemctl show` for every unit in one batched call
+SHOW_PROPERTIES = [
+    "Id",
+    "LoadState",
+    "ActiveState",
+    "SubState",
+    "Result",
+    "ExecMainStatus",
+    "MemoryCurrent",
+    "CPUUsageNSec",
+    "ActiveEnterTimestamp",
+    "ActiveEnterTimestampMonotonic",
+    "UnitFileState",
+]
+# systemd reports unavailable uint64 counters as UINT64_MAX
+_UNSET_UINT64 = str(2**64 - 1)
+
 
-@dataclass
+@dataclass(slots=True)
 class ServiceStatus:
+    """Compact status summary used for lists and alerts.
+
+    Logs are intentionally not part of this record; fetch them on demand with `src.engine.get_info_for_service`.
+    """
+
     name: str
     is_active: bool
     is_failed: bool
-    uptime: str | None
+    # Uptime as of the collection; not compared, since it grows on every collection. Current values
+    # come from `with_current_uptime`, based on `active_since`
+    uptime: str | None = field(compare=False)
     memory: str | None
     cpu: str | None
     last_error: str | None
-    full_status: str
     project_group: str
     suffix: str | None
     ci_status: str | None
+    memory_bytes: int | None = None
+    cpu_nsec: int | None = None
+    uptime_seconds: float | None = field(default=None, compare=False)
+    # Unix time (whole seconds) at which the unit became active
+    active_since: float | None = None
+    # Set when the status could not be collected (e.g. systemctl timed out); other fields are stale or empty
+    collection_error: str | None = None
+    # Node the unit runs on when aggregating several Pis (src/nodes.py); None for local units
+    node: str | None = None
+    # "enabled", "disabled", "static", ... (`systemctl is-enabled`); None when unknown
+    unit_file_state: str | None = None
+    # "loaded", "not-found", "masked", ... (LoadState); None when unknown
+    load_state: str | None = None
+
+    def __post_init__(self):
+        # Normalize display strings once when numbers weren't given (e.g. canned data, systemctl status text)
+        if self.memory_bytes is None and self.memory:
+            self.memory_bytes = parse_bytes(self.memory)
+        if self.cpu_nsec is None and self.cpu:
+            seconds = parse_duration_seconds(self.cpu)
+            self.cpu_nsec = round(seconds * 1e9) if seconds is not None else None
+        if self.uptime_seconds is None and self.uptime:
+            self.uptime_seconds = parse_duration_seconds(self.uptime)
+        if self.active_since is None and self.uptime_seconds is not None:
+            self.active_since = float(round(time.time() - self.uptime_seconds))
+
+    @property
+    def unit(self) -> str:
+        """The systemd unit name on its own node (`name` without the `<node>/` prefix)."""
+        return self.name.removeprefix(f"{self.node}/") if self.node else self.name
+
+
+def service_state(status: ServiceStatus) -> str:
+    """One of SERVICE_STATES; "unknown" while the status could not be collected."""
+    if status.collection_error:
+        return "unknown"
+    if status.is_failed:
+        return "failed"
+    return "active" if status.is_active else "inactive"
+
+
+def is_retired(status: ServiceStatus) -> bool:
+    """A stopped unit that is not meant to run: disabled, or not loaded (removed or masked since discovery).
+
+    Discovery lists every unit file, enabled or not; retired units are left out of the snapshot.
+    """
+    if status.is_active or status.is_failed or status.collection_error:
+        return False
+    return status.unit_file_state == "disabled" or status.load_state in ("not-found", "masked")
+
+
+def with_current_uptime(status: ServiceStatus, now: float | None = None) -> ServiceStatus:
+    """`status` with its uptime measured up to `now`, for rendering and serializing."""
+    if status.active_since is None:
+        return status
+    uptime_seconds = max((time.time() if now is None else now) - status.active_since, 0)
+    return replace(status, uptime=format_uptime(uptime_seconds), uptime_seconds=uptime_seconds)
 
 
 def parse_service_name(service_name: str) -> tuple[str, str | None]:
@@ -53,47 +149,10 @@ def get_github_repo_name(project_group: str) -> str:
     return project_group
 
 
-def get_ci_status(repo_name: str) -> str:
-    """Get CI status from GitHub Actions API."""
-    url = f"https://api.github.com/repos/momonala/{repo_name}/actions/workflows/ci.yml/runs?per_page=1"
-    headers = {}
-    if GITHUB_TOKEN:
-        headers["Authorization"] = f"token {GITHUB_TOKEN}"
-    try:
-        response = requests.get(url, headers=headers, timeout=5)
-        response.raise_for_status()
-        data = response.json()
-        if not data.get("workflow_runs"):
-            logger.warning("No workflow runs found for %s", repo_name)
-            return "error"
-        latest_run = data["workflow_runs"][0]
-        conclusion = latest_run.get("conclusion")
-        if conclusion == "success":
-            return "success"
-        elif conclusion == "failure":
-            return "failure"
-        else:
-            return "error"
-    except requests.RequestException as exc:
-        logger.error("Failed to fetch CI status for %s: %s", repo_name, exc)
-        return "error"
-    except KeyError as exc:
-        logger.error("Unexpected API response format for %s: %s", repo_name, exc)
-        return "error"
-
-
 def is_linux():
     return platform.system() == "Linux"
 
 
-def get_services():
-    out = subprocess.check_output(
-        ["systemctl", "list-units", "--type=service", "--no-legend", "--plain", "projects_*"],
-        text=True,
-    )
-    return [line.strip().split()[0] for line in out.strip().splitlines()]
-
-
 def parse_uptime(status_text):
     match = re.search(r"Active: active \(running\) since .*?; (.*?) ago", status_text)
     return match.group(1) if match else None
@@ -114,39 +173,134 @@ def parse_last_error(status_text):
     return match.group(1).strip() if match else None
 
 
-def get_info_for_service(service: str) -> str:
-    result = subprocess.run(
-        ["systemctl", "status", service, "--no-pager", "--lines=1000"],
-        text=True,
-        capture_output=True,
-    )
-    if result.returncode != 0:
-        logger.warning("systemctl status failed for %s: %s", service, result.stderr.strip())
-        return result.stdout + "\n" + result.stderr
-    return result.stdout
+def parse_bytes(text: str) -> int | None:
+    """Parse a systemd size like '123.4M' into bytes."""
+    match = re.match(r"\s*(\d+(?:\.\d+)?)([BKMGT])", text)
+    if not match:
+        return None
+    return round(float(match.group(1)) * _BYTE_UNITS[match.group(2)])
+
+
+def parse_duration_seconds(text: str) -> float | None:
+    """Parse a systemd timespan like '1h 23min 45.678s' or '2 days' into seconds."""
+    parts = re.findall(r"(\d+(?:\.\d+)?)\s*([a-z]+)", text)
+    if not parts or any(unit not in _DURATION_UNITS for _, unit in parts):
+        return None
+    return sum(float(value) * _DURATION_UNITS[unit] for value, unit in parts)
+
+
+def parse_systemctl_show(output: str) -> list[dict[str, str]]:
+    """Split `systemctl show` output into one property dict per unit.
+
+    Units are separated by blank lines, each line is a `Key=Value` pair.
+    """
+    units = []
+    for block in output.strip().split("\n\n"):
+        properties = {}
+        for line in block.splitlines():
+            key, sep, value = line.partition("=")
+            if sep:
+                properties[key] = value
+        if properties:
+            units.append(properties)
+    return units
+
+
+def _parse_uint64(value: str | None) -> int | None:
+    if not value or value == _UNSET_UINT64 or not value.isdigit():
+        return None
+    return int(value)
+
+
+def format_bytes(num_bytes: int) -> str:
+    """Format a byte count the way `systemctl status` does, e.g. 129394278 -> '123.4M'."""
+    value = float(num_bytes)
+    for unit in ["B", "K", "M", "G", "T"]:
+        if value < 1024 or unit == "T":
+            return f"{int(value)}B" if unit == "B" else f"{value:.1f}{unit}"
+        value /= 1024
+    return f"{value:.1f}T"  # pragma: no cover
+
+
+def format_cpu_time(nsec: int) -> str:
+    """Format CPU time the way `systemctl status` does, e.g. 472884000000 -> '7min 52.884s'."""
+    msec = nsec // 1_000_000
+    if msec < 1000:
+        return f"{msec}ms"
+    hours, msec = divmod(msec, 3_600_000)
+    minutes, msec = divmod(msec, 60_000)
+    seconds, msec = divmod(msec, 1000)
+    parts = []
+    if hours:
+        parts.append(f"{hours}h")
+    if minutes:
+        parts.append(f"{minutes}min")
+    if seconds or msec:
+        parts.append(f"{seconds}.{msec:03d}s" if msec else f"{seconds}s")
+    return " ".join(parts)
+
+
+def format_uptime(seconds: float) -> str:
+    """Format an elapsed time the way `systemctl status` does in 'since ...; X ago'."""
+    seconds = int(seconds)
+    minutes, hours, days = seconds // 60, seconds // 3600, seconds // 86400
+    if days >= 2:
+        return f"{days} days"
+    if hours >= 25:
+        return f"1 day {hours - 24}h"
+    if hours >= 6:
+        return f"{hours}h"
+    if hours >= 1:
+        return f"{hours}h {minutes % 60}min"
+    if minutes >= 5:
+        return f"{minutes}min"
+    if minutes >= 1:
+        return f"{minutes}min {seconds % 60}s"
+    return f"{seconds}s"
+
+
+def status_from_properties(
+    properties: dict[str, str], now_monotonic: float | None = None, now: float | None = None
+) -> ServiceStatus:
+    """Build a ServiceStatus from the properties of one unit in `systemctl show` output."""
+    name = properties["Id"]
+    project_group, suffix = parse_service_name(name)
+    is_active = properties.get("ActiveState") == "active" and properties.get("SubState") == "running"
+    is_failed = properties.get("ActiveState") == "failed"
 
+    uptime_seconds = active_since = None
+    active_enter = _parse_uint64(properties.get("ActiveEnterTimestampMonotonic"))
+    if is_active and active_enter:
+        now_monotonic = time.monotonic() if now_monotonic is None else now_monotonic
+        uptime_seconds = max(now_monotonic - active_enter / 1_000_000, 0)
+        # Rounded so that collections of an unchanged unit compare equal despite clock jitter
+        active_since = float(round((time.time() if now is None else now) - uptime_seconds))
 
-def get_service_status(service):
-    status_text = get_info_for_service(service)
-    project_group, suffix = parse_service_name(service)
-    is_active = "active (running)" in status_text.lower()
+    memory_bytes = _parse_uint64(properties.get("MemoryCurrent"))
+    cpu_nsec = _parse_uint64(properties.get("CPUUsageNSec"))
 
-    # Only fetch CI status for services without suffixes
-    ci_status = None
-    if suffix is None:
-        repo_name = get_github_repo_name(project_group)
-        ci_status = get_ci_status(repo_name)
+    last_error = None
+    result = properties.get("Result", "success")
+    if result != "success":
+        last_error = f"Failed with result '{result}'"
+        if properties.get("ExecMainStatus", "0") != "0":
+            last_error += f" (status={properties['ExecMainStatus']})"
 
     return ServiceStatus(
-        name=service,
+        name=name,
         is_active=is_active,
-        is_failed="failed (result: exit-code)" in status_text.lower(),
-        uptime=parse_uptime(status_text) if is_active else None,
-        memory=parse_memory(status_text),
-        cpu=parse_cpu(status_text),
-        last_error=parse_last_error(status_text),
-        full_status=status_text,
+        is_failed=is_failed,
+        uptime=format_uptime(uptime_seconds) if uptime_seconds is not None else None,
+        memory=format_bytes(memory_bytes) if memory_bytes is not None else None,
+        cpu=format_cpu_time(cpu_nsec) if cpu_nsec is not None else None,
+        last_error=last_error,
         project_group=project_group,
         suffix=suffix,
-        ci_status=ci_status,
+        ci_status=None,
+        memory_bytes=memory_bytes,
+        cpu_nsec=cpu_nsec,
+        uptime_seconds=uptime_seconds,
+        active_since=active_since,
+        unit_file_state=properties.get("UnitFileState") or None,
+        load_state=properties.get("LoadState") or None,
     )
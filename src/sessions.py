@@ -0,0 +1,41 @@
+"""HTTP sessions created on first use.
+
+Importing `requests` is one of the slowest imports at startup, and processes like the gunicorn
+workers never make an outgoing request. Modules keep a `LazySession` instead of a session and
+import `requests` only where they handle its exceptions, after the session exists.
+"""
+
+import threading
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import requests
+
+
+class LazySession:
+    """A `requests.Session` with one pooled adapter, created by the first `get()`."""
+
+    def __init__(self, pool_connections: int = 1, pool_maxsize: int = 1):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self._session: requests.Session | None = None
+        self._lock = threading.Lock()
+
+    def get(self) -> "requests.Session":
+        with self._lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._session = session
+            return self._session
+
+    def close(self) -> None:
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
@@ -0,0 +1,196 @@
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from dataclasses import asdict
+from pathlib import Path
+
+from src.collector import Snapshot, StatusCollector
+from src.services import ServiceStatus
+
+logger = logging.getLogger(__name__)
+
+# sequence (odd while a write is in progress), payload length, payload CRC32
+HEADER = struct.Struct("<QII")
+INITIAL_SIZE = 1024 * 1024  # Grown in place when a snapshot does not fit
+POLL_SECONDS = 0.25
+
+
+def encode_snapshot(snapshot: Snapshot, epoch: str) -> bytes:
+    return json.dumps(
+        {
+            "epoch": epoch,
+            "version": snapshot.version,
+            "collected_at": snapshot.collected_at,
+            "service_versions": snapshot.service_versions,
+            "changed_at": snapshot.changed_at,
+            "services": [asdict(status) for status in snapshot.services],
+        },
+        separators=(",", ":"),
+    ).encode()
+
+
+def decode_snapshot(payload: bytes) -> tuple[Snapshot, str]:
+    data = json.loads(payload)
+    snapshot = Snapshot(
+        version=data["version"],
+        services=tuple(ServiceStatus(**status) for status in data["services"]),
+        collected_at=data["collected_at"],
+        service_versions=data["service_versions"],
+        changed_at=data["changed_at"],
+    )
+    return snapshot, data["epoch"]
+
+
+class SnapshotWriter:
+    """Publishes snapshots into a memory-mapped file for other processes to read.
+
+    There is a single writer. The header's sequence number is odd while a write is in progress;
+    readers also check the payload CRC, since another core may see the header before the payload.
+    """
+
+    def __init__(self, path: Path | str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        # Never shrink the file: readers may still map the old size
+        size = max(os.fstat(self._fd).st_size, INITIAL_SIZE)
+        os.ftruncate(self._fd, size)
+        self._map = mmap.mmap(self._fd, size)
+        # Start from the clock so readers of a previous writer's file always see a new sequence
+        self._sequence = time.time_ns() // 2 * 2
+
+    def write(self, snapshot: Snapshot, epoch: str) -> None:
+        payload = encode_snapshot(snapshot, epoch)
+        end = HEADER.size + len(payload)
+        if end > len(self._map):
+            self._map.close()
+            os.ftruncate(self._fd, end * 2)
+            self._map = mmap.mmap(self._fd, end * 2)
+        HEADER.pack_into(self._map, 0, self._sequence + 1, 0, 0)
+        self._map[HEADER.size : end] = payload
+        self._sequence += 2
+        HEADER.pack_into(self._map, 0, self._sequence, len(payload), zlib.crc32(payload))
+
+    def close(self) -> None:
+        self._map.close()
+        os.close(self._fd)
+
+
+class SnapshotReader:
+    """Reads the snapshots published by a `SnapshotWriter`, decoding each one only once."""
+
+    def __init__(self, path: Path | str):
+        self.path = Path(path)
+        self._map: mmap.mmap | None = None
+        self._sequence: int | None = None
+
+    def _open(self) -> bool:
+        try:
+            fd = os.open(self.path, os.O_RDONLY)
+        except FileNotFoundError:
+            return False
+        try:
+            if os.fstat(fd).st_size < HEADER.size:
+                return False
+            if self._map is not None:
+                self._map.close()
+            self._map = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+        finally:
+            os.close(fd)
+        return True
+
+    def read(self) -> tuple[Snapshot, str] | None:
+        """The latest snapshot and its epoch, or None if nothing new was (completely) written."""
+        if self._map is None and not self._open():
+            return None
+        sequence, length, crc = HEADER.unpack_from(self._map, 0)
+        if sequence == self._sequence or sequence % 2 or not length:
+            return None
+        if HEADER.size + length > len(self._map) and not self._open():  # The writer grew the file
+            return None
+        payload = self._map[HEADER.size : HEADER.size + length]
+        if zlib.crc32(payload) != crc or HEADER.unpack_from(self._map, 0)[0] != sequence:
+            return None  # Torn read, retried on the next poll
+        self._sequence = sequence
+        return decode_snapshot(payload)
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+
+class SnapshotPublisher:
+    """Collector process: writes every new snapshot (including refreshed `collected_at`) to the file."""
+
+    def __init__(
+        self, collector: StatusCollector, writer: SnapshotWriter, poll_interval: float = POLL_SECONDS
+    ):
+        self._collector = collector
+        self._writer = writer
+        self.poll_interval = poll_interval
+        self._written: Snapshot | None = None
+
+    def poll(self) -> bool:
+        snapshot = self._collector.latest
+        if snapshot.collected_at is None or snapshot is self._written:
+            return False
+        self._writer.write(snapshot, self._collector.epoch)
+        self._written = snapshot
+        return True
+
+    def run(self) -> None:
+        """Publish until the process exits."""
+        logger.info("Publishing snapshots to %s", self._writer.path)
+        while True:
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("Failed to publish the snapshot")
+            time.sleep(self.poll_interval)
+
+
+class SnapshotFollower:
+    """Web worker: adopts the snapshots published by the collector process into a local collector."""
+
+    def __init__(
+        self, collector: StatusCollector, reader: SnapshotReader, poll_interval: float = POLL_SECONDS
+    ):
+        self._collector = collector
+        self._reader = reader
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        collector.follower = True
+
+    def poll(self) -> bool:
+        result = self._reader.read()
+        if result is None:
+            return False
+        self._collector.adopt(*result)
+        return True
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("Failed to read the shared snapshot")
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="snapshot-follower", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
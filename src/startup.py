@@ -0,0 +1,104 @@
+"""Startup profile for `app --profile-startup`: where a cold start spends its time.
+
+Phases are timed from the start of the process, so the imports before `main()` are included.
+The import breakdown comes from `python -X importtime` in a fresh interpreter, since this process
+has already imported everything by the time it parses its options.
+"""
+
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).parent.parent
+TOP_IMPORTS = 15
+IMPORT_PREFIX = "import time:"
+
+
+def process_age() -> float | None:
+    """Seconds since this process started, or None where /proc is not available."""
+    try:
+        stat = Path("/proc/self/stat").read_text()
+        uptime = float(Path("/proc/uptime").read_text().split()[0])
+    except (OSError, ValueError):
+        return None
+    # Field 22 is the start time in clock ticks after boot; fields are counted after the
+    # parenthesised command name, which may contain spaces
+    start_ticks = int(stat.rpartition(")")[2].split()[19])
+    return max(0.0, uptime - start_ticks / os.sysconf("SC_CLK_TCK"))
+
+
+class StartupProfile:
+    """Elapsed time at each startup phase, from the start of the process."""
+
+    def __init__(self, clock=time.perf_counter, age: float | None = None):
+        age = process_age() if age is None else age
+        self._clock = clock
+        self._origin = clock() - (age or 0.0)
+        self.phases: list[tuple[str, float]] = []
+        if age is not None:
+            self.phases.append(("imports", age))
+
+    def mark(self, phase: str) -> None:
+        self.phases.append((phase, self._clock() - self._origin))
+
+    def report(self) -> str:
+        lines = ["Startup phases (ms since process start):"]
+        previous = 0.0
+        for phase, elapsed in self.phases:
+            lines.append(f"  {phase:<20} {elapsed * 1000:8.1f}  (+{(elapsed - previous) * 1000:.1f})")
+            previous = elapsed
+        return "\n".join(lines)
+
+
+def parse_import_times(output: str, module: str) -> tuple[float, list[tuple[str, float]]]:
+    """From `-X importtime` output: (total ms of `module`, [(direct import, cumulative ms)])."""
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith(IMPORT_PREFIX):
+            continue
+        _, cumulative, name = line[len(IMPORT_PREFIX) :].split("|")
+        if not cumulative.strip().isdigit():
+            continue  # The header line
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((depth, name.strip(), int(cumulative) / 1000))
+    total = next((ms for depth, name, ms in entries if depth == 0 and name == module), 0.0)
+    imports = sorted(((name, ms) for depth, name, ms in entries if depth == 1), key=lambda item: -item[1])
+    return total, imports
+
+
+def import_report(module: str, top: int = TOP_IMPORTS) -> str:
+    """The slowest direct imports of `module`, measured in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=False,  # A failing import is reported by the timings it did produce
+        cwd=PROJECT_ROOT,
+        timeout=120,
+    )
+    total, imports = parse_import_times(result.stderr, module)
+    lines = [f"import {module}: {total:.1f} ms in a fresh interpreter; slowest direct imports:"]
+    lines += [f"  {name:<32} {ms:8.1f}" for name, ms in imports[:top]]
+    return "\n".join(lines)
+
+
+def report_when_ready(profile: StartupProfile, wait_ready: Callable[[], object], module: str) -> None:
+    """Log the profile once `wait_ready` returns (the first snapshot), then the import breakdown."""
+
+    def run():
+        wait_ready()
+        profile.mark("first snapshot")
+        logger.info("%s", profile.report())
+        try:
+            logger.info("%s", import_report(module))
+        except (OSError, subprocess.SubprocessError) as exc:
+            logger.warning("Could not measure import times: %s", exc)
+
+    threading.Thread(target=run, name="startup-profile", daemon=True).start()
@@ -1,46 +1,279 @@
 import logging
+import queue
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
 
-import requests
+from src.engine import get_info_for_service
+from src.metrics import CallbackGauge, Counter, Histogram
+from src.services import ServiceStatus, with_current_uptime
+from src.sessions import LazySession
 
-from src.services import ServiceStatus
-from src.values import telegram_api_token, telegram_chat_id
+try:
+    from src.values import telegram_api_token, telegram_chat_id
+except ImportError:  # Alerts are logged and dropped until src/values.py is set up
+    telegram_api_token = telegram_chat_id = None
 
-MAX_STATUS_LENGTH = 4096 - 500  # Telegram limit is 4096, leave room for message template
+if TYPE_CHECKING:
+    import requests
 
+logger = logging.getLogger(__name__)
 
-def report_error_to_telegram(service_status: ServiceStatus) -> None:
-    """Send an error message to a Telegram chat."""
+TELEGRAM_API_URL = "https://api.telegram.org"
+MAX_MESSAGE_LENGTH = 4096
+ALERT_LOG_LINES = 50  # Only the tail of the journal fits in a message anyway
+MIN_STATUS_LENGTH = 300  # Status output shorter than this is left out rather than attached
+QUEUE_SIZE = 100
+REQUEST_TIMEOUT_SECONDS = 10
+MAX_RETRIES = 5
+BACKOFF_SECONDS = 2.0  # Doubled after every failed attempt
+BATCH_WINDOW_SECONDS = 2.0  # Messages queued this close together are sent as one digest
+TELEGRAM_REQUESTS = Counter(
+    "service_monitor_telegram_requests_total", "Telegram API requests by HTTP status", ("status",)
+)
+TELEGRAM_REQUEST_DURATION = Histogram(
+    "service_monitor_telegram_request_duration_seconds", "Telegram API request duration"
+)
+TELEGRAM_DROPPED = Counter(
+    "service_monitor_telegram_dropped_total", "Alerts dropped because the queue was full"
+)
+
+DIGEST_SEPARATOR = "\n\n———\n\n"
+STATUS_BLOCK = "\n\n*Full Status:*\n```\n{}\n```"
+TRUNCATED = "(truncated)...\n"
+
+
+@dataclass(slots=True)
+class Alert:
+    """A queued alert; the `systemctl status` of `status_of` is attached when it is sent."""
+
+    text: str
+    status_of: str | None = None
 
-    # Truncate full_status if too long - keep the END since errors are usually there
-    full_status = service_status.full_status or "N/A"
-    if len(full_status) > MAX_STATUS_LENGTH:
-        full_status = "(truncated)...\n" + full_status[-MAX_STATUS_LENGTH:]
 
+def report_error_to_telegram(service_status: ServiceStatus) -> None:
+    """Send an error message to a Telegram chat.
+
+    Returns immediately: the unit's status output is fetched by the dispatcher once the alerts of
+    a check are batched, and the space left in the digest is shared among them. Units of other
+    nodes get no status output, since systemctl here cannot see them.
+    """
+    service_status = with_current_uptime(service_status)
     message = f"""*Service:* `{_escape_markdown(service_status.name)}`
 *Last Error:* `{_escape_markdown(service_status.last_error or 'N/A')}`
 *Is Active:* `{service_status.is_active}`
 *Is Failed:* `{service_status.is_failed}`
 *Uptime:* `{_escape_markdown(service_status.uptime or 'N/A')}`
 *Memory:* `{_escape_markdown(service_status.memory or 'N/A')}`
-*CPU:* `{_escape_markdown(service_status.cpu or 'N/A')}`
+*CPU:* `{_escape_markdown(service_status.cpu or 'N/A')}`"""
+    if service_status.collection_error:
+        message += f"\n*Collection Error:* `{_escape_markdown(service_status.collection_error)}`"
+    dispatcher.submit(message, status_of=None if service_status.node else service_status.name)
+
+
+def report_threshold_to_telegram(service_status: ServiceStatus, rule: str, value: str) -> None:
+    """Send a threshold alert (e.g. memory above 1.0G for 600s) to a Telegram chat."""
+    service_status = with_current_uptime(service_status)
+    message = f"""*Service:* `{_escape_markdown(service_status.name)}`
+*Threshold:* `{_escape_markdown(rule)}`
+*Value:* `{_escape_markdown(value)}`
+*Uptime:* `{_escape_markdown(service_status.uptime or 'N/A')}`
+*Memory:* `{_escape_markdown(service_status.memory or 'N/A')}`
+*CPU:* `{_escape_markdown(service_status.cpu or 'N/A')}`"""
+    send_telegram_message(message)
+
+
+def send_telegram_message(message: str) -> None:
+    """Queue a Markdown message for the configured Telegram chat. Never blocks the caller."""
+    dispatcher.submit(message)
+
+
+class TelegramDispatcher:
+    """Delivers Telegram messages from a bounded queue on a background worker.
+
+    Messages submitted within `batch_window` seconds of each other (e.g. every failure found in one
+    health check) are coalesced into digests of at most one Telegram message each. Status output
+    is fetched with `fetch_status` only then, and cut to share the room left in the digest. Every request
+    has a timeout; network errors and 5xx responses are retried with exponential backoff, and a 429
+    waits for the `retry_after` Telegram asks for. If the queue is full, new messages are dropped.
+    """
+
+    def __init__(
+        self,
+        token: str | None,
+        chat_id: str | None,
+        base_url: str = TELEGRAM_API_URL,
+        queue_size: int = QUEUE_SIZE,
+        timeout: float = REQUEST_TIMEOUT_SECONDS,
+        max_retries: int = MAX_RETRIES,
+        backoff: float = BACKOFF_SECONDS,
+        batch_window: float = BATCH_WINDOW_SECONDS,
+        fetch_status: Callable[[str], str] | None = None,
+    ):
+        self.configured = bool(token and chat_id)
+        self._url = f"{base_url}/bot{token}/sendMessage"
+        self._chat_id = chat_id
+        self._queue: queue.Queue[Alert] = queue.Queue(maxsize=queue_size)
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.batch_window = batch_window
+        self._fetch_status = fetch_status or _fetch_status
+        self._session = LazySession()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def submit(self, message: str, status_of: str | None = None) -> bool:
+        """Queue a message, starting the worker on first use. Returns False if it was dropped.
 
-*Full Status:*
-```
-{full_status}
-```"""
+        With `status_of`, the unit's `systemctl status` output is attached when the message is sent.
+        """
+        if not self.configured:
+            logger.error("Telegram is not configured (see src/values.py.example), dropping message")
+            return False
+        self.start()
+        try:
+            self._queue.put_nowait(Alert(message, status_of))
+        except queue.Full:
+            TELEGRAM_DROPPED.inc()
+            logger.error("Telegram queue full, dropping message")
+            return False
+        return True
 
-    url = f"https://api.telegram.org/bot{telegram_api_token}/sendMessage"
-    payload = {
-        "chat_id": telegram_chat_id,
-        "text": message,
-        "parse_mode": "Markdown",
-    }
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
 
+    def start(self) -> None:
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="telegram-dispatcher", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the worker, abandoning any retry in progress."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def flush(self, timeout: float) -> bool:
+        """Wait until every queued message was delivered or given up on. False on timeout."""
+        deadline = time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                batch = [self._queue.get(timeout=0.2)]
+            except queue.Empty:
+                continue
+            deadline = time.monotonic() + self.batch_window
+            while (remaining := deadline - time.monotonic()) > 0:
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                for text in _digests(batch, self._fetch_status):
+                    self._deliver(text)
+            except Exception:
+                logger.exception("Telegram delivery failed")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _deliver(self, text: str) -> bool:
+        import requests
+
+        payload = {"chat_id": self._chat_id, "text": text, "parse_mode": "Markdown"}
+        for attempt in range(self.max_retries + 1):
+            delay = self.backoff * 2**attempt
+            try:
+                with TELEGRAM_REQUEST_DURATION.time():
+                    response = self._session.get().post(self._url, data=payload, timeout=self.timeout)
+                TELEGRAM_REQUESTS.inc(status=response.status_code)
+            except requests.RequestException as exc:
+                TELEGRAM_REQUESTS.inc(status="error")
+                logger.warning("Failed to send message to Telegram: %s", exc)
+            else:
+                if response.ok:
+                    return True
+                if response.status_code == 429:
+                    delay = _retry_after(response) or delay
+                    logger.warning("Telegram rate limit hit, retrying in %ss", delay)
+                elif response.status_code < 500:
+                    logger.error("Telegram rejected message: %s %s", response.status_code, response.text)
+                    return False
+                else:
+                    logger.warning("Telegram returned %s", response.status_code)
+            if attempt == self.max_retries or self._stop.wait(delay):
+                break
+        logger.error("Giving up on Telegram message after %d attempts", attempt + 1)
+        return False
+
+
+def _retry_after(response: "requests.Response") -> float | None:
     try:
-        response = requests.post(url, data=payload)
-        response.raise_for_status()
-    except requests.RequestException as exc:
-        logging.error("Failed to send message to Telegram: %s", exc)
+        return float(response.json()["parameters"]["retry_after"])
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def _fetch_status(service: str) -> str:
+    return get_info_for_service(service, lines=ALERT_LOG_LINES)
+
+
+def _digests(alerts: list[Alert], fetch_status: Callable[[str], str]) -> list[str]:
+    """Pack queued alerts into as few Telegram messages as the length limit allows."""
+    digests: list[list[Alert]] = []
+    for alert in alerts:
+        if digests and len(_join_digest([a.text for a in (*digests[-1], alert)])) <= MAX_MESSAGE_LENGTH:
+            digests[-1].append(alert)
+        else:
+            digests.append([alert])
+    return [_with_status(digest, fetch_status) for digest in digests]
+
+
+def _with_status(alerts: list[Alert], fetch_status: Callable[[str], str]) -> str:
+    """Join a digest, sharing the room left in the message among its alerts' status output.
+
+    Output is cut from the front, since the errors are usually at the end.
+    """
+    texts = [alert.text for alert in alerts]
+    wanted = [i for i, alert in enumerate(alerts) if alert.status_of]
+    if not wanted:
+        return _join_digest(texts)
+    room = (MAX_MESSAGE_LENGTH - len(_join_digest(texts))) // len(wanted) - len(STATUS_BLOCK.format(""))
+    if room < MIN_STATUS_LENGTH:
+        return _join_digest(texts)
+    for i in wanted:
+        try:
+            status = fetch_status(alerts[i].status_of) or "N/A"
+        except Exception:
+            logger.exception("Could not fetch the status of %s", alerts[i].status_of)
+            continue
+        if len(status) > room:
+            status = TRUNCATED + status[-(room - len(TRUNCATED)) :]
+        texts[i] += STATUS_BLOCK.format(status)
+    return _join_digest(texts)
+
+
+def _join_digest(messages: list[str]) -> str:
+    if len(messages) == 1:
+        return messages[0]
+    return f"*{len(messages)} alerts*" + "".join(DIGEST_SEPARATOR + message for message in messages)
 
 
 def _escape_markdown(text: str) -> str:
@@ -49,3 +282,11 @@ def _escape_markdown(text: str) -> str:
     for char in ["*", "`", "["]:
         text = text.replace(char, "\\" + char)
     return text
+
+
+dispatcher = TelegramDispatcher(telegram_api_token, telegram_chat_id)
+CallbackGauge(
+    "service_monitor_telegram_queue_depth",
+    "Alerts waiting to be sent",
+    lambda: [({}, dispatcher.queue_depth)],
+)
@@ -0,0 +1,154 @@
+import json
+import logging
+import queue
+import subprocess
+import threading
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass
+from typing import Protocol
+
+from src.collector import StatusCollector
+from src.discovery import is_monitored
+
+logger = logging.getLogger(__name__)
+
+FOLLOW_COMMAND = ["journalctl", "--follow", "--lines=0", "--output=json", "_PID=1"]
+# Restart delays of a journal follower that exited: doubled after every quick exit, up to the cap
+RESTART_BACKOFF_SECONDS = 1.0
+MAX_RESTART_BACKOFF_SECONDS = 60.0
+# A follower that ran this long before exiting is restarted with the initial delay again
+STABLE_SECONDS = 60.0
+
+
+@dataclass(slots=True)
+class UnitEvent:
+    """Something happened to a unit (started, stopped, failed, ...)."""
+
+    unit: str
+    message: str = ""
+
+
+class EventSource(Protocol):
+    """A stream of unit events. `events()` blocks until the next event and ends when closed."""
+
+    def events(self) -> Iterator[UnitEvent]: ...
+
+    def close(self) -> None: ...
+
+
+class JournalEventSource:
+    """Follows systemd's own (PID 1) journal messages, which are logged on every unit state change.
+
+    When `journalctl --follow` exits (e.g. journald restarted), it is started again after a delay
+    that doubles after every quick exit; changes in between are picked up by the regular collection.
+    """
+
+    def __init__(
+        self,
+        command: list[str] = FOLLOW_COMMAND,
+        backoff: float = RESTART_BACKOFF_SECONDS,
+        max_backoff: float = MAX_RESTART_BACKOFF_SECONDS,
+    ):
+        self.command = command
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.restarts = 0
+        self._process: subprocess.Popen | None = None
+        self._closed = threading.Event()
+        self._lock = threading.Lock()
+
+    def events(self) -> Iterator[UnitEvent]:
+        delay = self.backoff
+        while True:
+            with self._lock:
+                if self._closed.is_set():
+                    return
+                started = time.monotonic()
+                self._process = process = subprocess.Popen(
+                    self.command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+                )
+            yield from self._read(process)
+            returncode = process.wait()
+            if self._closed.is_set():
+                return
+            if time.monotonic() - started >= STABLE_SECONDS:
+                delay = self.backoff
+            logger.warning("journalctl --follow exited with code %s, restarting in %.0fs", returncode, delay)
+            if self._closed.wait(delay):
+                return
+            delay = min(delay * 2, self.max_backoff)
+            self.restarts += 1
+
+    @staticmethod
+    def _read(process: subprocess.Popen) -> Iterator[UnitEvent]:
+        for line in process.stdout:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            unit = entry.get("UNIT")
+            if unit and is_monitored(unit):
+                yield UnitEvent(unit=unit, message=entry.get("MESSAGE") or "")
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed.set()
+            if self._process and self._process.poll() is None:
+                self._process.terminate()
+
+
+class UnitWatcher:
+    """Pushes unit state changes into the collector as soon as they happen.
+
+    Events are debounced per batch (a restart logs Stopping/Stopped/Starting/Started), then only the
+    affected units are re-collected with `StatusCollector.refresh_units`. Snapshot listeners, such as
+    the Telegram alerting in the scheduler, see the transition within seconds instead of at the next poll.
+    """
+
+    def __init__(self, source: EventSource, collector: StatusCollector, debounce: float = 1.0):
+        self._source = source
+        self._collector = collector
+        self.debounce = debounce
+        self._pending: queue.Queue[str] = queue.Queue()
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    def start(self) -> None:
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._read, name="unit-watcher-reader", daemon=True),
+            threading.Thread(target=self._process, name="unit-watcher", daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        logger.info("Started unit watcher")
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._source.close()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    def _read(self) -> None:
+        try:
+            for event in self._source.events():
+                logger.debug("Unit event for %s: %s", event.unit, event.message)
+                self._pending.put(event.unit)
+        except Exception:
+            logger.exception("Unit event source failed, falling back to polling only")
+
+    def _process(self) -> None:
+        while not self._stop.is_set():
+            try:
+                units = {self._pending.get(timeout=0.2)}
+            except queue.Empty:
+                continue
+            deadline = time.monotonic() + self.debounce
+            while (remaining := deadline - time.monotonic()) > 0:
+                try:
+                    units.add(self._pending.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._collector.refresh_units(sorted(units))
@@ -0,0 +1,53 @@
+# Website links with icons (icon mapping centralized here, not in template)
+websites = [
+    {
+        "name": "task-manager",
+        "url": "https://task-manager.mnalavadi.org",
+        "description": "Task Manager",
+        "icon": "📝",
+    },
+    {
+        "name": "energyMonitor",
+        "url": "https://energy-monitor.mnalavadi.org",
+        "description": "Energy Monitor",
+        "icon": "⚡️",
+    },
+    {
+        "name": "USC-vis",
+        "url": "https://usc-vis.mnalavadi.org",
+        "description": "USC checkin visualizer",
+        "icon": "💪🏾",
+    },
+    {
+        "name": "trainspotter",
+        "url": "https://trainspotter.mnalavadi.org",
+        "description": "Spot when the next train comes!",
+        "icon": "🚃",
+    },
+    {
+        "name": "inspectordetector",
+        "url": "https://inspectordetector.mnalavadi.org",
+        "description": "Gute Schwarzfahrt!",
+        "icon": "🚨",
+    },
+    {
+        "name": "iOS Health Dump",
+        "url": "https://ios-health.mnalavadi.org",
+        "description": "Data from iOS Health app",
+        "icon": "⚕️",
+    },
+    {
+        "name": "pingpong",
+        "url": "https://pingpong.mnalavadi.org",
+        "description": "Shared Expense Tracker",
+        "icon": "🏓",
+    },
+    {"name": "Trace", "url": "https://trace.mnalavadi.org", "description": "GPS Tracker", "icon": "📍"},
+    {
+        "name": "What's On the Menu?",
+        "url": "https://whats-on-the-menu.mnalavadi.org",
+        "description": "AI Menu Translation",
+        "icon": "🍲",
+    },
+]
+websites.sort(key=lambda x: x["name"].lower())
@@ -26,6 +26,24 @@
         
         // Toast duration (ms)
         TOAST_DURATION: 3000,
+        
+        // Service logs: entries per page and live tail interval (ms)
+        LOG_PAGE_SIZE: 200,
+        LOG_TAIL_INTERVAL: 5000,
+        
+        // Memory sparklines in the sidebar: history window (s) and refresh interval (ms)
+        SPARKLINE_WINDOW: 86400,
+        SPARKLINE_REFRESH_INTERVAL: 300000,
+        
+        // Availability and incidents of the selected service: refresh interval (ms), incidents shown
+        AVAILABILITY_REFRESH_INTERVAL: 60000,
+        INCIDENT_LIMIT: 10,
+        
+        // Uptimes in the sidebar are recomputed from each unit's start time (ms)
+        UPTIME_REFRESH_INTERVAL: 60000,
+        
+        // Restart job status polling interval (ms)
+        JOB_POLL_INTERVAL: 1000,
     };
 
     const CSS_CLASSES = {
@@ -48,6 +66,11 @@
         serviceSearch: document.getElementById('serviceSearch'),
         toastContainer: document.getElementById('toastContainer'),
         statusAnnouncer: document.getElementById('statusAnnouncer'),
+        serviceLogs: document.getElementById('serviceLogs'),
+        serviceLogsOlder: document.getElementById('serviceLogsOlder'),
+        serviceLogEntries: document.getElementById('serviceLogEntries'),
+        serviceAvailability: document.getElementById('serviceAvailability'),
+        serviceAvailabilityText: document.getElementById('serviceAvailabilityText'),
     };
 
     // ============================================
@@ -56,6 +79,12 @@
     const state = {
         isSidebarCollapsed: loadSidebarState(),
         isMobileSidebarOpen: false,
+        // Snapshot the sidebar was rendered from (see /api/services)
+        snapshotVersion: document.querySelector('.sidebar__nav')?.dataset.snapshotVersion || '0',
+        snapshotEpoch: document.querySelector('.sidebar__nav')?.dataset.snapshotEpoch || '',
+        isStreaming: false,
+        // Memory history per service name: [[timestamp, bytes], ...]
+        sparklines: {},
     };
 
     // ============================================
@@ -303,34 +332,93 @@
     // ============================================
 
     /**
-     * Refresh service status without page reload
+     * Escape text for safe insertion into HTML
+     * @param {string} text
+     * @returns {string}
+     */
+    function escapeHtml(text) {
+        const div = document.createElement('div');
+        div.textContent = text;
+        return div.innerHTML;
+    }
+
+    /**
+     * Build a sidebar row for a service from its server-rendered `_service_item.html` markup
+     * @param {Object} svc - Service status from /api/services, with its row as `html`
+     * @returns {HTMLElement}
+     */
+    function createServiceItem(svc) {
+        const current = new URLSearchParams(window.location.search).get('service');
+        const template = document.createElement('template');
+        template.innerHTML = svc.html.trim();
+        const item = template.content.firstElementChild;
+        // Rows are rendered once for every client, so the selection is applied here
+        item.classList.toggle('service-item--active', svc.name === current);
+        item.style.setProperty('--project-color', getProjectColor(svc.project_group));
+        setSparkline(item, state.sparklines[svc.name]);
+        return item;
+    }
+
+    /**
+     * Patch the sidebar with changed services from /api/services
+     * @param {Object} data - JSON response from /api/services
+     */
+    function applySnapshot(data) {
+        const nav = document.querySelector('.sidebar__nav');
+        if (!nav) return;
+        
+        const rows = new Map();
+        nav.querySelectorAll('.service-item').forEach(item => rows.set(item.dataset.service, item));
+        
+        // Full response (first load or server restart): rebuild every row
+        if (data.since === null) {
+            rows.forEach(item => item.remove());
+            rows.clear();
+        }
+        
+        data.services.forEach(svc => {
+            const item = createServiceItem(svc);
+            rows.get(svc.name)?.replaceWith(item);
+            rows.set(svc.name, item);
+        });
+        
+        // Drop removed services and keep rows in snapshot order
+        const names = new Set(data.names);
+        rows.forEach((item, name) => { if (!names.has(name)) item.remove(); });
+        data.names.forEach(name => {
+            const item = rows.get(name);
+            if (item) nav.appendChild(item);
+        });
+        
+        const active = document.querySelector('[data-summary="active"]');
+        const failed = document.querySelector('[data-summary="failed"]');
+        if (active) active.textContent = `${data.summary.active} Active`;
+        if (failed) failed.textContent = `${data.summary.failed} Failed`;
+        
+        state.snapshotVersion = data.version;
+        state.snapshotEpoch = data.epoch;
+        // Cached rows carry the uptime of when they were rendered
+        refreshUptimes();
+    }
+
+    /**
+     * Refresh service status without page reload.
+     * Only services that changed since the last seen snapshot version are transferred;
+     * an unchanged snapshot is answered with an empty 304.
      */
     function refreshServiceStatus() {
-        fetch(window.location.href, { 
-            headers: { 'X-Requested-With': 'XMLHttpRequest' } 
+        const params = new URLSearchParams({ since: state.snapshotVersion, epoch: state.snapshotEpoch });
+        fetch(`/api/services?${params}`, {
+            headers: { 'If-None-Match': `"${state.snapshotEpoch}-${state.snapshotVersion}"` }
         })
         .then(res => {
+            if (res.status === 304) return null;
             if (!res.ok) throw new Error('Failed to refresh');
-            return res.text();
+            return res.json();
         })
-        .then(html => {
-            const parser = new DOMParser();
-            const doc = parser.parseFromString(html, 'text/html');
-            
-            // Update sidebar navigation
-            const newNav = doc.querySelector('.sidebar__nav');
-            const currentNav = document.querySelector('.sidebar__nav');
-            if (newNav && currentNav) {
-                currentNav.innerHTML = newNav.innerHTML;
-                applyProjectColors(); // Reapply colors after refresh
-            }
-            
-            // Update status summary
-            const newSummary = doc.querySelector('.status-summary');
-            const currentSummary = document.querySelector('.status-summary');
-            if (newSummary && currentSummary) {
-                currentSummary.innerHTML = newSummary.innerHTML;
-            }
+        .then(data => {
+            if (!data) return;
+            applySnapshot(data);
             
             // Reapply search filter if active
             const searchValue = elements.serviceSearch?.value;
@@ -344,13 +432,294 @@
     }
 
     /**
-     * Start auto-refresh if on dashboard
+     * Subscribe to live snapshot changes via Server-Sent Events.
+     * Events carry the same payload as /api/services?since=<previous version>; if the client
+     * is not exactly at that version (missed events, server restart) it falls back to a delta fetch.
+     */
+    function connectStatusStream() {
+        const source = new EventSource('/api/stream');
+        
+        source.addEventListener('open', () => { state.isStreaming = true; });
+        source.addEventListener('error', () => { state.isStreaming = false; });
+        source.addEventListener('resync', refreshServiceStatus);
+        source.addEventListener('snapshot', event => {
+            const data = JSON.parse(event.data);
+            if (data.epoch !== state.snapshotEpoch || String(data.since) !== String(state.snapshotVersion)) {
+                refreshServiceStatus();
+                return;
+            }
+            applySnapshot(data);
+            
+            const searchValue = elements.serviceSearch?.value;
+            if (searchValue) {
+                filterServices(searchValue);
+            }
+        });
+    }
+
+    /**
+     * Format an elapsed time like `format_uptime` in src/services.py
+     * @param {number} seconds
+     * @returns {string}
+     */
+    function formatUptime(seconds) {
+        seconds = Math.max(0, Math.floor(seconds));
+        const minutes = Math.floor(seconds / 60);
+        const hours = Math.floor(seconds / 3600);
+        const days = Math.floor(seconds / 86400);
+        if (days >= 2) return `${days} days`;
+        if (hours >= 25) return `1 day ${hours - 24}h`;
+        if (hours >= 6) return `${hours}h`;
+        if (hours >= 1) return `${hours}h ${minutes % 60}min`;
+        if (minutes >= 5) return `${minutes}min`;
+        if (minutes >= 1) return `${minutes}min ${seconds % 60}s`;
+        return `${seconds}s`;
+    }
+
+    /**
+     * Recompute sidebar uptimes, which the snapshot only changes when a unit restarts
+     */
+    function refreshUptimes() {
+        const now = Date.now() / 1000;
+        document.querySelectorAll('[data-active-since]').forEach(item => {
+            item.textContent = `⏱️ ${formatUptime(now - Number(item.dataset.activeSince))}`;
+        });
+    }
+
+    /**
+     * Start auto-refresh if on dashboard.
+     * Uses the live stream when available and only polls while it is disconnected.
      */
     function startAutoRefresh() {
         // Only auto-refresh on dashboard (no service query param)
         if (window.location.search.includes('service=')) return;
         
-        setInterval(refreshServiceStatus, CONFIG.AUTO_REFRESH_INTERVAL);
+        if (window.EventSource) {
+            connectStatusStream();
+        }
+        setInterval(() => {
+            if (!state.isStreaming) refreshServiceStatus();
+        }, CONFIG.AUTO_REFRESH_INTERVAL);
+    }
+
+    // ============================================
+    // Sparklines
+    // ============================================
+
+    /**
+     * Add or replace the memory sparkline of a sidebar row
+     * @param {HTMLElement} item - .service-item row
+     * @param {Array<[number, number]>|undefined} points
+     */
+    function setSparkline(item, points) {
+        item.querySelector('.service-sparkline')?.remove();
+        if (!points || points.length < 2) return;
+        
+        const values = points.map(([, value]) => value);
+        const min = Math.min(...values);
+        const range = (Math.max(...values) - min) || 1;
+        const coords = values.map((value, i) => {
+            const x = (i / (values.length - 1)) * 100;
+            const y = 18 - ((value - min) / range) * 16;
+            return `${x.toFixed(1)},${y.toFixed(1)}`;
+        });
+        
+        const svg = document.createElementNS('http://www.w3.org/2000/svg', 'svg');
+        svg.setAttribute('class', 'service-sparkline');
+        svg.setAttribute('viewBox', '0 0 100 20');
+        svg.setAttribute('preserveAspectRatio', 'none');
+        svg.setAttribute('aria-hidden', 'true');
+        svg.innerHTML = `<polyline points="${coords.join(' ')}" />`;
+        item.appendChild(svg);
+    }
+
+    /**
+     * Fetch memory history for all services and draw sparklines
+     */
+    function refreshSparklines() {
+        fetch(`/api/history?metric=memory&window=${CONFIG.SPARKLINE_WINDOW}`)
+            .then(res => {
+                if (!res.ok) throw new Error('Failed to load history');
+                return res.json();
+            })
+            .then(data => {
+                state.sparklines = data.series;
+                document.querySelectorAll('.service-item').forEach(item => {
+                    setSparkline(item, state.sparklines[item.dataset.service]);
+                });
+            })
+            .catch(err => console.error('⚠️ Sparkline refresh failed:', err));
+    }
+
+    /**
+     * Load sparklines and keep them fresh
+     */
+    function setupSparklines() {
+        if (!document.querySelector('.sidebar__nav')) return;
+        refreshSparklines();
+        setInterval(refreshSparklines, CONFIG.SPARKLINE_REFRESH_INTERVAL);
+    }
+
+    // ============================================
+    // Service Logs
+    // ============================================
+
+    /**
+     * Render journal entries as colored lines
+     * @param {Array<{timestamp: number, priority: number, message: string}>} entries
+     * @returns {DocumentFragment}
+     */
+    function renderLogEntries(entries) {
+        const fragment = document.createDocumentFragment();
+        entries.forEach(entry => {
+            const line = document.createElement('span');
+            if (entry.priority <= 3) line.className = 'error';
+            else if (entry.priority === 4) line.className = 'warning';
+            const time = new Date(entry.timestamp / 1000).toLocaleString();
+            line.textContent = `${time} ${entry.message}\n`;
+            fragment.appendChild(line);
+        });
+        return fragment;
+    }
+
+    /**
+     * Fetch a page of journal entries for the selected service
+     * @param {Object} params - Optional before/after cursor
+     * @returns {Promise<Object>} JournalPage JSON
+     */
+    function fetchLogPage(params = {}) {
+        const service = encodeURIComponent(elements.serviceLogs.dataset.service);
+        const query = new URLSearchParams({ limit: CONFIG.LOG_PAGE_SIZE, ...params });
+        return fetch(`/api/logs/${service}?${query}`).then(res => {
+            if (!res.ok) throw new Error('Failed to load logs');
+            return res.json();
+        });
+    }
+
+    /**
+     * Load the newest log page, then tail new entries and page in older ones on demand
+     */
+    function setupServiceLogs() {
+        if (!elements.serviceLogs || !elements.serviceLogEntries) return;
+        
+        const logs = { firstCursor: null, lastCursor: null };
+        const container = elements.serviceLogEntries;
+        
+        function appendEntries(page) {
+            if (!page.entries.length) return;
+            const atBottom = window.innerHeight + window.scrollY >= document.body.scrollHeight - 20;
+            container.appendChild(renderLogEntries(page.entries));
+            logs.lastCursor = page.last_cursor;
+            logs.firstCursor = logs.firstCursor || page.first_cursor;
+            if (atBottom) window.scrollTo(0, document.body.scrollHeight);
+        }
+        
+        function tail() {
+            const params = logs.lastCursor ? { after: logs.lastCursor } : {};
+            fetchLogPage(params)
+                .then(appendEntries)
+                .catch(err => console.error('⚠️ Log tail failed:', err));
+        }
+        
+        elements.serviceLogsOlder?.addEventListener('click', function() {
+            if (!logs.firstCursor) return;
+            this.disabled = true;
+            fetchLogPage({ before: logs.firstCursor })
+                .then(page => {
+                    if (!page.entries.length) {
+                        this.classList.add(CSS_CLASSES.HIDDEN);
+                        return;
+                    }
+                    container.insertBefore(renderLogEntries(page.entries), container.firstChild);
+                    logs.firstCursor = page.first_cursor;
+                })
+                .catch(err => showToast(err.message, 'error'))
+                .finally(() => { this.disabled = false; });
+        });
+        
+        tail();
+        setInterval(tail, CONFIG.LOG_TAIL_INTERVAL);
+    }
+
+    // ============================================
+    // Availability
+    // ============================================
+
+    /**
+     * Format seconds as a short duration like "2h 5m" or "42s"
+     * @param {number} seconds
+     * @returns {string}
+     */
+    function formatDuration(seconds) {
+        const parts = [[86400, 'd'], [3600, 'h'], [60, 'm']]
+            .filter(([size]) => seconds >= size)
+            .slice(0, 2)
+            .map(([size, unit], i, all) => {
+                const value = Math.floor(i === 0 ? seconds / size : (seconds % all[0][0]) / size);
+                return `${value}${unit}`;
+            });
+        return parts.length ? parts.join(' ') : `${Math.round(seconds)}s`;
+    }
+
+    /**
+     * Render uptime percentages and the incident timeline of the selected service
+     * @param {Object} availability - /api/availability JSON
+     * @param {Array<Object>} incidents - /api/incidents entries
+     * @returns {DocumentFragment}
+     */
+    function renderAvailability(availability, incidents) {
+        const fragment = document.createDocumentFragment();
+        const windows = availability.services[elements.serviceAvailability.dataset.service] || {};
+        const summary = availability.windows.map(label => {
+            const percent = windows[label]?.percent;
+            return `${label} ${percent == null ? '–' : percent + '%'}`;
+        });
+        fragment.append(`Availability  ${summary.join('  ·  ')}\n`);
+        if (!incidents.length) {
+            const line = document.createElement('span');
+            line.className = 'success';
+            line.textContent = 'No incidents recorded\n';
+            fragment.appendChild(line);
+            return fragment;
+        }
+        incidents.forEach(incident => {
+            const line = document.createElement('span');
+            const started = new Date(incident.started_at * 1000).toLocaleString();
+            const duration = incident.ended_at == null
+                ? 'ongoing'
+                : `for ${formatDuration(incident.duration_seconds)}`;
+            if (incident.ended_at == null) line.className = 'error';
+            line.textContent = `${started} ${incident.state} ${duration}\n`;
+            fragment.appendChild(line);
+        });
+        return fragment;
+    }
+
+    /**
+     * Load availability and incidents of the selected service and keep them fresh
+     */
+    function setupAvailability() {
+        if (!elements.serviceAvailability || !elements.serviceAvailabilityText) return;
+        
+        const service = encodeURIComponent(elements.serviceAvailability.dataset.service);
+        const getJson = url => fetch(url).then(res => {
+            if (!res.ok) throw new Error('Failed to load availability');
+            return res.json();
+        });
+        
+        function refresh() {
+            Promise.all([
+                getJson(`/api/availability?service=${service}`),
+                getJson(`/api/incidents?service=${service}&limit=${CONFIG.INCIDENT_LIMIT}`),
+            ])
+                .then(([availability, data]) => {
+                    elements.serviceAvailabilityText.replaceChildren(renderAvailability(availability, data.incidents));
+                })
+                .catch(err => console.error('⚠️ Availability refresh failed:', err));
+        }
+        
+        refresh();
+        setInterval(refresh, CONFIG.AVAILABILITY_REFRESH_INTERVAL);
     }
 
     // ============================================
@@ -424,9 +793,10 @@
      */
     function setupButtonLoadingStates() {
         document.querySelectorAll('form').forEach(form => {
-            form.addEventListener('submit', function() {
+            form.addEventListener('submit', function(event) {
                 const btn = this.querySelector('button[type="submit"]');
-                if (!btn) return;
+                // Skip when the confirm() dialog was cancelled
+                if (!btn || event.defaultPrevented) return;
                 
                 btn.disabled = true;
                 btn.classList.add('btn--loading');
@@ -440,6 +810,157 @@
         });
     }
 
+    /**
+     * Restore a button put into its loading state
+     * @param {HTMLButtonElement} btn
+     */
+    function resetButton(btn) {
+        if (!btn) return;
+        btn.disabled = false;
+        btn.classList.remove('btn--loading');
+        if (btn.dataset.originalText) {
+            btn.textContent = btn.dataset.originalText;
+        }
+    }
+
+    // ============================================
+    // Restart Jobs
+    // ============================================
+
+    /**
+     * Submit restart forms in the background and follow the job until its
+     * units are running again (or failed) instead of waiting on a redirect.
+     */
+    function setupRestartJobs() {
+        document.querySelectorAll('form[data-job-form]').forEach(form => {
+            form.addEventListener('submit', event => {
+                if (event.defaultPrevented) return;
+                event.preventDefault();
+                const btn = form.querySelector('button[type="submit"]');
+                fetch(form.action, {
+                    method: 'POST',
+                    body: new URLSearchParams(new FormData(form)),
+                    headers: { 'Accept': 'application/json' },
+                })
+                    .then(res => {
+                        if (!res.ok) {
+                            return res.text().then(text => { throw new Error(text || `HTTP ${res.status}`); });
+                        }
+                        return res.json();
+                    })
+                    .then(job => followJob(job, btn))
+                    .catch(err => {
+                        showToast(escapeHtml(err.message), 'error');
+                        resetButton(btn);
+                    });
+            });
+        });
+    }
+
+    /**
+     * Poll /api/jobs/<id> until the job is active or failed
+     * @param {Object} job - Job as returned by /restart or /api/jobs/<id>
+     * @param {HTMLButtonElement} btn - Button showing the progress
+     */
+    function followJob(job, btn) {
+        const finished = job.units.filter(unit => unit.state === 'active' || unit.state === 'failed');
+        if (job.status === 'active' || job.status === 'failed') {
+            resetButton(btn);
+            if (job.status === 'active') {
+                showToast(`Restarted ${escapeHtml(job.target)}`, 'success');
+            } else {
+                const errors = job.units.filter(unit => unit.error).map(unit => escapeHtml(unit.error));
+                showToast(errors.join('<br>') || `Restart of ${escapeHtml(job.target)} failed`, 'error');
+            }
+            announceStatus(`Restart of ${job.target} ${job.status === 'active' ? 'finished' : 'failed'}`);
+            refreshServiceStatus();
+            return;
+        }
+        if (btn && job.units.length > 1) {
+            btn.textContent = `Restarting ${finished.length}/${job.units.length}...`;
+        }
+        setTimeout(() => {
+            fetch(`/api/jobs/${job.id}`)
+                .then(res => {
+                    if (!res.ok) throw new Error(`Lost track of restart job ${job.id}`);
+                    return res.json();
+                })
+                .then(next => followJob(next, btn))
+                .catch(err => {
+                    showToast(escapeHtml(err.message), 'error');
+                    resetButton(btn);
+                });
+        }, CONFIG.JOB_POLL_INTERVAL);
+    }
+
+    // ============================================
+    // Service Actions
+    // ============================================
+
+    /**
+     * Run service actions in the background and stream their output
+     * into the panel below the service status as it is printed.
+     */
+    function setupActions() {
+        const panel = document.getElementById('actionOutput');
+        const lines = document.getElementById('actionOutputLines');
+        document.querySelectorAll('form[data-action-form]').forEach(form => {
+            form.addEventListener('submit', event => {
+                if (event.defaultPrevented) return;
+                event.preventDefault();
+                const btn = form.querySelector('button[type="submit"]');
+                fetch(form.action, { method: 'POST', headers: { 'Accept': 'application/json' } })
+                    .then(res => {
+                        if (!res.ok) {
+                            return res.text().then(text => { throw new Error(text || `HTTP ${res.status}`); });
+                        }
+                        return res.json();
+                    })
+                    .then(run => {
+                        if (panel && lines) {
+                            panel.hidden = false;
+                            lines.textContent = '';
+                        }
+                        followActionRun(run, lines, btn);
+                    })
+                    .catch(err => {
+                        showToast(escapeHtml(err.message), 'error');
+                        resetButton(btn);
+                    });
+            });
+        });
+    }
+
+    /**
+     * Append an action run's output lines until its `done` event
+     * @param {Object} run - Run as returned by /actions/<name>
+     * @param {HTMLElement|null} lines - Element the output is appended to
+     * @param {HTMLButtonElement} btn - Button showing the progress
+     */
+    function followActionRun(run, lines, btn) {
+        const source = new EventSource(`/api/actions/runs/${run.id}/stream`);
+        source.addEventListener('output', event => {
+            if (!lines) return;
+            const line = JSON.parse(event.data);
+            const span = document.createElement('span');
+            span.className = `log-line log-line--${line.stream}`;
+            span.textContent = `${line.text}\n`;
+            lines.appendChild(span);
+            lines.scrollTop = lines.scrollHeight;
+        });
+        source.addEventListener('done', event => {
+            source.close();
+            resetButton(btn);
+            const finished = JSON.parse(event.data);
+            if (finished.state === 'succeeded') {
+                showToast(`${escapeHtml(finished.action)} finished`, 'success');
+            } else {
+                showToast(`${escapeHtml(finished.action || run.action)} ${escapeHtml(finished.state || 'failed')}`, 'error');
+            }
+            announceStatus(`${finished.action || run.action} ${finished.state || 'failed'}`);
+        });
+    }
+
     // ============================================
     // Event Handlers
     // ============================================
@@ -561,9 +1082,15 @@
         setupEventListeners();
         setupSearch();
         setupButtonLoadingStates();
+        setupRestartJobs();
+        setupActions();
         setupServiceNavigation();
+        setupServiceLogs();
+        setupAvailability();
         applyProjectColors();
+        setupSparklines();
         startAutoRefresh();
+        setInterval(refreshUptimes, CONFIG.UPTIME_REFRESH_INTERVAL);
         
         // Show welcome message on first load
         const urlParams = new URLSearchParams(window.location.search);
@@ -0,0 +1,28 @@
+"""Stand-in for `systemctl` in tests: serves `show` from systemctl_show.txt.
+
+Units with "slow" in their name make the call hang, units with "broken" make it fail.
+"""
+
+import sys
+import time
+from pathlib import Path
+
+FIXTURE = (Path(__file__).parent / "systemctl_show.txt").read_text()
+BLOCKS = {block.splitlines()[0].removeprefix("Id="): block for block in FIXTURE.strip().split("\n\n")}
+
+command, args = sys.argv[1], sys.argv[2:]
+units = [arg for arg in args if arg.endswith(".service")]
+if any("slow" in unit for unit in units):
+    time.sleep(5)
+if any("broken" in unit for unit in units):
+    print("Failed to connect to bus", file=sys.stderr)
+    sys.exit(1)
+
+if command == "list-units":
+    for unit in BLOCKS:
+        print(f"{unit} loaded active running Fake unit")
+elif command == "show":
+    print("\n\n".join(BLOCKS.get(unit, f"Id={unit}\nActiveState=inactive\nSubState=dead") for unit in units))
+elif command == "status":
+    print(f"* {units[0]} - Fake unit")
+    sys.exit(3)
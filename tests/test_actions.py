@@ -0,0 +1,117 @@
+"""Tests for actions.py module."""
+
+import asyncio
+import sys
+
+import pytest
+
+from src.actions import (
+    INTERRUPTED,
+    Action,
+    ActionRun,
+    ActionRunner,
+    ActionStore,
+    OutputLine,
+    load_actions,
+    stream_output,
+)
+
+
+class FakeEngine:
+    """Runs action coroutines to completion inside `submit`."""
+
+    def submit(self, coroutine):
+        asyncio.run(coroutine)
+
+
+def _runner(*actions: Action, store: ActionStore | None = None) -> ActionRunner:
+    actions = {action.name: action for action in actions}
+    return ActionRunner(actions, store or ActionStore(path=None), FakeEngine(), max_parallel=2)
+
+
+def _python(name: str, code: str, timeout: float = 10) -> Action:
+    return Action(name, name, "projects_a.service", (sys.executable, "-c", code), timeout_seconds=timeout)
+
+
+def test_load_actions():
+    """Actions are keyed by name; duplicates and non-list commands are rejected."""
+    config = {"name": "check", "service": "projects_a.service", "command": ["uv", "run", "check"]}
+    actions = load_actions([config])
+    assert actions["check"] == Action("check", "check", "projects_a.service", ("uv", "run", "check"))
+
+    with pytest.raises(ValueError, match="Duplicate"):
+        load_actions([config, config])
+    with pytest.raises(ValueError, match="list of strings"):
+        load_actions([{**config, "command": "uv run check"}])
+
+
+def test_action_streams_stdout_and_stderr():
+    """Both streams are captured line by line in order of arrival, with the exit code."""
+    code = "import sys; print('out', flush=True); print('err', file=sys.stderr, flush=True); sys.exit(3)"
+    runner = _runner(_python("check", code))
+    run = runner.submit("check")
+
+    finished = runner.store.get(run.id)
+    assert (finished.state, finished.exit_code) == ("failed", 3)
+    assert finished.finished_at is not None
+    lines = runner.store.output(run.id)
+    assert {(line.stream, line.text) for line in lines} == {("stdout", "out"), ("stderr", "err")}
+    assert runner.for_service("projects_a.service") == [runner.actions["check"]]
+
+
+def test_action_times_out():
+    """Commands running past their timeout are killed."""
+    runner = _runner(_python("slow", "import time; print('start', flush=True); time.sleep(30)", timeout=0.5))
+    run = runner.submit("slow")
+
+    finished = runner.store.get(run.id)
+    assert finished.state == "timed_out"
+    assert [line.text for line in runner.store.output(run.id)] == ["start", "Killed after 0.5s"]
+
+
+def test_action_missing_command():
+    """A command that cannot be started fails the run instead of raising."""
+    runner = _runner(Action("missing", "missing", "projects_a.service", ("/nonexistent/command",)))
+    run = runner.submit("missing")
+    assert runner.store.get(run.id).state == "failed"
+    assert "unavailable" in runner.store.output(run.id)[0].text
+
+
+def test_store_keeps_recent_output_and_runs():
+    """Only the last `max_lines` lines of a run and the newest `max_runs` runs are kept."""
+    store = ActionStore(path=None, max_lines=3, max_runs=2)
+    for i in range(3):
+        store.save(ActionRun(id=str(i), action="a", service="s", created_at=i))
+    store.append("2", [OutputLine(seq, "stdout", str(seq)) for seq in range(1, 6)])
+    assert [line.seq for line in store.output("2")] == [3, 4, 5]
+    assert [line.seq for line in store.output("2", after=4)] == [5]
+    assert store.get("0") is None
+    assert store.get("2") is not None
+
+
+def test_unfinished_runs_of_exited_processes_fail_on_open(tmp_path):
+    """A run left running by a process that is gone is marked failed, with a line saying why."""
+    path = tmp_path / "actions.db"
+    store = ActionStore(path=path)
+    store.save(ActionRun(id="r", action="a", service="s", state="running"))
+    store.append("r", [OutputLine(1, "stdout", "working")])
+    store._connect().execute("UPDATE runs SET pid = 2147483647")
+    store._connect().commit()
+
+    reopened = ActionStore(path=path)
+    run = reopened.get("r")
+    assert run.finished and run.state == "failed"
+    assert [(line.seq, line.text) for line in reopened.output("r")] == [(1, "working"), (2, INTERRUPTED)]
+
+
+def test_stream_output():
+    """The stream replays lines after `after` and ends with a `done` event once the run finished."""
+    store = ActionStore(path=None)
+    store.save(ActionRun(id="r", action="a", service="s", state="succeeded", exit_code=0))
+    store.append("r", [OutputLine(1, "stdout", "one"), OutputLine(2, "stdout", "two")])
+
+    messages = list(stream_output(store, "r", after=1, poll_interval=0))
+    assert messages[0].startswith("retry:")
+    assert messages[1].startswith("id: 2\nevent: output\n")
+    assert messages[-1].startswith("event: done\n")
+    assert '"state": "succeeded"' in messages[-1]
@@ -0,0 +1,26 @@
+"""Tests for agent.py module."""
+
+from src.agent import create_agent_app
+from src.canned_info import canned_service_statuses
+from src.collector import StatusCollector
+
+
+def test_api_snapshot():
+    """The agent serves its snapshot with an ETag, 304 when unchanged and deltas with ?since."""
+    services = list(canned_service_statuses[:3])
+    collector = StatusCollector(collect_fn=lambda: list(services))
+    client = create_agent_app(collector).test_client()
+
+    response = client.get("/api/snapshot")
+    assert response.status_code == 200
+    assert len(response.json["services"]) == 3
+    etag = response.headers["ETag"]
+    assert client.get("/api/snapshot", headers={"If-None-Match": etag}).status_code == 304
+
+    version = response.json["version"]
+    services[0] = canned_service_statuses[5]
+    collector.refresh()
+    delta = client.get(f"/api/snapshot?since={version}&epoch={collector.epoch}").json
+    assert [service["name"] for service in delta["services"]] == [canned_service_statuses[5].name]
+    assert len(delta["names"]) == 3
+    assert client.get(f"/api/snapshot?since={version}&epoch=other").json["since"] is None
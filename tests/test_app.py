@@ -1,11 +1,22 @@
 """Tests for app.py Flask application."""
 
-import subprocess
+import gzip
+import time
+from dataclasses import replace
 from unittest.mock import patch
 
 import pytest
 
+from src.actions import ActionRun, ActionStore, OutputLine
 from src.app import app
+from src.availability import AvailabilityStore
+from src.canned_info import canned_service_statuses
+from src.collector import Snapshot, StatusCollector
+from src.events import EventBroker
+from src.jobs import JobStore, RestartJob, UnitProgress
+from src.journal import JournalEntry, JournalPage
+from src.pages import RENDER_CACHE_LOOKUPS
+from src.search import SearchIndex
 from src.services import ServiceStatus
 
 
@@ -17,84 +28,427 @@ def client():
         yield client
 
 
-@patch("src.app.is_linux", return_value=True)
-@patch("src.app.get_services")
-@patch("src.app.get_service_status")
+@pytest.fixture
+def fresh_collector():
+    """Replace the app's collector with an empty one so each test collects from scratch."""
+    with patch("src.app.collector", StatusCollector()) as fresh:
+        yield fresh
+
+
+@patch("src.collector.is_linux", return_value=True)
+@patch("src.collector.get_services")
+@patch("src.collector.get_service_statuses")
 @patch("src.app.get_info_for_service")
-def test_index(mock_get_info, mock_get_status, mock_get_services, mock_is_linux, client):
-    """Index route renders with services and selected service info."""
+def test_index(mock_get_info, mock_get_status, mock_get_services, mock_is_linux, fresh_collector, client):
+    """Index route renders services from the snapshot and selected service info."""
     mock_get_services.return_value = ["projects_test1.service", "projects_test2.service"]
-    mock_get_status.return_value = ServiceStatus(
-        name="projects_test1.service",
-        is_active=True,
-        is_failed=False,
-        uptime="1 day",
-        memory="100M",
-        cpu="50ms",
-        last_error=None,
-        full_status="",
-        project_group="test1",
-        suffix=None,
-        ci_status="success",
-    )
+    mock_get_status.return_value = [
+        ServiceStatus(
+            name="projects_test1.service",
+            is_active=True,
+            is_failed=False,
+            uptime="1 day",
+            memory="100M",
+            cpu="50ms",
+            last_error=None,
+            project_group="test1",
+            suffix=None,
+            ci_status="success",
+        )
+    ]
     mock_get_info.return_value = ""
 
     response = client.get("/")
     assert response.status_code == 200
-    assert mock_get_status.call_count == 2
+    mock_get_status.assert_called_once_with(["projects_test1.service", "projects_test2.service"])
 
     mock_get_info.return_value = "Detailed service info"
     response = client.get("/?service=projects_test1.service")
     assert response.status_code == 200
-    mock_get_info.assert_called_with("projects_test1.service")
+    mock_get_info.assert_called_with("projects_test1.service", lines=0)
+    # Second page load is served from the snapshot without re-collecting
+    mock_get_status.assert_called_once()
 
 
-@patch("src.app.is_linux", return_value=False)
-def test_index_non_linux(mock_is_linux, client):
+@patch("src.collector.is_linux", return_value=False)
+def test_index_non_linux(mock_is_linux, fresh_collector, client):
     """Index route uses canned data on non-Linux systems."""
     response = client.get("/")
     assert response.status_code == 200
+    assert b"projects_energy-monitor.service" in response.data
+
+
+@patch("src.app.get_info_for_service")
+def test_index_remote_service(mock_get_info, client):
+    """Units of other nodes show their aggregated status, without local systemctl, logs or restarts."""
+    local = canned_service_statuses[1]
+    remote = replace(canned_service_statuses[1], name=f"pi2/{local.name}", node="pi2")
+    with patch("src.app.collector", StatusCollector(collect_fn=lambda: [local, remote])):
+        response = client.get(f"/?service={remote.name}")
+        assert response.status_code == 200
+        assert f"{remote.name} (active) on node pi2".encode() in response.data
+        assert b'id="serviceLogs"' not in response.data
+        assert b'action="/restart"' not in response.data
+        mock_get_info.assert_not_called()
+
+        with patch("src.jobs.restart_jobs") as mock_jobs:
+            client.post("/restart-group", data={"group": local.project_group})
+            assert mock_jobs.submit.call_args.args[1] == [local.name]
+
+
+@patch("src.collector.is_linux", return_value=False)
+@patch("src.app.get_info_for_service", return_value="Detailed service info")
+def test_index_is_cached_per_snapshot_version(mock_get_info, mock_is_linux, fresh_collector, client):
+    """Unchanged pages come from the cache or as a 304; a new snapshot re-renders only changed rows."""
+    url = "/?service=projects_energy-monitor.service"
+    first = client.get(url)
+    assert first.headers["Cache-Control"] == "no-cache"
+    assert first.headers["Last-Modified"]
+    etag = first.headers["ETag"]
+
+    assert client.get(url).data == first.data
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+    not_modified = client.get(url, headers={"If-Modified-Since": first.headers["Last-Modified"]})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["ETag"] == etag
+    mock_get_info.assert_called_once()
+
+    changed = replace(canned_service_statuses[0], memory="999M", memory_bytes=None)
+    fragment_misses = RENDER_CACHE_LOOKUPS.value(cache="fragment", result="miss")
+    with patch("src.canned_info.canned_service_statuses", [changed, *canned_service_statuses[1:]]):
+        fresh_collector.refresh()
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert b"999M" in response.data
+    assert RENDER_CACHE_LOOKUPS.value(cache="fragment", result="miss") == fragment_misses + 1
+
+
+@patch("src.collector.is_linux", return_value=False)
+@patch("src.app.get_info_for_service", return_value="Detailed service info")
+def test_cached_page_is_compressed_once(mock_get_info, mock_is_linux, fresh_collector, client):
+    """A cached page keeps its gzipped body, so repeat loads are not compressed again."""
+    url = "/?service=projects_energy-monitor.service"
+    with patch(
+        "src.pages.compress", side_effect=lambda content, encoding, dynamic: gzip.compress(content)
+    ) as compress:
+        first = client.get(url, headers={"Accept-Encoding": "gzip"})
+        second = client.get(url, headers={"Accept-Encoding": "gzip"})
+    plain = client.get(url)
+
+    assert first.headers["Content-Encoding"] == "gzip"
+    assert first.headers["ETag"].startswith('W/"')
+    assert "Accept-Encoding" in first.headers["Vary"]
+    assert second.data == first.data
+    assert gzip.decompress(first.data) == plain.data
+    assert "Content-Encoding" not in plain.headers
+    compress.assert_called_once()
+
+
+@patch("src.collector.is_linux", return_value=False)
+@patch("src.app.get_info_for_service", return_value="Detailed service info")
+def test_index_only_renders_current_services(mock_get_info, mock_is_linux, fresh_collector, client):
+    """Unknown services are a 404, never rendered or cached; names are escaped in confirm prompts."""
+    misses = RENDER_CACHE_LOOKUPS.value(cache="page", result="miss")
+    response = client.get("/?service=x');alert(1);('")
+    assert response.status_code == 404
+    assert b"alert(1)" not in response.data
+    assert RENDER_CACHE_LOOKUPS.value(cache="page", result="miss") == misses
+    mock_get_info.assert_not_called()
 
+    page = client.get("/?service=projects_energy-monitor.service").data.decode()
+    assert 'data-confirm="Restart projects_energy-monitor.service?"' in page
+    assert "confirm(this.dataset.confirm)" in page
+
+
+@patch("src.jobs.restart_jobs")
+def test_restart_service(mock_jobs, client):
+    """Restart starts a background job: JSON clients get 202 and the job, forms are redirected."""
+    mock_jobs.submit.return_value = RestartJob(
+        id="abc123", target="projects_test.service", units=[UnitProgress("projects_test.service")]
+    )
+    response = client.post(
+        "/restart", data={"service": "projects_test.service"}, headers={"Accept": "application/json"}
+    )
+    assert response.status_code == 202
+    assert response.headers["Location"] == "/api/jobs/abc123"
+    assert response.json["status"] == "queued"
+    mock_jobs.submit.assert_called_once_with("projects_test.service", ["projects_test.service"])
 
-@patch("src.app.subprocess.run")
-def test_restart_service(mock_run, client):
-    """Restart service calls systemctl and redirects on success or returns error."""
-    mock_run.return_value.returncode = 0
     response = client.post("/restart", data={"service": "projects_test.service"}, follow_redirects=False)
     assert response.status_code == 302
-    mock_run.assert_called_once_with(
-        ["sudo", "systemctl", "restart", "projects_test.service"],
-        check=True,
-        text=True,
-        capture_output=True,
+
+    assert client.post("/restart", data={"service": "sshd.service"}).status_code == 400
+
+
+@patch("src.collector.is_linux", return_value=False)
+@patch("src.jobs.restart_jobs")
+def test_restart_group(mock_jobs, mock_is_linux, fresh_collector, client):
+    """Group restarts cover every unit of the project group."""
+    mock_jobs.submit.return_value = RestartJob(id="abc123", target="energy-monitor", units=[])
+    response = client.post(
+        "/restart-group", data={"group": "energy-monitor"}, headers={"Accept": "application/json"}
     )
+    assert response.status_code == 202
+    group, units = mock_jobs.submit.call_args.args
+    assert group == "energy-monitor"
+    assert units == [s.name for s in canned_service_statuses if s.project_group == "energy-monitor"]
+    assert len(units) > 1
 
-    mock_run.side_effect = subprocess.CalledProcessError(1, "sudo", stderr="Permission denied")
-    response = client.post("/restart", data={"service": "projects_test.service"})
-    assert response.status_code == 500
-    assert b"Permission denied" in response.data
+    assert client.post("/restart-group", data={"group": "nope"}).status_code == 404
 
 
-@patch("src.app.subprocess.run")
-def test_inspector_detector_check(mock_run, client):
-    """Inspector Detector check runs command and redirects on success or returns error."""
-    mock_run.return_value.returncode = 0
-    mock_run.return_value.stdout = "Check completed"
-    mock_run.return_value.stderr = ""
+def test_api_job(client):
+    """Jobs are looked up in the shared job store."""
+    store = JobStore(path=None)
+    job = RestartJob(id="abc123", target="projects_a.service", units=[UnitProgress("projects_a.service")])
+    store.save(job)
+    with patch("src.jobs.restart_jobs.store", store):
+        assert client.get("/api/jobs/abc123").json["units"][0]["state"] == "queued"
+        assert client.get("/api/jobs").json["jobs"][0]["id"] == "abc123"
+        assert client.get("/api/jobs/missing").status_code == 404
 
-    response = client.post(
-        "/inspector-detector/check", data={"service": "projects_train.service"}, follow_redirects=False
+
+@patch("src.actions.action_runner.submit")
+def test_run_action(mock_submit, client):
+    """Actions start a background run: JSON clients get 202 and the run, forms are redirected."""
+    mock_submit.return_value = ActionRun(
+        id="abc123", action="check-inspections", service="projects_a.service"
     )
+    response = client.post("/actions/check-inspections", headers={"Accept": "application/json"})
+    assert response.status_code == 202
+    assert response.headers["Location"] == "/api/actions/runs/abc123"
+    assert response.json["state"] == "queued"
+    mock_submit.assert_called_once_with("check-inspections")
+
+    response = client.post("/actions/check-inspections", follow_redirects=False)
     assert response.status_code == 302
-    mock_run.assert_called_once_with(
-        ["/home/mnalavadi/.local/bin/uv", "run", "-m", "scripts.check_inspections"],
-        check=True,
-        text=True,
-        capture_output=True,
-        cwd="/home/mnalavadi/inspector_detector",
+    assert response.headers["Location"] == "/?service=projects_a.service"
+
+    assert client.post("/actions/nope").status_code == 404
+
+
+def test_api_action_run(client):
+    """Action output is served from the shared store, as JSON or as an SSE stream."""
+    store = ActionStore(path=None)
+    store.save(
+        ActionRun(id="abc123", action="a", service="projects_a.service", state="succeeded", exit_code=0)
+    )
+    store.append("abc123", [OutputLine(1, "stdout", "one"), OutputLine(2, "stderr", "two")])
+    with patch("src.actions.action_runner.store", store):
+        assert [line["text"] for line in client.get("/api/actions/runs/abc123?after=1").json["output"]] == [
+            "two"
+        ]
+        response = client.get("/api/actions/runs/abc123/stream", headers={"Last-Event-ID": "1"})
+        assert response.mimetype == "text/event-stream"
+        body = response.get_data(as_text=True)
+        assert '"text": "one"' not in body
+        assert '"text": "two"' in body
+        assert "event: done" in body
+        assert client.get("/api/actions/runs/missing").status_code == 404
+        assert client.get("/api/actions/runs/missing/stream").status_code == 404
+
+
+def test_api_services(client):
+    """Services API returns the snapshot, 304 when unchanged, and deltas with ?since."""
+    services = list(canned_service_statuses[:3])
+    fresh = StatusCollector(collect_fn=lambda: list(services))
+    with patch("src.app.collector", fresh):
+        response = client.get("/api/services")
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data["version"] == 1 and data["since"] is None
+        assert [svc["name"] for svc in data["services"]] == data["names"]
+        assert data["summary"] == {"active": 3, "failed": 0}
+
+        etag = response.headers["ETag"]
+        response = client.get("/api/services", headers={"If-None-Match": etag})
+        assert response.status_code == 304 and response.data == b""
+
+        services[1] = replace(services[1], is_active=False, is_failed=True)
+        fresh.refresh()
+        response = client.get(f"/api/services?since=1&epoch={fresh.epoch}", headers={"If-None-Match": etag})
+        data = response.get_json()
+        assert data["version"] == 2 and data["since"] == 1
+        assert [svc["name"] for svc in data["services"]] == [services[1].name]
+        assert data["summary"] == {"active": 2, "failed": 1}
+        # Rows come from the page's _service_item.html partial, not a client-side copy
+        row = data["services"][0]["html"]
+        assert f'data-service="{services[1].name}"' in row and "status-indicator--failed" in row
+        assert "service-item--active" not in row
+
+        # A stale epoch (server restarted) gets a full response
+        data = client.get("/api/services?since=1&epoch=old").get_json()
+        assert data["since"] is None and len(data["services"]) == 3
+
+
+def test_api_services_query(client):
+    """Services API filters, sorts and limits server-side."""
+    services = [
+        replace(status, memory_bytes=(i + 1) * 1024**2) for i, status in enumerate(canned_service_statuses)
+    ]
+    fresh = StatusCollector(collect_fn=lambda: list(services))
+    with patch("src.app.collector", fresh):
+        data = client.get("/api/services?sort=memory&limit=3").get_json()
+        assert [svc["name"] for svc in data["services"]] == [status.name for status in services[::-1][:3]]
+        assert data["total"] == len(services)
+        assert sum(data["facets"]["group"].values()) == len(services)
+
+        group = services[1].project_group
+        data = client.get(f"/api/services?group={group}&state=active").get_json()
+        assert {svc["project_group"] for svc in data["services"]} == {group}
+        assert data["names"] == [svc["name"] for svc in data["services"]]
+
+        assert client.get("/api/services?state=sleeping").status_code == 400
+        assert client.get("/api/services?sort=disk").status_code == 400
+        assert client.get("/api/services?limit=0").status_code == 400
+
+
+@patch("src.app.get_info_for_service", return_value="")
+def test_metrics(mock_get_info, client):
+    """Metrics expose per-service gauges from the snapshot and instrumentation histograms."""
+    services = [replace(canned_service_statuses[0], memory_bytes=1024), canned_service_statuses[1]]
+    with patch("src.app.collector", StatusCollector(collect_fn=lambda: services)):
+        client.get("/")
+        response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain; version=0.0.4")
+    lines = response.get_data(as_text=True).splitlines()
+    labels = f'service="{services[0].name}",group="{services[0].project_group}"'
+    assert f"service_monitor_service_up{{{labels}}} 1" in lines
+    assert f"service_monitor_service_memory_bytes{{{labels}}} 1024" in lines
+    assert "service_monitor_snapshot_version 1" in lines
+    assert any(
+        line.startswith('service_monitor_render_duration_seconds_count{template="index.html"}')
+        for line in lines
     )
 
-    mock_run.side_effect = subprocess.CalledProcessError(1, "uv", stderr="Script failed")
-    response = client.post("/inspector-detector/check", data={"service": "projects_train.service"})
-    assert response.status_code == 500
-    assert b"Script failed" in response.data
+
+def test_api_stream(client):
+    """Stream endpoint sends a reconnecting client what it missed since its Last-Event-ID."""
+    services = list(canned_service_statuses[:3])
+    collector = StatusCollector(collect_fn=lambda: list(services))
+    collector.refresh()
+    services[0] = canned_service_statuses[4]
+    collector.refresh()
+    with (
+        patch("src.app.broker", EventBroker()) as broker,
+        patch("src.events.broker", broker),
+        patch("src.events.collector", collector),
+    ):
+        response = client.get(
+            "/api/stream", headers={"Last-Event-ID": f"{collector.epoch}-1"}, buffered=False
+        )
+        assert response.mimetype == "text/event-stream"
+        chunks = response.response
+        assert next(chunks).startswith(b"retry:")
+        assert next(chunks).startswith(f"id: {collector.epoch}-2\nevent: snapshot\n".encode())
+        response.close()
+
+
+def test_api_stream_limits_open_streams(client):
+    """Past stream_max_clients open streams per worker, clients are told to come back later."""
+    with patch("src.app.broker", EventBroker()) as broker, patch("src.app.STREAM_MAX_CLIENTS", 1):
+        broker.subscribe()
+        response = client.get("/api/stream")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "30"
+
+
+@patch("src.journal.journal_reader")
+def test_api_logs(mock_reader, client):
+    """Logs API pages by cursor and rejects units that are not monitored."""
+    mock_reader.latest.return_value = JournalPage(
+        entries=[JournalEntry(timestamp=1, priority=3, message="boom")], first_cursor="c1", last_cursor="c1"
+    )
+    mock_reader.before.return_value = JournalPage()
+    mock_reader.after.return_value = JournalPage()
+
+    data = client.get("/api/logs/projects_test.service").get_json()
+    assert data["entries"] == [{"timestamp": 1, "priority": 3, "message": "boom"}]
+    mock_reader.latest.assert_called_once_with("projects_test.service", 200)
+
+    client.get("/api/logs/projects_test.service?before=c1&limit=50")
+    mock_reader.before.assert_called_once_with("projects_test.service", "c1", 50)
+    client.get("/api/logs/projects_test.service?after=c1&limit=5000")
+    mock_reader.after.assert_called_once_with("projects_test.service", "c1", 1000)
+
+    assert client.get("/api/logs/sshd.service").status_code == 404
+
+
+def test_api_search(client):
+    """Search returns ranked hits with context and validates its parameters."""
+    index = SearchIndex(path=None)
+    unit = "projects_energy-monitor.service"
+    now = int(time.time() * 1e6)
+    index.add(
+        [
+            (unit, now - 2, 6, "Starting"),
+            (unit, now - 1, 3, "ERROR: database is locked"),
+            (unit, now, 6, "Retrying"),
+        ],
+        cursor="c",
+    )
+    with patch("src.search.search_index", index):
+        data = client.get(f"/api/search?q=database&unit={unit}&since=1h&context=1").json
+        assert data["query"] == "database"
+        (hit,) = data["hits"]
+        assert hit["message"] == "ERROR: database is locked"
+        assert [entry["message"] for entry in hit["before"] + hit["after"]] == ["Starting", "Retrying"]
+        assert client.get(f"/api/search?q=database&since={time.time() + 60}").json["hits"] == []
+
+        assert client.get("/api/search").status_code == 400
+        assert client.get("/api/search?q=a&order=random").status_code == 400
+        assert client.get("/api/search?q=a&since=soon").status_code == 400
+        assert client.get("/api/search?q=a&unit=sshd.service").status_code == 404
+
+
+def test_api_availability_and_incidents(client):
+    """Availability covers every snapshot service and group; incidents list outages newest first."""
+    store = AvailabilityStore(path=None)
+    api, energy = canned_service_statuses[:2]
+    now = time.time()
+    store.record(Snapshot(version=1, services=(api, energy), collected_at=now - 120))
+    store.record(
+        Snapshot(
+            version=2, services=(replace(api, is_active=False, is_failed=True), energy), collected_at=now - 60
+        )
+    )
+    collector = StatusCollector(collect_fn=lambda: [api, energy])
+    collector.refresh()
+
+    with patch("src.availability.availability_store", store), patch("src.app.collector", collector):
+        data = client.get("/api/availability").json
+        assert data["windows"] == ["24h", "7d", "30d"]
+        assert set(data["services"]) == {api.name, energy.name}
+        assert set(data["groups"]) == {api.project_group, energy.project_group}
+        assert data["services"][energy.name]["24h"]["percent"] == 100.0
+        assert 40 < data["services"][api.name]["24h"]["percent"] < 60
+
+        data = client.get(f"/api/availability?group={api.project_group}").json
+        assert data["services"] == {} and list(data["groups"]) == [api.project_group]
+
+        (incident,) = client.get(f"/api/incidents?service={api.name}").json["incidents"]
+        assert (incident["state"], incident["ended_at"], incident["duration_seconds"]) == (
+            "failed",
+            None,
+            None,
+        )
+        assert client.get(f"/api/incidents?service={energy.name}").json["incidents"] == []
+
+
+@patch("src.history.history_store")
+def test_api_history(mock_store, fresh_collector, client):
+    """History API returns a series per snapshot service and validates the metric."""
+    mock_store.query.return_value = (60, [(0, 1.0), (60, 2.0)])
+    with patch("src.collector.is_linux", return_value=False):
+        data = client.get("/api/history?metric=memory&points=1").get_json()
+    assert data["step"] == 60
+    assert data["series"]["projects_energy-monitor.service"] == [[0, 1.5]]
+
+    data = client.get("/api/history?metric=cpu&service=projects_test.service").get_json()
+    assert list(data["series"]) == ["projects_test.service"]
+    mock_store.query.assert_called_with("projects_test.service", "cpu", 86400)
+
+    assert client.get("/api/history?metric=disk").status_code == 400
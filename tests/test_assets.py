@@ -0,0 +1,126 @@
+"""Tests for assets.py module."""
+
+import gzip
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from flask import Flask, jsonify, url_for
+
+from src.assets import IMMUTABLE_CACHE_CONTROL, AssetRegistry, compress, fingerprint
+
+SCRIPT = b"console.log('service monitor');\n" * 100
+
+
+@pytest.fixture
+def static_app(tmp_path: Path):
+    """A Flask app with a fingerprinted static folder and a JSON route."""
+    (tmp_path / "app.js").write_bytes(SCRIPT)
+    (tmp_path / "favicon.ico").write_bytes(b"\x00\x00\x01\x00")
+    flask_app = Flask(__name__, static_folder=str(tmp_path), static_url_path="/static")
+    AssetRegistry(tmp_path).init_app(flask_app)
+
+    @flask_app.route("/data")
+    def data():
+        response = jsonify(items=["projects_a.service"] * 100)
+        response.set_etag("v1")
+        return response
+
+    return flask_app
+
+
+def test_fingerprint():
+    """The content hash goes before the extension."""
+    assert fingerprint("app.css", b"body{}") == f"app.{fingerprint('x', b'body{}')[2:]}.css"
+    assert fingerprint("app.css", b"body{}") != fingerprint("app.css", b"body{color:red}")
+
+
+def test_url_for_returns_fingerprinted_name(static_app):
+    """url_for rewrites known static files to their hashed names."""
+    with static_app.test_request_context():
+        assert url_for("static", filename="app.js") == f"/static/{fingerprint('app.js', SCRIPT)}"
+        assert url_for("static", filename="missing.js") == "/static/missing.js"
+
+
+def test_assets_are_loaded_on_first_use(tmp_path):
+    """Nothing is read or compressed when the app is created, only with the first request."""
+    (tmp_path / "app.js").write_bytes(SCRIPT)
+    flask_app = Flask(__name__, static_folder=str(tmp_path), static_url_path="/static")
+    with patch("src.assets.compress", wraps=compress) as compressed:
+        registry = AssetRegistry(tmp_path)
+        registry.init_app(flask_app)
+        compressed.assert_not_called()
+        assert flask_app.test_client().get(f"/static/{fingerprint('app.js', SCRIPT)}").status_code == 200
+    assert compressed.called
+    assert list(registry.names) == ["app.js"]
+
+
+def test_fingerprinted_asset_is_immutable_and_precompressed(static_app):
+    """Hashed assets are cached forever and served gzipped to clients that accept it."""
+    client = static_app.test_client()
+    path = f"/static/{fingerprint('app.js', SCRIPT)}"
+
+    response = client.get(path, headers={"Accept-Encoding": "gzip, deflate"})
+    assert response.headers["Cache-Control"] == IMMUTABLE_CACHE_CONTROL
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert gzip.decompress(response.data) == SCRIPT
+
+    response = client.get(path)
+    assert "Content-Encoding" not in response.headers
+    assert response.data == SCRIPT
+
+
+def test_compressed_assets_are_cached_across_restarts(tmp_path):
+    """With a cache dir, unchanged files are not compressed again and stale variants are dropped."""
+    static_dir, cache_dir = tmp_path / "static", tmp_path / "cache"
+    static_dir.mkdir()
+    (static_dir / "app.js").write_bytes(SCRIPT)
+    AssetRegistry(static_dir, cache_dir=cache_dir).load()
+    first = sorted(path.name for path in cache_dir.iterdir())
+    assert first == [f"{fingerprint('app.js', SCRIPT)}.gzip"]
+
+    registry = AssetRegistry(static_dir, cache_dir=cache_dir)
+    with patch("src.assets.compress") as compress:
+        registry.load()
+    compress.assert_not_called()
+    assert gzip.decompress(registry.assets[registry.names["app.js"]].variants["gzip"]) == SCRIPT
+
+    (static_dir / "app.js").write_bytes(SCRIPT * 2)
+    AssetRegistry(static_dir, cache_dir=cache_dir).load()
+    assert sorted(path.name for path in cache_dir.iterdir()) == [f"{fingerprint('app.js', SCRIPT * 2)}.gzip"]
+
+
+def test_small_and_binary_assets_are_not_compressed(static_app):
+    """The favicon is served as-is."""
+    response = static_app.test_client().get(
+        f"/static/{fingerprint('favicon.ico', b'\x00\x00\x01\x00')}", headers={"Accept-Encoding": "gzip"}
+    )
+    assert "Content-Encoding" not in response.headers
+
+
+def test_unhashed_name_is_still_served(static_app):
+    """Pages cached before a deploy can still load the plain filename."""
+    response = static_app.test_client().get("/static/app.js")
+    assert response.status_code == 200
+    assert response.get_data() == SCRIPT
+    response.close()
+
+
+def test_json_response_is_compressed_with_weak_etag(static_app):
+    """Dynamic JSON is gzipped on the fly and its ETag becomes weak."""
+    client = static_app.test_client()
+    response = client.get("/data", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["ETag"] == 'W/"v1"'
+    assert b"projects_a.service" in gzip.decompress(response.data)
+
+    assert "Content-Encoding" not in client.get("/data").headers
+
+
+def test_brotli_preferred_when_available(static_app):
+    """br is served to clients that accept both encodings when the brotli package is installed."""
+    brotli = pytest.importorskip("brotli")
+    response = static_app.test_client().get("/data", headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["Content-Encoding"] == "br"
+    assert b"projects_a.service" in brotli.decompress(response.data)
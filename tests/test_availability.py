@@ -0,0 +1,150 @@
+"""Tests for availability.py module."""
+
+from dataclasses import replace
+
+import pytest
+
+from src.availability import HOUR, AvailabilityStore
+from src.canned_info import canned_service_statuses
+from src.collector import Snapshot
+
+START = 1_760_000_000 // 86400 * 86400  # Midnight UTC
+API = canned_service_statuses[0]  # Only unit of its project group
+ENERGY = canned_service_statuses[1]
+
+
+class Clock:
+    def __init__(self, now: float = START):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _snapshot(at: float, *services) -> Snapshot:
+    return Snapshot(services=list(services), version=1, collected_at=at)
+
+
+def _failed(status):
+    return replace(status, is_active=False, is_failed=True)
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def store(clock):
+    return AvailabilityStore(path=None, clock=clock)
+
+
+def _run(store, clock, timeline, step=30):
+    """Record a snapshot every `step` seconds from START; timeline is [(until offset, services), ...]."""
+    offset = 0
+    for until, services in timeline:
+        while offset < until:
+            store.record(_snapshot(START + offset, *services))
+            offset += step
+    clock.now = START + offset
+
+
+def test_transitions_are_recorded_once(store):
+    """Only first sightings and state changes are recorded, including units that disappear."""
+    assert store.record(_snapshot(START, API, ENERGY)) == 2
+    assert store.record(_snapshot(START + 30, API, ENERGY)) == 0
+    assert store.record(_snapshot(START + 60, _failed(API), ENERGY)) == 1
+    assert store.record(_snapshot(START + 90, _failed(API))) == 1
+
+    rows = store._connect().execute("SELECT ts, service, from_state, to_state FROM transitions ORDER BY id")
+    assert list(rows)[2:] == [
+        (START + 60, API.name, "active", "failed"),
+        (START + 90, ENERGY.name, "active", "removed"),
+    ]
+
+
+def test_availability_rollups(store, clock):
+    """Up and down time accumulate per service and group; the current state counts until now."""
+    _run(
+        store, clock, [(HOUR, [API, ENERGY]), (HOUR + 900, [_failed(API), ENERGY]), (2 * HOUR, [API, ENERGY])]
+    )
+
+    services = store.availability("service", [API.name, ENERGY.name])
+    assert services[API.name]["24h"] == {"percent": 87.5, "up_seconds": 6300.0, "down_seconds": 900.0}
+    assert services[API.name]["30d"]["percent"] == 87.5
+    assert services[ENERGY.name]["7d"]["percent"] == 100.0
+
+    groups = store.availability("group", [API.project_group, ENERGY.project_group])
+    assert groups[API.project_group]["24h"]["percent"] == 87.5
+    assert store.availability("service", ["unknown.service"])["unknown.service"]["24h"]["percent"] is None
+
+
+def test_windows_only_sum_recent_buckets(store, clock):
+    """An outage two days ago no longer counts towards 24h, but does towards 7d."""
+    _run(store, clock, [(HOUR, [_failed(API)]), (2 * HOUR, [API])])
+    later = clock.now + 2 * 86400
+    for offset in range(0, HOUR, 30):
+        store.record(_snapshot(later + offset, API))
+    clock.now = later + HOUR
+
+    windows = store.availability("service", [API.name])[API.name]
+    assert windows["24h"]["percent"] == 100.0
+    assert 66 < windows["7d"]["percent"] < 67
+
+
+def test_unknown_states_and_gaps_are_not_accounted(store, clock):
+    """Collection errors and the monitor being stopped count as neither up nor down."""
+    unknown = replace(API, collection_error="pi2 unavailable (ConnectionError)")
+    _run(store, clock, [(600, [API]), (1200, [unknown]), (1800, [API])])
+    store.record(_snapshot(START + 1800 + 3600, _failed(API)))  # Back after an hour without snapshots
+    clock.now = START + 1800 + 3600 + 60
+
+    windows = store.availability("service", [API.name])[API.name]
+    # 600s before the error, and 540s after it: the time since the last flush is lost with the gap
+    assert windows["24h"]["up_seconds"] == 600.0 + 540.0
+    assert windows["24h"]["down_seconds"] == 60.0
+
+
+def test_incidents(store, clock):
+    """An incident lasts from the first down state until the unit is active again."""
+    _run(
+        store,
+        clock,
+        [
+            (60, [API]),
+            (120, [_failed(API)]),
+            (180, [replace(API, is_active=False)]),
+            (240, [API]),
+            (300, [_failed(API)]),
+        ],
+    )
+
+    ongoing, resolved = store.incidents(service=API.name)
+    assert (ongoing.state, ongoing.started_at, ongoing.ended_at) == ("failed", START + 240, None)
+    assert (resolved.started_at, resolved.duration_seconds) == (START + 60, 120)
+    assert store.incidents(group=API.project_group, limit=1) == [ongoing]
+    assert store.incidents(service=ENERGY.name) == []
+
+
+def test_removed_units_are_not_outages(store, clock):
+    """A unit that left the snapshot (e.g. disabled) counts as neither up nor down, and its outage ends."""
+    _run(store, clock, [(600, [API]), (1200, [_failed(API)]), (1800, [])])
+
+    windows = store.availability("service", [API.name])[API.name]
+    assert windows["24h"]["up_seconds"] == 600.0
+    assert windows["24h"]["down_seconds"] == 600.0
+    [incident] = store.incidents(service=API.name)
+    assert (incident.started_at, incident.ended_at) == (START + 600, START + 1200)
+
+
+def test_state_survives_restart(tmp_path, clock):
+    """A new store continues from the persisted unit states instead of recording them again."""
+    path = tmp_path / "availability.db"
+    store = AvailabilityStore(path=path, clock=clock)
+    _run(store, clock, [(60, [API]), (120, [_failed(API)])])
+
+    restarted = AvailabilityStore(path=path, clock=clock)
+    assert restarted.record(_snapshot(START + 150, _failed(API))) == 0
+    assert restarted.record(_snapshot(START + 180, API)) == 1
+    (incident,) = restarted.incidents(service=API.name)
+    assert incident.ended_at == START + 180
@@ -0,0 +1,56 @@
+"""Tests for the benchmark shim and baseline comparison."""
+
+import asyncio
+import os
+
+from benchmarks import shim
+from benchmarks.run import compare
+from src.engine import CollectionEngine
+from src.journal import JournalReader
+
+
+class StaticCI:
+    def get_statuses(self, repos):
+        return dict.fromkeys(repos, "success")
+
+
+def test_shim_serves_generated_units(tmp_path, monkeypatch):
+    """The fake systemctl/journalctl serve the generated units and log every call."""
+    units = shim.make_units(45)
+    shim.install(tmp_path, units)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+    engine = CollectionEngine(ci=StaticCI(), batch_size=20)
+
+    names = asyncio.run(engine.list_services())
+    assert len(names) == len(set(names)) == 45
+    statuses = asyncio.run(engine.collect_statuses(names))
+    assert [status.name for status in statuses] == names
+    assert sum(status.is_failed for status in statuses) == 2
+    assert all(status.memory_bytes for status in statuses)
+    assert "Memory:" in asyncio.run(engine.collect_info(names[0], 5))
+    assert len(JournalReader().latest(names[0], 7).entries) == 7
+
+    # list-units, 3 show batches, status, journalctl
+    assert shim.call_count(tmp_path) == 6
+
+
+def test_compare_flags_regressions():
+    """Stages slower than the threshold or with more subprocesses are regressions; noise is not."""
+    baseline = {
+        "20": {
+            "collect": {"min_ms": 10.0, "subprocesses": 1},
+            "parse": {"min_ms": 0.01, "subprocesses": 0},
+        }
+    }
+    results = {
+        "20": {
+            "collect": {"min_ms": 14.0, "subprocesses": 2},
+            "parse": {"min_ms": 0.02, "subprocesses": 0},
+            "new": {"min_ms": 1.0, "subprocesses": 0},
+        }
+    }
+    assert compare(results, baseline, threshold=0.25) == [
+        "collect @ 20 units: 14.00ms vs 10.00ms baseline",
+        "collect @ 20 units: 2 subprocesses vs 1",
+    ]
+    assert compare(results, baseline, threshold=0.5) == ["collect @ 20 units: 2 subprocesses vs 1"]
@@ -0,0 +1,183 @@
+"""Tests for ci.py module against a local fake GitHub API server."""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+
+from src.ci import CIStatusCache
+
+
+class FakeGitHub:
+    """In-memory GitHub Actions API: per-repo conclusions, ETags and recorded requests."""
+
+    def __init__(self):
+        self.conclusions: dict[str, str | None] = {}
+        self.status_codes: dict[str, int] = {}
+        self.delay = 0.0
+        self.requests: list[tuple[str, dict]] = []
+        self.lock = threading.Lock()
+
+    def handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                repo = self.path.split("/")[3]
+                with fake.lock:
+                    fake.requests.append((repo, dict(self.headers)))
+                time.sleep(fake.delay)
+                if repo in fake.status_codes:
+                    self.send_response(fake.status_codes[repo])
+                    self.send_header("X-RateLimit-Remaining", "0")
+                    self.end_headers()
+                    return
+                conclusion = fake.conclusions.get(repo)
+                runs = [] if conclusion is None else [{"conclusion": conclusion}]
+                etag = f'"{repo}-{conclusion}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                body = json.dumps({"workflow_runs": runs}).encode()
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def count(self, repo: str) -> int:
+        return sum(1 for requested, _ in self.requests if requested == repo)
+
+
+@pytest.fixture
+def github():
+    """Run a fake GitHub API on a free local port."""
+    fake = FakeGitHub()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), fake.handler())
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    fake.url = f"http://127.0.0.1:{server.server_port}"
+    yield fake
+    server.shutdown()
+    server.server_close()
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.parametrize(
+    "conclusion,expected",
+    [("success", "success"), ("failure", "failure"), ("cancelled", "error"), (None, "error")],
+)
+def test_get_status_maps_conclusion(github, conclusion, expected):
+    """Latest run conclusion maps to success/failure, anything else is an error."""
+    github.conclusions["repo"] = conclusion
+    assert CIStatusCache(base_url=github.url).get_status("repo") == expected
+
+
+def test_get_status_request_error():
+    """Connection errors without a cached value report an error."""
+    cache = CIStatusCache(base_url="http://127.0.0.1:9")
+    assert cache.get_status("repo") == "error"
+
+
+def test_fresh_entries_are_served_from_cache(github):
+    """Within the TTL no request is made."""
+    github.conclusions["repo"] = "success"
+    cache = CIStatusCache(base_url=github.url, ttl=60, clock=FakeClock())
+
+    assert cache.get_status("repo") == "success"
+    github.conclusions["repo"] = "failure"
+    assert cache.get_status("repo") == "success"
+    assert github.count("repo") == 1
+
+
+def test_stale_entries_revalidate_in_background_with_etag(github):
+    """Stale entries are served immediately and revalidated with If-None-Match."""
+    github.conclusions["repo"] = "success"
+    clock = FakeClock()
+    cache = CIStatusCache(base_url=github.url, ttl=60, stale_ttl=600, clock=clock)
+    cache.get_status("repo")
+
+    clock.now += 120
+    assert cache.get_status("repo") == "success"
+    _wait_for(lambda: github.count("repo") == 2)
+    assert github.requests[-1][1]["If-None-Match"] == '"repo-success"'
+
+    # 304 kept the status and reset the age
+    _wait_for(lambda: cache._entries["repo"].fetched_at == clock.now)
+    github.conclusions["repo"] = "failure"
+    clock.now += 120
+    cache.get_status("repo")
+    _wait_for(lambda: cache._entries["repo"].status == "failure")
+
+
+def test_expired_entries_are_fetched_synchronously(github):
+    """Entries older than ttl + stale_ttl are refetched before returning."""
+    github.conclusions["repo"] = "success"
+    clock = FakeClock()
+    cache = CIStatusCache(base_url=github.url, ttl=60, stale_ttl=60, clock=clock)
+    cache.get_status("repo")
+
+    github.conclusions["repo"] = "failure"
+    clock.now += 1000
+    assert cache.get_status("repo") == "failure"
+
+
+def test_errors_keep_last_known_status(github):
+    """A rate-limited refresh keeps the previously cached status."""
+    github.conclusions["repo"] = "success"
+    clock = FakeClock()
+    cache = CIStatusCache(base_url=github.url, ttl=60, stale_ttl=0, clock=clock)
+    cache.get_status("repo")
+
+    github.status_codes["repo"] = 403
+    clock.now += 120
+    assert cache.get_status("repo") == "success"
+
+
+def test_get_statuses_fetches_concurrently(github):
+    """Repos are fetched in parallel on the worker pool."""
+    github.delay = 0.3
+    repos = [f"repo{i}" for i in range(4)]
+    for repo in repos:
+        github.conclusions[repo] = "success"
+    cache = CIStatusCache(base_url=github.url, max_workers=4)
+
+    start = time.monotonic()
+    assert cache.get_statuses(repos + repos) == {repo: "success" for repo in repos}
+    assert time.monotonic() - start < 0.3 * len(repos)
+    assert len(github.requests) == len(repos)
+
+
+def test_authorization_header(github):
+    """Authorization header is sent only when a token is configured."""
+    github.conclusions["repo"] = "success"
+    with patch("src.ci.GITHUB_TOKEN", "ghp_test_token"):
+        CIStatusCache(base_url=github.url).get_status("repo")
+    with patch("src.ci.GITHUB_TOKEN", None):
+        CIStatusCache(base_url=github.url).get_status("repo")
+    assert github.requests[0][1]["Authorization"] == "token ghp_test_token"
+    assert "Authorization" not in github.requests[1][1]
+
+
+def _wait_for(condition, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.01)
@@ -0,0 +1,185 @@
+"""Tests for collector.py module."""
+
+import threading
+import time
+from dataclasses import replace
+from unittest.mock import patch
+
+import pytest
+
+from src.canned_info import canned_service_statuses
+from src.collector import StatusCollector, collect_service_statuses
+
+
+@patch("src.collector.is_linux", return_value=False)
+def test_collect_service_statuses_non_linux(mock_is_linux):
+    """Canned statuses are returned when not running on Linux."""
+    assert collect_service_statuses() == canned_service_statuses
+
+
+@patch("src.collector.is_linux", return_value=True)
+@patch("src.collector.get_services", return_value=["projects_a.service", "projects_b.service"])
+@patch("src.collector.get_service_statuses", side_effect=lambda services: list(services))
+def test_collect_service_statuses_linux(mock_status, mock_services, mock_is_linux):
+    """Statuses are collected for every discovered unit."""
+    assert collect_service_statuses() == ["projects_a.service", "projects_b.service"]
+
+
+def test_get_snapshot_collects_once():
+    """First read triggers a collection, later reads are served from memory."""
+    calls = []
+    collector = StatusCollector(collect_fn=lambda: calls.append(1) or canned_service_statuses[:2])
+
+    snapshot = collector.get_snapshot()
+    assert snapshot.version == 1
+    assert snapshot.services == tuple(canned_service_statuses[:2])
+    assert collector.get_snapshot() is snapshot
+    assert len(calls) == 1
+
+
+def test_refresh_bumps_version_only_on_change():
+    """Version stays the same when statuses are unchanged."""
+    results = [canned_service_statuses[:2], canned_service_statuses[:2], canned_service_statuses[:3]]
+    collector = StatusCollector(collect_fn=lambda: results.pop(0))
+
+    assert collector.refresh().version == 1
+    assert collector.refresh().version == 1
+    assert collector.refresh().version == 2
+
+
+def test_refresh_ignores_growing_uptime():
+    """A unit that only kept running (same start time, longer uptime) does not bump the version."""
+    status = canned_service_statuses[0]
+    results = [[status], [replace(status, uptime="3 days", uptime_seconds=259200)]]
+    collector = StatusCollector(collect_fn=lambda: results.pop(0))
+
+    assert collector.refresh().version == 1
+    assert collector.refresh().version == 1
+
+
+def test_refresh_keeps_previous_snapshot_on_error():
+    """A failing collection leaves the last good snapshot in place."""
+    results = [canned_service_statuses[:1], RuntimeError("systemctl broke")]
+
+    def collect():
+        result = results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    collector = StatusCollector(collect_fn=collect)
+    first = collector.refresh()
+    assert collector.refresh() is first
+
+
+def test_refresh_is_single_flight():
+    """Concurrent refreshes share one collection."""
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow_collect():
+        calls.append(1)
+        started.set()
+        release.wait(timeout=5)
+        return canned_service_statuses
+
+    collector = StatusCollector(collect_fn=slow_collect)
+    results = []
+    leader = threading.Thread(target=lambda: results.append(collector.refresh()))
+    leader.start()
+    started.wait(timeout=5)
+    followers = [threading.Thread(target=lambda: results.append(collector.refresh())) for _ in range(5)]
+    for thread in followers:
+        thread.start()
+    time.sleep(0.2)  # let followers reach refresh() while the leader is still collecting
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(timeout=5)
+
+    assert len(calls) == 1
+    assert len(results) == 6
+    assert all(result.version == 1 for result in results)
+
+
+def test_refresh_units_merges_into_snapshot():
+    """Partial refreshes replace only the re-collected units."""
+    services = canned_service_statuses[:3]
+    updated = replace(services[1], is_active=False, is_failed=True)
+    collector = StatusCollector(collect_fn=lambda: services, collect_units_fn=lambda units: [updated])
+    collector.refresh()
+
+    snapshot = collector.refresh_units([updated.name])
+    assert snapshot.version == 2
+    assert snapshot.services == (services[0], updated, services[2])
+    assert snapshot.changed_since(1) == [updated]
+    assert snapshot.changed_since(0) == list(snapshot.services)
+
+
+def test_retired_units_are_left_out():
+    """Stopped units that are disabled or no longer loaded are not listed; a disabled running unit is."""
+    active, stopped, removed = canned_service_statuses[:3]
+    running = replace(active, unit_file_state="disabled")
+    disabled = replace(stopped, is_active=False, unit_file_state="disabled")
+    collector = StatusCollector(
+        collect_fn=lambda: [running, disabled, removed],
+        collect_units_fn=lambda units: [replace(removed, is_active=False, load_state="not-found")],
+    )
+    assert collector.refresh().services == (running, removed)
+    assert collector.refresh_units([removed.name]).services == (running,)
+
+
+def test_listeners_run_on_version_change():
+    """Listeners receive (previous, current) only when the version changes."""
+    results = [canned_service_statuses[:1], canned_service_statuses[:1], canned_service_statuses[:2]]
+    collector = StatusCollector(collect_fn=lambda: results.pop(0))
+    calls = []
+    collector.add_listener(lambda previous, current: calls.append((previous.version, current.version)))
+    collector.add_listener(lambda previous, current: 1 / 0)  # failing listeners are isolated
+
+    collector.refresh()
+    collector.refresh()
+    collector.refresh()
+    assert calls == [(0, 1), (1, 2)]
+
+
+def test_start_and_stop():
+    """Background thread collects on its own and stops cleanly."""
+    collected = threading.Event()
+    collector = StatusCollector(collect_fn=lambda: collected.set() or [], interval=60)
+
+    collector.start()
+    assert collected.wait(timeout=5)
+    collector.stop()
+    assert collector._thread is None
+
+
+def test_collection_error_keeps_last_known_status():
+    """A unit that could not be collected keeps its previous status, marked with the error."""
+    healthy = canned_service_statuses[0]
+    results = [[healthy], [replace(healthy, is_active=False, collection_error="systemctl show timed out")]]
+    collector = StatusCollector(collect_fn=lambda: results.pop(0))
+
+    collector.refresh()
+    (status,) = collector.refresh().services
+    assert status.is_active and status.uptime == healthy.uptime
+    assert status.collection_error == "systemctl show timed out"
+
+
+def test_adopt_keeps_version_and_epoch():
+    """Adopted snapshots keep the publishing process' version and epoch and notify listeners."""
+    source = StatusCollector(collect_fn=lambda: canned_service_statuses[:2])
+    published = source.refresh()
+    follower = StatusCollector(collect_fn=lambda: pytest.fail("followers never collect"))
+    follower.follower = True
+    events = []
+    follower.add_listener(lambda previous, current: events.append(current.version))
+
+    assert follower.get_snapshot().version == 0
+    follower.adopt(published, source.epoch)
+    follower.adopt(replace(published, collected_at=time.time()), source.epoch)
+
+    assert follower.get_snapshot().version == published.version
+    assert follower.epoch == source.epoch
+    assert follower.refresh_units(["projects_a.service"]).version == published.version
+    assert events == [published.version]
@@ -0,0 +1,56 @@
+"""Tests for database.py module."""
+
+import asyncio
+import os
+
+from src.database import (
+    SLOTS_SCHEMA,
+    SerialWriter,
+    add_column,
+    claim_slot,
+    connect,
+    process_alive,
+    release_slot,
+)
+
+
+def test_connect_uses_wal_and_creates_schema(tmp_path):
+    """Databases are created with their parent directory, in WAL mode."""
+    db = connect(tmp_path / "new" / "store.db", "CREATE TABLE IF NOT EXISTS t (a INTEGER);")
+    assert db.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+    add_column(db, "t", "b", "TEXT")
+    add_column(db, "t", "b", "TEXT")
+    assert [row[1] for row in db.execute("PRAGMA table_info(t)")] == ["a", "b"]
+
+
+def test_serial_writer_keeps_order():
+    """Writes submitted from the event loop run one at a time, in submission order."""
+    writer = SerialWriter("test")
+    written = []
+
+    async def main():
+        await asyncio.gather(*(writer.run(written.append, i) for i in range(20)))
+
+    asyncio.run(main())
+    assert written == list(range(20))
+
+
+def test_process_alive():
+    """Rows of exited processes can be told apart from those of running ones."""
+    assert process_alive(os.getpid())
+    assert not process_alive(2147483647)
+
+
+def test_claim_slot_limits_all_connections(tmp_path):
+    """Slots are counted across connections (processes); those of exited processes are freed."""
+    path = tmp_path / "store.db"
+    first, second = connect(path, SLOTS_SCHEMA), connect(path, SLOTS_SCHEMA)
+    assert claim_slot(first, "a", limit=1)
+    assert not claim_slot(second, "b", limit=1)
+    release_slot(first, "a")
+    assert claim_slot(second, "b", limit=1)
+
+    with second:
+        second.execute("UPDATE slots SET pid = 2147483647")
+    assert claim_slot(first, "c", limit=1)
+    assert first.execute("SELECT key FROM slots").fetchall() == [("c",)]
@@ -0,0 +1,80 @@
+"""Tests for discovery.py module against temp directories of fake unit files."""
+
+import os
+import time
+from unittest.mock import patch
+
+import pytest
+
+from src.discovery import UnitDiscovery, is_monitored, scan_unit_dirs
+
+
+@pytest.fixture
+def unit_dirs(tmp_path):
+    """An /etc and a /lib unit directory with a couple of monitored units."""
+    etc, lib = tmp_path / "etc", tmp_path / "lib"
+    etc.mkdir()
+    lib.mkdir()
+    for name in ("projects_api.service", "projects_energy-monitor.service", "ssh.service"):
+        (lib / name).write_text("[Service]\n")
+    return etc, lib
+
+
+def _touch_dir(directory, mtime: float) -> None:
+    """Set a distinct mtime, as adding an entry would, without depending on the timestamp tick."""
+    os.utime(directory, (mtime, mtime))
+
+
+def test_is_monitored():
+    """A unit must match an include pattern and no exclude pattern."""
+    assert is_monitored("projects_api.service", ["projects_*"], [])
+    assert not is_monitored("ssh.service", ["projects_*"], [])
+    assert is_monitored("ssh.service", ["projects_*", "ssh.service"], [])
+    assert not is_monitored("projects_api_test.service", ["projects_*"], ["*_test.service"])
+
+
+def test_scan_unit_dirs(unit_dirs, tmp_path):
+    """Templates, other unit types, aliases and masked units are skipped; /etc takes precedence."""
+    etc, lib = unit_dirs
+    (lib / "projects_worker@.service").write_text("[Service]\n")
+    (lib / "projects_api.timer").write_text("[Timer]\n")
+    (lib / "projects_api_test.service").write_text("[Service]\n")
+    (etc / "projects_energy-monitor.service").symlink_to("/dev/null")  # systemctl mask
+    (etc / "projects_alias.service").symlink_to(lib / "projects_api.service")
+    elsewhere = tmp_path / "home" / "projects_linked.service"
+    elsewhere.parent.mkdir()
+    elsewhere.write_text("[Service]\n")
+    (etc / "projects_linked.service").symlink_to(elsewhere)  # systemctl link
+
+    units = scan_unit_dirs([etc, lib, tmp_path / "missing"], ["projects_*"], ["*_test.service"])
+    assert units == ["projects_api.service", "projects_linked.service"]
+
+
+def test_discovery_rescans_only_after_a_directory_changed(unit_dirs):
+    """Lookups reuse the cached names until a directory's mtime changes."""
+    etc, lib = unit_dirs
+    _touch_dir(etc, 1_000_000)
+    _touch_dir(lib, 1_000_000)
+    discovery = UnitDiscovery([etc, lib], ["projects_*"], [], clock=lambda: 2_000_000)
+
+    with patch("src.discovery.scan_unit_dirs", wraps=scan_unit_dirs) as scan:
+        assert discovery.units() == ["projects_api.service", "projects_energy-monitor.service"]
+        assert discovery.units() == ["projects_api.service", "projects_energy-monitor.service"]
+        assert scan.call_count == 1
+
+        (etc / "projects_pingpong.service").write_text("[Service]\n")
+        _touch_dir(etc, 1_000_100)
+        assert "projects_pingpong.service" in discovery.units()
+        (lib / "projects_api.service").unlink()
+        _touch_dir(lib, 1_000_200)
+        assert discovery.units() == ["projects_energy-monitor.service", "projects_pingpong.service"]
+        assert scan.call_count == 3
+
+
+def test_recently_changed_directories_are_not_trusted(unit_dirs):
+    """A directory changed within the mtime resolution is scanned again on the next lookup."""
+    discovery = UnitDiscovery(unit_dirs, ["projects_*"], [], clock=time.time)
+    with patch("src.discovery.scan_unit_dirs", wraps=scan_unit_dirs) as scan:
+        discovery.units()
+        discovery.units()
+    assert scan.call_count == 2
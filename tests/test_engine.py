@@ -0,0 +1,107 @@
+"""Tests for engine.py module against a fake systemctl on PATH."""
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from src.engine import CollectionEngine
+
+FAKE_SYSTEMCTL = Path(__file__).parent / "fixtures" / "fake_systemctl.py"
+
+
+@pytest.fixture(autouse=True)
+def fake_systemctl(tmp_path, monkeypatch):
+    """Put a `systemctl` that serves the show fixture first on PATH."""
+    script = tmp_path / "systemctl"
+    script.write_text(f'#!/bin/sh\nexec {sys.executable} {FAKE_SYSTEMCTL} "$@"\n')
+    script.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{tmp_path}:{Path(sys.executable).parent}:/usr/bin:/bin")
+
+
+class FakeCI:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = []
+
+    def get_statuses(self, repos):
+        self.calls.append(repos)
+        time.sleep(self.delay)
+        return {repo: "success" for repo in repos}
+
+
+def test_collect_all():
+    """Units are listed and collected, with CI status for services without a suffix."""
+    ci = FakeCI()
+    engine = CollectionEngine(ci=ci, batch_size=2)
+    statuses = engine.run(engine.collect_all())
+
+    assert [status.name for status in statuses][:2] == [
+        "projects_energy-monitor.service",
+        "projects_energy-monitor_mqtt.service",
+    ]
+    assert statuses[0].memory == "123.4M" and statuses[0].ci_status == "success"
+    assert statuses[1].ci_status is None
+    assert all(status.collection_error is None for status in statuses)
+    # One CI lookup for all repos, concurrent with the systemctl batches
+    assert ci.calls == [["energy-monitor", "trainspotter", "wordle-alarm"]]
+
+
+def test_timeouts_return_partial_results():
+    """A hung batch is killed at the deadline; the other batches still return."""
+    engine = CollectionEngine(ci=FakeCI(), batch_size=1, timeout=0.5)
+    start = time.monotonic()
+    ok, slow = engine.run(
+        engine.collect_statuses(["projects_energy-monitor.service", "projects_slow.service"])
+    )
+    assert time.monotonic() - start < 2
+
+    assert ok.is_active and ok.collection_error is None
+    assert slow.name == "projects_slow.service" and slow.project_group == "slow"
+    assert "timed out" in slow.collection_error
+    assert slow.ci_status is None
+
+
+def test_failed_batch_is_marked():
+    """A failing systemctl call marks only the services in its batch."""
+    engine = CollectionEngine(ci=FakeCI(), batch_size=1)
+    ok, broken = engine.run(
+        engine.collect_statuses(["projects_energy-monitor.service", "projects_broken.service"])
+    )
+    assert ok.collection_error is None
+    assert "Failed to connect to bus" in broken.collection_error
+
+
+def test_slow_ci_does_not_block_statuses():
+    """CI lookups past the deadline leave ci_status empty."""
+    engine = CollectionEngine(ci=FakeCI(delay=1.0), timeout=0.3)
+    (status,) = engine.run(engine.collect_statuses(["projects_energy-monitor.service"]))
+    assert status.is_active and status.ci_status is None
+
+
+def test_concurrency_is_bounded():
+    """No more than max_concurrency systemctl calls run at once."""
+    engine = CollectionEngine(ci=FakeCI(), batch_size=1, max_concurrency=1, timeout=0.3)
+    start = time.monotonic()
+    statuses = engine.run(engine.collect_statuses(["projects_slow-a.service", "projects_slow-b.service"]))
+    assert time.monotonic() - start >= 0.6
+    assert all(status.collection_error for status in statuses)
+
+
+def test_collect_info_and_sync_bridge_from_threads():
+    """Blocking callers on several threads share the engine's loop; non-zero exit codes are not errors."""
+    engine = CollectionEngine(ci=FakeCI())
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(engine.run(engine.collect_info("projects_a.service", 0)))
+        )
+        for _ in range(3)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ["* projects_a.service - Fake unit\n"] * 3
@@ -0,0 +1,95 @@
+"""Tests for events.py module."""
+
+import json
+from unittest.mock import patch
+
+from src.canned_info import canned_service_statuses
+from src.collector import StatusCollector
+from src.events import RESYNC, EventBroker, missed_events, snapshot_publisher, stream
+
+
+def test_publish_fans_out_to_subscribers():
+    """Every subscriber receives the same serialized event."""
+    broker = EventBroker()
+    first, second = broker.subscribe(), broker.subscribe()
+
+    event = broker.publish("snapshot", {"version": 1}, "abc-1")
+    assert first.wait(timeout=0) == [event]
+    assert second.wait(timeout=0) == [event]
+    assert event.encode() == 'id: abc-1\nevent: snapshot\ndata: {"version":1}\n\n'
+
+
+def test_slow_client_buffer_is_bounded():
+    """A client that falls behind gets a single resync event instead of a growing backlog."""
+    broker = EventBroker(buffer_size=3)
+    subscription = broker.subscribe()
+    for version in range(10):
+        broker.publish("snapshot", {"version": version})
+
+    assert subscription.wait(timeout=0) == [RESYNC]
+    assert subscription.wait(timeout=0) == []
+
+
+def test_subscribe_pushes_replay_first():
+    """Events returned by the replay callback are delivered before anything published later."""
+    broker = EventBroker()
+    subscription = broker.subscribe(lambda: [RESYNC])
+    event = broker.publish("snapshot", {"version": 1})
+
+    assert subscription.wait(timeout=0) == [RESYNC, event]
+
+
+def test_missed_events_from_shared_snapshot():
+    """Last-Event-ID `<epoch>-<version>` gets one delta up to the current snapshot in any worker."""
+    services = list(canned_service_statuses[:3])
+    collector = StatusCollector(collect_fn=lambda: list(services))
+    collector.refresh()
+    services[0] = canned_service_statuses[4]
+    collector.refresh()
+    # Another worker: a different broker, following the same snapshot
+    worker = StatusCollector(collect_fn=list)
+    worker.adopt(collector.get_snapshot(), collector.epoch)
+
+    with patch("src.events.collector", worker):
+        (event,) = missed_events(f"{collector.epoch}-1")
+        assert missed_events(f"{collector.epoch}-2") == []
+        assert missed_events(f"{collector.epoch}-3") == []
+        assert missed_events("0-1") == [RESYNC]
+        assert missed_events("1") == [RESYNC]
+        assert missed_events(None) == []
+
+    assert event.id == f"{collector.epoch}-2"
+    data = json.loads(event.data)
+    assert data["since"] == 1 and data["version"] == 2
+    assert [svc["name"] for svc in data["services"]] == [canned_service_statuses[4].name]
+
+
+def test_stream_heartbeat_and_unsubscribe():
+    """Stream sends a heartbeat when idle and unsubscribes when the client goes away."""
+    with patch("src.events.broker", EventBroker()) as broker:
+        messages = stream(broker.subscribe(), heartbeat=0)
+        assert next(messages).startswith("retry:")
+        assert next(messages) == ": heartbeat\n\n"
+        assert broker.client_count == 1
+        messages.close()
+        assert broker.client_count == 0
+
+
+def test_publish_snapshot_sends_delta():
+    """Snapshot changes are published as deltas against the previous version."""
+    services = list(canned_service_statuses[:3])
+    collector = StatusCollector(collect_fn=lambda: list(services))
+    previous = collector.refresh()
+    services[0] = canned_service_statuses[4]
+    current = collector.refresh()
+
+    with patch("src.events.broker", EventBroker()) as broker, patch("src.events.collector", collector):
+        subscription = broker.subscribe()
+        snapshot_publisher(lambda snapshot, epoch, status: f"<div>{status.name}</div>")(previous, current)
+
+    (event,) = subscription.wait(timeout=0)
+    assert event.id == f"{collector.epoch}-2"
+    data = json.loads(event.data)
+    assert data["since"] == 1 and data["version"] == 2 and data["epoch"] == collector.epoch
+    assert [svc["name"] for svc in data["services"]] == [canned_service_statuses[4].name]
+    assert data["services"][0]["html"] == f"<div>{canned_service_statuses[4].name}</div>"
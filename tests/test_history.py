@@ -0,0 +1,90 @@
+"""Tests for history.py module."""
+
+from dataclasses import replace
+
+from src.canned_info import canned_service_statuses
+from src.collector import Snapshot
+from src.history import HistoryStore, RingSeries, downsample
+
+SERVICE = replace(canned_service_statuses[0], memory_bytes=100, cpu_nsec=0)
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000_020):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _record(store: HistoryStore, timestamp: float, memory: int, cpu_nsec: int) -> None:
+    status = replace(SERVICE, memory_bytes=memory, cpu_nsec=cpu_nsec)
+    store.record(Snapshot(version=1, services=(status,), collected_at=timestamp))
+
+
+def test_ring_series_averages_buckets_and_wraps():
+    """Samples are averaged per bucket and old buckets are overwritten in place."""
+    series = RingSeries(step=60, capacity=3)
+    assert series.add(0, 1.0) is None
+    assert series.add(30, 3.0) is None
+    assert series.add(60, 5.0) == (0, 2.0)
+    for minute in range(2, 6):
+        series.add(minute * 60, float(minute))
+
+    assert series.query(0, 400) == [(120, 2.0), (180, 3.0), (240, 4.0), (300, 5.0)]
+    assert len(series.timestamps) == 3
+
+
+def test_record_memory_and_cpu_rate():
+    """Memory is sampled as-is and CPU as a rate between samples."""
+    clock = FakeClock()
+    store = HistoryStore(path=None, clock=clock)
+    _record(store, 1_000_000, memory=100, cpu_nsec=0)
+    _record(store, 1_000_010, memory=300, cpu_nsec=5_000_000_000)
+
+    step, memory = store.query(SERVICE.name, "memory", window=3600)
+    assert step == 60 and memory == [(999_960, 200.0)]
+    assert store.query(SERVICE.name, "cpu", window=3600)[1] == [(999_960, 50.0)]
+    assert store.query(SERVICE.name, "memory", window=7 * 86400)[0] == 3600
+    assert store.query("unknown.service", "memory", window=3600)[1] == []
+
+
+def test_samples_closer_than_min_interval_are_skipped():
+    """Back-to-back snapshots (e.g. from the unit watcher) don't skew the averages."""
+    store = HistoryStore(path=None, clock=FakeClock())
+    _record(store, 1_000_000, memory=100, cpu_nsec=0)
+    _record(store, 1_000_001, memory=900, cpu_nsec=0)
+    assert store.query(SERVICE.name, "memory", window=3600)[1] == [(999_960, 100.0)]
+
+
+def test_history_persists_closed_buckets(tmp_path):
+    """Closed buckets survive a restart."""
+    path = tmp_path / "history.db"
+    clock = FakeClock(now=1_000_200)
+    store = HistoryStore(path=path, clock=clock)
+    _record(store, 1_000_000, memory=100, cpu_nsec=0)
+    _record(store, 1_000_070, memory=200, cpu_nsec=0)
+
+    restarted = HistoryStore(path=path, clock=clock)
+    assert restarted.query(SERVICE.name, "memory", window=3600)[1] == [(999_960, 100.0)]
+
+
+def test_downsample():
+    """Consecutive points are averaged down to the requested count."""
+    points = [(i, float(i)) for i in range(10)]
+    assert downsample(points, 20) == points
+    assert downsample(points, 5) == [(0, 0.5), (2, 2.5), (4, 4.5), (6, 6.5), (8, 8.5)]
+
+
+def test_read_only_store_does_not_persist(tmp_path):
+    """A read-only store (web worker) samples into memory but leaves the database to the collector."""
+    path = tmp_path / "history.db"
+    clock = FakeClock(now=1_000_200)
+    store = HistoryStore(path=path, clock=clock)
+    store.read_only = True
+    _record(store, 1_000_000, memory=100, cpu_nsec=0)
+    _record(store, 1_000_070, memory=200, cpu_nsec=0)
+
+    assert store.query(SERVICE.name, "memory", window=3600)[1] == [(999_960, 100.0), (1_000_020, 200.0)]
+    restarted = HistoryStore(path=path, clock=clock)
+    assert restarted.query(SERVICE.name, "memory", window=3600)[1] == []
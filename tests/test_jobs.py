@@ -0,0 +1,153 @@
+"""Tests for jobs.py module."""
+
+import asyncio
+import threading
+import time
+
+from src.engine import CollectionError
+from src.jobs import INTERRUPTED, JobStore, RestartJob, RestartJobs, UnitProgress
+
+
+class FakeEngine:
+    """Runs jobs to completion inside `submit` and plays back unit states."""
+
+    def __init__(self, states: dict[str, list[dict]], fail_restart: set[str] = frozenset()):
+        self.states = states
+        self.fail_restart = fail_restart
+        self.restarted = []
+        self.running = 0
+        self.max_running = 0
+
+    def submit(self, coroutine):
+        asyncio.run(coroutine)
+
+    async def restart(self, unit):
+        if unit in self.fail_restart:
+            raise CollectionError("sudo systemctl failed: not allowed")
+        self.restarted.append(unit)
+
+    async def unit_state(self, unit):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(0.001)
+        self.running -= 1
+        states = self.states[unit]
+        return states.pop(0) if len(states) > 1 else states[0]
+
+
+def _state(invocation, active="active", sub="running"):
+    return {"ActiveState": active, "SubState": sub, "InvocationID": invocation}
+
+
+def test_job_status_aggregates_units():
+    """A job is running until every unit is done, and failed if any unit failed."""
+    job = RestartJob(id="j", target="g", units=[UnitProgress("a"), UnitProgress("b")])
+    assert job.status == "queued"
+    job.units[0].state = "failed"
+    assert job.status == "running"
+    job.finished_at = time.time()
+    assert job.status == "failed"
+    job.units[0].state = job.units[1].state = "active"
+    assert job.status == "active"
+    assert RestartJob.from_dict(job.to_dict()) == job
+
+
+def test_job_store_keeps_recent_jobs():
+    """Only the newest `max_jobs` jobs are kept."""
+    store = JobStore(path=None, max_jobs=2)
+    for i in range(3):
+        store.save(RestartJob(id=str(i), target="a", units=[], created_at=i))
+    assert [job.id for job in store.recent()] == ["2", "1"]
+    assert store.get("0") is None
+
+
+def test_restart_waits_for_new_invocation():
+    """A unit is active only once it runs under a new invocation, not while the old one still runs."""
+    engine = FakeEngine(
+        {"a": [_state("old"), _state("old"), _state("new", "activating", "start"), _state("new")]}
+    )
+    jobs = RestartJobs(JobStore(path=None), engine=engine, poll_interval=0)
+
+    job = jobs.submit("a", ["a"])
+    saved = jobs.store.get(job.id)
+    assert saved.status == "active"
+    assert saved.finished_at is not None
+    assert engine.restarted == ["a"]
+
+
+def test_restart_failures_and_timeout():
+    """Failed units, refused restarts and units that never come back fail the job."""
+    engine = FakeEngine(
+        {
+            "failed": [_state("old"), _state("new", "failed", "failed")],
+            "stuck": [_state("old")],
+            "refused": [_state("old")],
+            "ok": [_state("old"), _state("new")],
+        },
+        fail_restart={"refused"},
+    )
+    jobs = RestartJobs(JobStore(path=None), engine=engine, timeout=0.05, poll_interval=0.01)
+
+    job = jobs.store.get(jobs.submit("g", ["failed", "stuck", "refused", "ok"]).id)
+    assert job.status == "failed"
+    assert {progress.unit: progress.state for progress in job.units} == {
+        "failed": "failed",
+        "stuck": "failed",
+        "refused": "failed",
+        "ok": "active",
+    }
+    assert "not running after" in job.units[1].error
+    assert "not allowed" in job.units[2].error
+
+
+def test_group_restart_parallelism_is_bounded():
+    """No more than `max_parallel` units are restarted at the same time."""
+    units = [f"u{i}" for i in range(6)]
+    engine = FakeEngine({unit: [_state("old"), _state("new")] for unit in units})
+    jobs = RestartJobs(JobStore(path=None), engine=engine, max_parallel=2, poll_interval=0)
+
+    assert jobs.store.get(jobs.submit("g", units).id).status == "active"
+    assert engine.max_running == 2
+    assert sorted(engine.restarted) == units
+
+
+def test_parallelism_is_bounded_across_stores(tmp_path):
+    """A slot taken by another worker's store counts against `max_parallel` until released."""
+    path = tmp_path / "jobs.db"
+    other_worker = JobStore(path=path)
+    assert other_worker._claim("other/u", 1)
+    engine = FakeEngine({"u": [_state("old"), _state("new")]})
+    jobs = RestartJobs(JobStore(path=path), engine=engine, max_parallel=1, poll_interval=0.01)
+
+    threading.Timer(0.2, other_worker._release, ("other/u",)).start()
+    started = time.monotonic()
+    job = jobs.submit("u", ["u"])
+    assert time.monotonic() - started >= 0.2
+    assert jobs.store.get(job.id).status == "active"
+    assert jobs.store._claim("next/u", 1)  # Released after the restart
+
+
+def test_unfinished_jobs_of_exited_processes_fail_on_open(tmp_path):
+    """A job left running by a process that is gone is marked failed; live processes keep theirs."""
+    path = tmp_path / "jobs.db"
+    store = JobStore(path=path)
+    running = RestartJob(
+        id="orphan", target="a", units=[UnitProgress("a", "active"), UnitProgress("b", "running")]
+    )
+    store.save(running)
+    store.save(RestartJob(id="live", target="c", units=[UnitProgress("c", "running")]))
+    store._connect().execute("UPDATE jobs SET pid = 2147483647 WHERE id = 'orphan'")
+    store._connect().commit()
+
+    reopened = JobStore(path=path)
+    orphan = reopened.get("orphan")
+    assert orphan.status == "failed" and orphan.finished_at is not None
+    assert [(unit.state, unit.error) for unit in orphan.units] == [("active", None), ("failed", INTERRUPTED)]
+    assert reopened.get("live").status == "running"
+
+    # A worker that exits later is noticed without opening the store again
+    reopened.save(RestartJob(id="later", target="d", units=[UnitProgress("d", "running")]))
+    reopened._connect().execute("UPDATE jobs SET pid = 2147483647 WHERE id = 'later'")
+    reopened._connect().commit()
+    reopened.fail_orphans()
+    assert reopened.get("later").status == "failed"
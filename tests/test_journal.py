@@ -0,0 +1,81 @@
+"""Tests for journal.py module."""
+
+import json
+from unittest.mock import patch
+
+from src.journal import JournalEntry, JournalReader
+
+
+def _journal_output(*cursors: str) -> str:
+    records = [
+        {
+            "__CURSOR": cursor,
+            "__REALTIME_TIMESTAMP": str(1_700_000_000_000_000 + i),
+            "PRIORITY": "6",
+            "MESSAGE": cursor,
+        }
+        for i, cursor in enumerate(cursors)
+    ]
+    return "\n".join(json.dumps(record) for record in records)
+
+
+@patch("src.journal.subprocess.run")
+def test_latest_page(mock_run):
+    """Latest page requests the newest entries as JSON with only the needed fields."""
+    mock_run.return_value.returncode = 0
+    mock_run.return_value.stdout = _journal_output("c1", "c2", "c3")
+
+    page = JournalReader().latest("projects_test.service", limit=3)
+
+    cmd = mock_run.call_args.args[0]
+    assert cmd[:5] == [
+        "journalctl",
+        "--unit=projects_test.service",
+        "--output=json",
+        "--output-fields=MESSAGE,PRIORITY",
+        "--no-pager",
+    ]
+    assert cmd[-1] == "--lines=3"
+    assert [entry.message for entry in page.entries] == ["c1", "c2", "c3"]
+    assert (page.first_cursor, page.last_cursor) == ("c1", "c3")
+    assert page.entries[0] == JournalEntry(timestamp=1_700_000_000_000_000, priority=6, message="c1")
+
+
+@patch("src.journal.subprocess.run")
+def test_after_cursor(mock_run):
+    """Tailing asks journalctl only for entries after the cursor."""
+    mock_run.return_value.returncode = 0
+    mock_run.return_value.stdout = _journal_output("c4")
+
+    page = JournalReader().after("projects_test.service", "c3")
+
+    assert "--after-cursor=c3" in mock_run.call_args.args[0]
+    assert page.last_cursor == "c4"
+
+
+@patch("src.journal.subprocess.run")
+def test_before_cursor_is_cached(mock_run):
+    """Older pages walk backwards from the cursor, drop it, and are served from the LRU cache."""
+    mock_run.return_value.returncode = 0
+    mock_run.return_value.stdout = _journal_output("c3", "c2", "c1")
+    reader = JournalReader(cache_size=1)
+
+    page = reader.before("projects_test.service", "c3", limit=2)
+    assert [entry.message for entry in page.entries] == ["c1", "c2"]
+    assert "--reverse" in mock_run.call_args.args[0]
+    assert reader.before("projects_test.service", "c3", limit=2) is page
+    assert mock_run.call_count == 1
+
+    # Evicted once another page is read
+    reader.before("projects_test.service", "c1", limit=2)
+    reader.before("projects_test.service", "c3", limit=2)
+    assert mock_run.call_count == 3
+
+
+@patch("src.journal.subprocess.run")
+def test_journalctl_failure(mock_run):
+    """A failing journalctl returns an empty page."""
+    mock_run.return_value.returncode = 1
+    mock_run.return_value.stderr = "No journal files were found."
+    page = JournalReader().latest("projects_test.service")
+    assert page.entries == [] and page.first_cursor is None
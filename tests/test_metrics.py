@@ -0,0 +1,126 @@
+"""Tests for metrics.py module."""
+
+import json
+import os
+
+import pytest
+
+from src.metrics import (
+    CallbackGauge,
+    Counter,
+    Gauge,
+    Histogram,
+    Registry,
+    SharedMetrics,
+)
+
+
+def test_counter_and_gauge():
+    """Counters add up per label set; gauges hold the last value."""
+    registry = Registry()
+    requests = Counter("requests_total", "Requests", ("status",), registry=registry)
+    depth = Gauge("queue_depth", "Depth", registry=registry)
+    requests.inc(status=200)
+    requests.inc(2, status=200)
+    requests.inc(status=429)
+    depth.set(3)
+
+    assert registry.render() == (
+        "# HELP requests_total Requests\n"
+        "# TYPE requests_total counter\n"
+        'requests_total{status="200"} 3\n'
+        'requests_total{status="429"} 1\n'
+        "# HELP queue_depth Depth\n"
+        "# TYPE queue_depth gauge\n"
+        "queue_depth 3\n"
+    )
+    with pytest.raises(ValueError):
+        requests.inc(code=200)
+    with pytest.raises(ValueError):
+        Counter("requests_total", "Duplicate", registry=registry)
+
+
+def test_histogram_buckets_are_cumulative():
+    """Histogram buckets count observations at or below each bound."""
+    registry = Registry()
+    duration = Histogram("duration_seconds", "Duration", ("job",), buckets=(0.1, 1.0), registry=registry)
+    for value in (0.05, 0.1, 0.5, 3.0):
+        duration.observe(value, job="check")
+    with duration.time(job="check"):
+        pass
+
+    lines = registry.render().splitlines()
+    assert 'duration_seconds_bucket{job="check",le="0.1"} 3' in lines
+    assert 'duration_seconds_bucket{job="check",le="1"} 4' in lines
+    assert 'duration_seconds_bucket{job="check",le="+Inf"} 5' in lines
+    assert 'duration_seconds_count{job="check"} 5' in lines
+    assert duration.count(job="check") == 5
+
+
+def test_callback_gauge_escapes_labels_and_skips_missing_values():
+    """Callback gauges are computed at render time; None values are left out."""
+    registry = Registry()
+    values = [({"service": 'a"b\\c'}, 1.5), ({"service": "stopped"}, None)]
+    CallbackGauge("memory_bytes", "Memory", lambda: values, ("service",), registry=registry)
+
+    assert registry.render().splitlines()[-1] == 'memory_bytes{service="a\\"b\\\\c"} 1.5'
+
+
+def _processes_metrics(registry: Registry) -> tuple[Counter, Gauge, Histogram]:
+    CallbackGauge("snapshot_version", "Version", lambda: [({}, 7)], registry=registry, shared=False)
+    return (
+        Counter("requests_total", "Requests", ("status",), registry=registry),
+        Gauge("stream_clients", "Clients", registry=registry),
+        Histogram("duration_seconds", "Duration", buckets=(1.0,), registry=registry),
+    )
+
+
+def test_shared_metrics_add_up_processes(tmp_path):
+    """/metrics adds up the other processes' counters, histograms and gauges, not per-process gauges."""
+    registry, worker = Registry(), Registry()
+    requests, clients, duration = _processes_metrics(registry)
+    worker_requests, worker_clients, worker_duration = _processes_metrics(worker)
+    requests.inc(status=200)
+    clients.set(1)
+    duration.observe(0.5)
+    worker_requests.inc(2, status=200)
+    worker_requests.inc(status=500)
+    worker_clients.set(2)
+    worker_duration.observe(3.0)
+    # Registered only in the other process, e.g. by a module this one never imported
+    Histogram("alert_seconds", "Alerts", buckets=(1.0,), registry=worker).observe(0.5)
+    assert "snapshot_version" not in worker.state()
+
+    (tmp_path / f"{os.getppid()}.json").write_text(json.dumps(worker.state()))
+    # An exited worker (above the largest pid) still counts for counters and histograms, not gauges
+    (tmp_path / "4194305.json").write_text(json.dumps(worker.state()))
+    (tmp_path / "stale.json").write_text("{}")
+    registry.shared = SharedMetrics(tmp_path, registry)
+
+    lines = registry.render().splitlines()
+    assert 'requests_total{status="200"} 5' in lines
+    assert 'requests_total{status="500"} 2' in lines
+    assert "stream_clients 3" in lines
+    assert 'duration_seconds_bucket{le="1"} 1' in lines
+    assert "duration_seconds_count 3" in lines
+    assert "duration_seconds_sum 6.5" in lines
+    assert "snapshot_version 7" in lines
+    assert "# TYPE alert_seconds histogram" in lines
+    assert 'alert_seconds_bucket{le="1"} 2' in lines
+
+
+def test_shared_metrics_write_and_reset(tmp_path):
+    """A process writes its state under its pid; reset clears the previous run's files."""
+    registry = Registry()
+    requests, _, _ = _processes_metrics(registry)
+    requests.inc(status=200)
+    shared = SharedMetrics(tmp_path / "metrics", registry)
+    SharedMetrics.reset(shared.directory)
+    shared.write()
+
+    path = shared.directory / f"{os.getpid()}.json"
+    exported = json.loads(path.read_text())["requests_total"]
+    assert exported == {"type": "counter", "help": "Requests", "entries": [[{"status": "200"}, 1]]}
+    assert shared.read_peers() == []  # Its own values are rendered live
+    SharedMetrics.reset(shared.directory)
+    assert not path.exists()
@@ -0,0 +1,125 @@
+"""Tests for nodes.py module against several local agents."""
+
+import threading
+import time
+from dataclasses import replace
+
+import pytest
+from werkzeug.serving import make_server
+
+from src.agent import KeepAliveRequestHandler, create_agent_app
+from src.canned_info import canned_service_statuses
+from src.collector import StatusCollector
+from src.nodes import Node, NodeAggregator, aggregate, load_nodes, parse_node
+
+
+class Agent:
+    """An agent app with its own collector, served on a free local port."""
+
+    def __init__(self, services):
+        self.services = list(services)
+        self.collector = StatusCollector(collect_fn=lambda: self.services)
+        self.collector.refresh()
+        self.delay = 0.0
+        self.status_codes = []
+        app = create_agent_app(self.collector)
+        app.before_request(lambda: time.sleep(self.delay))
+        app.after_request(self._record)
+        self.server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=KeepAliveRequestHandler)
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def _record(self, response):
+        self.status_codes.append(response.status_code)
+        return response
+
+
+@pytest.fixture
+def agents():
+    """Three agents with 2, 3 and 4 units."""
+    started = [Agent(canned_service_statuses[:count]) for count in (2, 3, 4)]
+    yield started
+    for agent in started:
+        agent.server.shutdown()
+        agent.server.server_close()
+
+
+def _aggregator(agents, timeout=2.0, local=()):
+    nodes = [Node(f"pi{i}", agent.url, timeout) for i, agent in enumerate(agents, start=1)]
+    return NodeAggregator(nodes, collect_local=lambda: list(local))
+
+
+def test_load_nodes():
+    """Nodes come from config tables or `name=url`; duplicate names are rejected."""
+    assert load_nodes([{"name": "pi2", "url": "http://pi2:5002/", "timeout_seconds": 1}]) == [
+        Node("pi2", "http://pi2:5002", 1)
+    ]
+    assert parse_node("pi2=http://pi2:5002") == Node("pi2", "http://pi2:5002")
+    with pytest.raises(ValueError):
+        load_nodes([{"name": "pi2", "url": "a"}, {"name": "pi2", "url": "b"}])
+    with pytest.raises(ValueError):
+        parse_node("http://pi2:5002")
+
+
+def test_merges_local_and_node_units(agents):
+    """Local units keep their names; node units are named <node>/<unit> and grouped by node."""
+    local = canned_service_statuses[5:6]
+    statuses = _aggregator(agents, local=local)()
+
+    assert len(statuses) == 1 + 2 + 3 + 4
+    assert statuses[0] == local[0]
+    assert [status.node for status in statuses[1:4]] == ["pi1", "pi1", "pi2"]
+    assert statuses[1].name == f"pi1/{canned_service_statuses[0].name}"
+    assert statuses[1].project_group == canned_service_statuses[0].project_group
+
+
+def test_unchanged_agents_answer_304_and_changes_arrive_as_deltas(agents):
+    """Repeat polls cost a 304; a changed agent only sends the changed units."""
+    aggregator = _aggregator(agents)
+    first = aggregator()
+    assert aggregator() == first
+    assert [agent.status_codes for agent in agents] == [[200, 304]] * 3
+
+    agent = agents[2]
+    agent.services = [replace(agent.services[0], is_active=False, is_failed=True)] + agent.services[1:3]
+    agent.collector.refresh()
+    statuses = {status.name: status for status in aggregator()}
+    assert statuses[f"pi3/{agent.services[0].name}"].is_failed
+    assert f"pi3/{canned_service_statuses[3].name}" not in statuses
+    assert len(statuses) == 2 + 3 + 3
+
+
+def test_unreachable_node_keeps_last_known_units(agents):
+    """A node that stops answering keeps its units, marked with a collection error."""
+    aggregator = _aggregator(agents)
+    aggregator()
+    agents[0].server.shutdown()
+    agents[0].server.server_close()
+
+    statuses = aggregator()
+    errors = [status.collection_error for status in statuses if status.node == "pi1"]
+    assert errors == ["pi1 unavailable (ConnectionError)"] * 2
+    assert not any(status.collection_error for status in statuses if status.node != "pi1")
+
+
+def test_nodes_are_polled_concurrently_with_per_node_timeouts(agents):
+    """One slow node costs its own timeout, not the sum over all nodes."""
+    for agent in agents:
+        agent.delay = 0.3
+    started = time.monotonic()
+    assert len(_aggregator(agents)()) == 9
+    assert time.monotonic() - started < 0.8
+
+    agents[1].delay = 2
+    started = time.monotonic()
+    statuses = _aggregator(agents, timeout=0.5)()
+    assert time.monotonic() - started < 1.5
+    assert not any(status.node == "pi2" for status in statuses)
+
+
+def test_aggregate_sets_collector_source(agents):
+    """The collector's snapshot includes every node's units."""
+    collector = StatusCollector(collect_fn=list)
+    aggregator = aggregate(collector, [Node("pi1", agents[0].url)])
+    aggregator._collect_local = list
+    assert [status.node for status in collector.refresh().services] == ["pi1", "pi1"]
@@ -0,0 +1,53 @@
+"""Tests for pages.py module."""
+
+import gzip
+from datetime import UTC, datetime
+from unittest.mock import patch
+
+from src.collector import Snapshot
+from src.pages import RenderCache, RenderedPage, last_modified, page_etag
+
+
+def test_render_cache_renders_once_and_evicts_least_recent():
+    """Hits skip rendering; the least recently used entry is dropped when full."""
+    cache = RenderCache("test", max_entries=2)
+    renders = []
+
+    def render(key):
+        return lambda: renders.append(key) or f"<p>{key}</p>"
+
+    assert cache.get_or_render("a", render("a")) == "<p>a</p>"
+    assert cache.get_or_render("a", render("a")) == "<p>a</p>"
+    cache.get_or_render("b", render("b"))
+    cache.get_or_render("a", render("a"))
+    cache.get_or_render("c", render("c"))  # Evicts b
+    cache.get_or_render("b", render("b"))
+
+    assert renders == ["a", "b", "c", "b"]
+    assert len(cache) == 2
+
+
+def test_rendered_page_compresses_each_encoding_once():
+    """Compressed bodies are made on first use and kept with the page."""
+    page = RenderedPage("<p>é</p>" * 100)
+    assert len(page) == len("<p>é</p>".encode()) * 100
+    with patch(
+        "src.pages.compress", wraps=lambda content, encoding, dynamic: gzip.compress(content)
+    ) as compress:
+        assert gzip.decompress(page.body("gzip")) == page.body("identity")
+        page.body("gzip")
+    compress.assert_called_once()
+
+
+def test_page_etag_and_last_modified():
+    """The ETag changes with the epoch, version and selected service."""
+    snapshot = Snapshot(version=3, changed_at=1_760_000_000.7)
+    etag = page_etag("abc", snapshot, None)
+    assert etag.startswith("abc-3-")
+    assert etag != page_etag("abc", snapshot, "projects_a.service")
+    assert etag != page_etag("abc", Snapshot(version=4), None)
+    # Names with the same crc32 get different ETags
+    assert page_etag("abc", snapshot, "plumless") != page_etag("abc", snapshot, "buckeroo")
+
+    assert last_modified(snapshot) == datetime(2025, 10, 9, 8, 53, 20, tzinfo=UTC)
+    assert last_modified(Snapshot(version=0)) is None
@@ -0,0 +1,65 @@
+"""Tests for query.py module."""
+
+from dataclasses import replace
+
+from src.canned_info import canned_service_statuses
+from src.collector import Snapshot
+from src.query import ServiceQuery, SnapshotIndex, get_index
+
+SERVICES = (
+    replace(canned_service_statuses[1], memory_bytes=300, project_group="energy-monitor", suffix=None),
+    replace(canned_service_statuses[3], memory_bytes=100, project_group="energy-monitor", suffix="mqtt"),
+    replace(canned_service_statuses[0], memory_bytes=None, is_active=False, is_failed=True),
+    replace(canned_service_statuses[5], memory_bytes=200),
+)
+
+
+def _names(services):
+    return [status.name for status in services]
+
+
+def test_filters_intersect_indexes():
+    """Group, state, suffix and search filters combine."""
+    index = SnapshotIndex.build(Snapshot(1, SERVICES))
+
+    services, total = index.query(ServiceQuery(group="energy-monitor"))
+    assert _names(services) == _names(SERVICES[:2]) and total == 2
+    assert _names(index.query(ServiceQuery(group="energy-monitor", suffix="mqtt"))[0]) == [SERVICES[1].name]
+    assert _names(index.query(ServiceQuery(state="failed"))[0]) == [SERVICES[2].name]
+    assert index.query(ServiceQuery(group="energy-monitor", state="failed")) == ([], 0)
+    assert _names(index.query(ServiceQuery(search="MQTT"))[0]) == [SERVICES[1].name]
+    assert index.query(ServiceQuery(group="unknown")) == ([], 0)
+
+
+def test_sort_top_k():
+    """Numeric sorts return the largest first; services without a value come last."""
+    index = SnapshotIndex.build(Snapshot(1, SERVICES))
+
+    services, total = index.query(ServiceQuery(sort="memory", limit=2))
+    assert _names(services) == [SERVICES[0].name, SERVICES[3].name] and total == 4
+    assert _names(index.query(ServiceQuery(sort="memory"))[0])[-1] == SERVICES[2].name
+    assert _names(index.query(ServiceQuery(sort="name"))[0]) == sorted(_names(SERVICES))
+
+
+def test_facets():
+    """Facets count services per group, state and suffix."""
+    facets = SnapshotIndex.build(Snapshot(1, SERVICES)).facets()
+    assert facets["group"]["energy-monitor"] == 2
+    assert facets["state"] == {"active": 3, "failed": 1, "inactive": 0, "unknown": 0}
+    assert facets["suffix"]["mqtt"] == 1
+
+
+def test_collection_errors_are_unknown():
+    """A unit whose status could not be collected is neither active nor failed."""
+    stale = replace(SERVICES[2], collection_error="pi2 unavailable (ConnectionError)")
+    index = SnapshotIndex.build(Snapshot(1, (*SERVICES[:2], stale)))
+    assert _names(index.query(ServiceQuery(state="unknown"))[0]) == [stale.name]
+    assert index.query(ServiceQuery(state="failed")) == ([], 0)
+
+
+def test_get_index_is_cached_per_services():
+    """The index is reused until the snapshot's services change."""
+    snapshot = Snapshot(1, SERVICES, collected_at=1.0)
+    index = get_index(snapshot)
+    assert get_index(replace(snapshot, collected_at=2.0)) is index
+    assert get_index(Snapshot(2, SERVICES[:2])) is not index
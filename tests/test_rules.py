@@ -0,0 +1,102 @@
+"""Tests for rules.py module."""
+
+from dataclasses import replace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.canned_info import canned_service_statuses
+from src.collector import Snapshot
+from src.rules import ThresholdAlerts, ThresholdRule, load_rules
+
+SERVICE = replace(canned_service_statuses[0], memory_bytes=100 * 1024**2, cpu_nsec=0)
+
+
+def _snapshot(collected_at: float, **fields) -> Snapshot:
+    return Snapshot(1, (replace(SERVICE, **fields),), collected_at=collected_at)
+
+
+def test_load_rules():
+    """Rules are read from config tables; memory thresholds accept sizes."""
+    memory, cpu = load_rules(
+        [
+            {"metric": "memory", "above": "1G", "window_seconds": 600},
+            {"metric": "cpu", "above": 90, "pattern": "projects_energy*"},
+        ]
+    )
+    assert memory == ThresholdRule("memory", 1024**3, 600)
+    assert memory.describe() == "memory above 1.0G for 600s"
+    assert (cpu.above, cpu.window_seconds, cpu.pattern) == (90, 0, "projects_energy*")
+    assert cpu.patterns == ["projects_energy*"]
+
+    with pytest.raises(ValueError):
+        load_rules([{"metric": "disk", "above": 1}])
+
+
+def test_memory_rule_fires_once_after_window():
+    """Memory must stay above the threshold for the whole window; the alert fires once per breach."""
+    notify = MagicMock()
+    rule = ThresholdRule("memory", 500 * 1024**2, window_seconds=60)
+    alerts = ThresholdAlerts([rule], notify=notify)
+
+    assert alerts.evaluate(_snapshot(0, memory_bytes=600 * 1024**2)) == []
+    assert alerts.evaluate(_snapshot(30, memory_bytes=600 * 1024**2)) == []
+    assert len(alerts.evaluate(_snapshot(60, memory_bytes=700 * 1024**2))) == 1
+    notify.assert_called_once()
+    assert notify.call_args.args[2] == 600 * 1024**2
+
+    assert alerts.evaluate(_snapshot(90, memory_bytes=700 * 1024**2)) == []
+    # Dropping below re-arms the rule
+    alerts.evaluate(_snapshot(120, memory_bytes=100 * 1024**2))
+    for t in (150, 180, 210):
+        alerts.evaluate(_snapshot(t, memory_bytes=600 * 1024**2))
+    assert notify.call_count == 2
+
+
+def test_cpu_rule_uses_rate_over_window():
+    """CPU usage is the CPU time used over the window, as % of one core."""
+    notify = MagicMock()
+    alerts = ThresholdAlerts([ThresholdRule("cpu", 50, window_seconds=60)], notify=notify)
+
+    alerts.evaluate(_snapshot(0, cpu_nsec=0))
+    alerts.evaluate(_snapshot(30, cpu_nsec=29 * 10**9))  # 97% for 30s, window not covered yet
+    notify.assert_not_called()
+    alerts.evaluate(_snapshot(60, cpu_nsec=30 * 10**9))  # 30s over 60s
+    notify.assert_not_called()
+    (breach,) = alerts.evaluate(_snapshot(90, cpu_nsec=60 * 10**9))  # 31s over the last 60s
+    assert breach[2] == pytest.approx(31 / 60 * 100)
+    notify.assert_called_once()
+
+
+def test_restart_resets_samples():
+    """A CPU counter reset (service restart) starts the window over instead of a negative rate."""
+    notify = MagicMock()
+    alerts = ThresholdAlerts([ThresholdRule("cpu", 50, window_seconds=60)], notify=notify)
+    alerts.evaluate(_snapshot(0, cpu_nsec=100 * 10**9))
+    alerts.evaluate(_snapshot(60, cpu_nsec=10 * 10**9))
+    alerts.evaluate(_snapshot(90, cpu_nsec=40 * 10**9))
+    notify.assert_not_called()
+    alerts.evaluate(_snapshot(120, cpu_nsec=70 * 10**9))
+    notify.assert_called_once()
+
+
+def test_notify_failure_is_logged():
+    """A failing notifier does not break evaluation."""
+    alerts = ThresholdAlerts([ThresholdRule("memory", 0)], notify=MagicMock(side_effect=RuntimeError))
+    assert len(alerts.evaluate(_snapshot(0))) == 1
+
+
+def test_rule_pattern_matches_units_of_other_nodes():
+    """Patterns match the unit name, so `<node>/<unit>` statuses of other Pis are checked too."""
+    alerts = ThresholdAlerts([ThresholdRule("memory", 50 * 1024**2)], notify=MagicMock())
+    remote = {"name": f"pi2/{SERVICE.name}", "node": "pi2"}
+    assert len(alerts.evaluate(_snapshot(0, **remote))) == 1
+
+
+def test_rule_without_pattern_follows_unit_include():
+    """A rule without a pattern checks every unit matching the configured `unit_include`."""
+    alerts = ThresholdAlerts([ThresholdRule("memory", 50 * 1024**2)], notify=MagicMock())
+    with patch("src.rules.UNIT_INCLUDE", ["other_*"]):
+        assert alerts.evaluate(_snapshot(0)) == []
+    with patch("src.rules.UNIT_INCLUDE", ["other_*", "projects_*"]):
+        assert len(alerts.evaluate(_snapshot(0))) == 1
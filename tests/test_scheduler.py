@@ -0,0 +1,76 @@
+"""Tests for scheduler.py module."""
+
+from dataclasses import replace
+from unittest.mock import patch
+
+import pytest
+
+from src import scheduler
+from src.canned_info import canned_service_statuses
+from src.collector import Snapshot
+
+
+@pytest.fixture(autouse=True)
+def reset_alerts():
+    scheduler._alerted_services.clear()
+    yield
+    scheduler._alerted_services.clear()
+
+
+@patch("src.scheduler.report_error_to_telegram")
+def test_alert_on_new_failures(mock_report):
+    """Only services that just transitioned to failed are alerted, once per day."""
+    healthy = canned_service_statuses[0]
+    failed = replace(healthy, is_active=False, is_failed=True)
+    other_failed = replace(canned_service_statuses[1], is_active=False, is_failed=True)
+
+    scheduler.alert_on_new_failures(Snapshot(1, (healthy, other_failed)), Snapshot(2, (failed, other_failed)))
+    mock_report.assert_called_once_with(failed)
+
+    scheduler.alert_on_new_failures(Snapshot(2, (healthy, other_failed)), Snapshot(3, (failed, other_failed)))
+    mock_report.assert_called_once()
+
+
+@patch("src.scheduler.report_error_to_telegram")
+@patch("src.scheduler.collector")
+def test_service_health_check(mock_collector, mock_report):
+    """The hourly check alerts every failed service in the snapshot."""
+    failed = replace(canned_service_statuses[0], is_active=False, is_failed=True)
+    mock_collector.get_snapshot.return_value = Snapshot(1, (failed, canned_service_statuses[1]))
+
+    scheduler.service_health_check()
+    mock_report.assert_called_once_with(failed)
+
+
+@patch("src.scheduler.threshold_alerts")
+@patch("src.scheduler.collector")
+def test_check_thresholds(mock_collector, mock_alerts):
+    """Threshold rules are evaluated against the cached snapshot."""
+    snapshot = Snapshot(1, tuple(canned_service_statuses))
+    mock_collector.get_snapshot.return_value = snapshot
+
+    scheduler.check_thresholds()
+    mock_alerts.evaluate.assert_called_once_with(snapshot)
+
+
+@patch("src.scheduler.record_availability")
+@patch("src.scheduler.collector")
+def test_flush_availability(mock_collector, mock_record):
+    """Availability is accounted from the latest collection, but not before the first one."""
+    mock_collector.get_snapshot.return_value = Snapshot(0, ())
+    scheduler.flush_availability()
+    mock_record.assert_not_called()
+
+    snapshot = Snapshot(1, tuple(canned_service_statuses), collected_at=1_760_000_000)
+    mock_collector.get_snapshot.return_value = snapshot
+    scheduler.flush_availability()
+    mock_record.assert_called_once_with(snapshot)
+
+
+@patch("src.scheduler.action_runner")
+@patch("src.scheduler.restart_jobs")
+def test_fail_interrupted_work(mock_jobs, mock_actions):
+    """Jobs and action runs of exited processes are failed by the collector process."""
+    scheduler.fail_interrupted_work()
+    mock_jobs.store.fail_orphans.assert_called_once()
+    mock_actions.store.fail_orphans.assert_called_once()
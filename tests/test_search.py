@@ -0,0 +1,162 @@
+"""Tests for search.py module."""
+
+import json
+from unittest.mock import patch
+
+import pytest
+
+from src.search import (
+    OPTIMIZE_INTERVAL_SECONDS,
+    JournalIndexer,
+    SearchIndex,
+    fts_query,
+    read_journal,
+)
+
+UNIT_A = "projects_energy-monitor.service"
+UNIT_B = "projects_pingpong.service"
+
+
+def _record(i: int, unit: str, message: str) -> dict:
+    return {
+        "__CURSOR": f"s=test;i={i:x}",
+        "__REALTIME_TIMESTAMP": str(1_760_000_000_000_000 + i),
+        "PRIORITY": "3" if "error" in message.lower() else "6",
+        "_SYSTEMD_UNIT": unit,
+        "MESSAGE": message,
+    }
+
+
+class FakeJournal:
+    """Serves records after a cursor in batches, recording the journalctl arguments."""
+
+    def __init__(self, records: list[dict]):
+        self.records = records
+        self.calls = []
+
+    def __call__(self, args, limit):
+        self.calls.append(args)
+        start = 0
+        if args[0].startswith("--after-cursor="):
+            cursor = args[0].split("=", 1)[1]
+            start = next(i for i, record in enumerate(self.records) if record["__CURSOR"] == cursor) + 1
+        return self.records[start : start + limit]
+
+
+@pytest.fixture
+def index():
+    """Index with a few entries of two units."""
+    index = SearchIndex(path=None)
+    journal = FakeJournal(
+        [
+            _record(1, UNIT_A, "Starting energy monitor"),
+            _record(2, UNIT_A, "ERROR: database is locked"),
+            _record(3, UNIT_B, "pong"),
+            _record(4, UNIT_A, "Retrying write"),
+            _record(5, UNIT_A, "Error while writing: database is locked, database busy"),
+            _record(6, UNIT_B, "Connection error: timeout"),
+        ]
+    )
+    JournalIndexer(index, read_fn=journal).index_new_entries()
+    return index
+
+
+def test_fts_query():
+    """Words are quoted so log punctuation and FTS operators match literally."""
+    assert fts_query("database locked") == '"database" "locked"'
+    assert fts_query('data* "NOT"') == '"data"* """NOT"""'
+    with pytest.raises(ValueError):
+        fts_query("  * ")
+
+
+def test_search_ranks_and_filters(index):
+    """Hits contain every word, best match first; unit, since and order narrow and sort them."""
+    hits = index.search("database locked")
+    assert {hit.message for hit in hits} == {
+        "ERROR: database is locked",
+        "Error while writing: database is locked, database busy",
+    }
+    assert hits[0].rank <= hits[1].rank
+
+    assert {hit.unit for hit in index.search("error")} == {UNIT_A, UNIT_B}
+    assert [hit.unit for hit in index.search("error", unit=UNIT_B)] == [UNIT_B]
+    assert [hit.message for hit in index.search("error", order="oldest", limit=1)] == [
+        "ERROR: database is locked"
+    ]
+    assert len(index.search("error", since=1_760_000_000_000_005)) == 2
+    assert [hit.message for hit in index.search("retr*")] == ["Retrying write"]
+    assert index.search("missing") == []
+
+
+def test_search_context(index):
+    """Each hit carries neighbouring entries of the same unit only."""
+    (hit,) = index.search("retrying", context=1)
+    assert [entry.message for entry in hit.before] == ["ERROR: database is locked"]
+    assert [entry.message for entry in hit.after] == [
+        "Error while writing: database is locked, database busy"
+    ]
+
+
+def test_indexer_resumes_from_cursor_in_batches():
+    """The first run backfills the retention window; later runs continue after the last cursor."""
+    journal = FakeJournal([_record(i, UNIT_A, f"line {i}") for i in range(5)])
+    index = SearchIndex(path=None)
+    indexer = JournalIndexer(index, read_fn=journal, batch_size=2)
+
+    assert indexer.index_new_entries() == 5
+    assert journal.calls[0][0].startswith("--since=@")
+    assert journal.calls[1:] == [["--after-cursor=s=test;i=1"], ["--after-cursor=s=test;i=3"]]
+    assert index.cursor == "s=test;i=4"
+
+    journal.records.append(_record(5, UNIT_B, "line 5"))
+    assert indexer.index_new_entries() == 1
+    assert len(index) == 6
+
+
+def test_prune_applies_retention_limits(index):
+    """Entries older than the retention window, and beyond the newest max_entries, are dropped."""
+    assert index.prune(older_than=1_760_000_000_000_003, max_entries=100) == 2
+    assert index.search("starting") == []
+    assert index.prune(older_than=0, max_entries=2) == 2
+    assert [hit.message for hit in index.search("error", order="oldest")] == [
+        "Error while writing: database is locked, database busy",
+        "Connection error: timeout",
+    ]
+
+
+def test_prune_merges_and_optimizes_daily(index):
+    """Prunes merge a bounded number of index pages; a full optimize runs at most once a day."""
+    statements = []
+    index._connect().set_trace_callback(statements.append)
+    indexer = JournalIndexer(index, read_fn=FakeJournal([]), retention_seconds=1e10, max_entries=5)
+    with patch.object(index, "optimize") as optimize:
+        assert indexer.prune() == 1
+        optimize.assert_not_called()
+        indexer._optimized_at -= OPTIMIZE_INTERVAL_SECONDS
+        indexer.max_entries = 4
+        assert indexer.prune() == 1
+        indexer.max_entries = 3
+        assert indexer.prune() == 1
+    optimize.assert_called_once()
+    assert any("'merge'" in statement for statement in statements)
+    index.optimize()
+    assert [hit.message for hit in index.search("error", order="oldest")] == [
+        "Error while writing: database is locked, database busy",
+        "Connection error: timeout",
+    ]
+
+
+def test_read_journal_stops_at_limit():
+    """journalctl is stopped once `limit` records were read; the rest follows from the cursor."""
+    lines = [json.dumps(_record(i, UNIT_A, f"line {i}")) + "\n" for i in range(5)] + ["not json\n"]
+    with patch("src.search.subprocess.Popen") as mock_popen:
+        process = mock_popen.return_value
+        process.__enter__.return_value = process
+        process.stdout = iter(lines)
+        records = read_journal(["--after-cursor=c"], limit=3)
+
+    command = mock_popen.call_args.args[0]
+    assert command[:2] == ["journalctl", "--unit=projects_*"]
+    assert command[-1] == "--after-cursor=c"
+    assert [record["MESSAGE"] for record in records] == ["line 0", "line 1", "line 2"]
+    process.terminate.assert_called_once()
@@ -0,0 +1,87 @@
+"""Tests for serve.py module."""
+
+import sys
+import time
+from unittest.mock import MagicMock, patch
+
+from src.canned_info import canned_service_statuses
+from src.collector import StatusCollector
+from src.history import HistoryStore
+from src.serve import CollectorSupervisor, post_worker_init, server_options
+from src.shared import SnapshotWriter
+
+
+def test_server_options():
+    """Workers are threaded and follow the shared snapshot."""
+    options = server_options(workers=4, threads=8, port=5001)
+    assert options["bind"] == "0.0.0.0:5001"
+    assert options["workers"] == 4
+    assert options["worker_class"] == "gthread"
+    assert options["post_worker_init"] is post_worker_init
+    assert options["preload_app"]
+
+
+def test_post_worker_init_follows_shared_snapshot(tmp_path):
+    """A worker serves the collector process' snapshot and never collects or persists history."""
+    path = tmp_path / "snapshot"
+    source = StatusCollector(collect_fn=lambda: canned_service_statuses[:3])
+    SnapshotWriter(path).write(source.refresh(), source.epoch)
+    worker_collector = StatusCollector(collect_fn=list)
+    store = HistoryStore(path=None)
+
+    with (
+        patch("src.serve.SHARED_SNAPSHOT_PATH", path),
+        patch("src.serve.collector", worker_collector),
+        patch("src.serve.history_store", store),
+        patch("src.serve.record_history") as record_history,
+        patch("src.serve.SharedMetrics") as shared_metrics,
+    ):
+        post_worker_init(MagicMock())
+
+    assert worker_collector.follower
+    assert store.read_only
+    assert worker_collector.get_snapshot() == source.get_snapshot()
+    assert worker_collector.epoch == source.epoch
+    record_history.assert_called_once()
+    shared_metrics.return_value.start.assert_called_once()
+
+
+def test_post_worker_init_does_not_wait_for_first_collection(tmp_path):
+    """Before the collector's first snapshot a worker starts right away with an empty list."""
+    worker_collector = StatusCollector(collect_fn=list)
+    with (
+        patch("src.serve.SHARED_SNAPSHOT_PATH", tmp_path / "missing"),
+        patch("src.serve.collector", worker_collector),
+        patch("src.serve.history_store", HistoryStore(path=None)),
+        patch("src.serve.record_history"),
+        patch("src.serve.SharedMetrics"),
+        patch("src.serve.SnapshotFollower.start") as start,
+    ):
+        post_worker_init(MagicMock())
+
+    start.assert_called_once()
+    assert worker_collector.get_snapshot().services == ()
+
+
+def test_collector_supervisor_restarts_exited_collector():
+    """A collector that exits is started again after the backoff, and stop ends the last one."""
+    supervisor = CollectorSupervisor([sys.executable, "-c", "pass"], backoff=0.01, max_backoff=0.02)
+    supervisor.start()
+    deadline = time.monotonic() + 10
+    while supervisor.restarts < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    supervisor.stop()
+    assert supervisor.restarts >= 2
+
+
+def test_collector_supervisor_stop_terminates_collector():
+    """Stopping terminates a running collector instead of restarting it."""
+    supervisor = CollectorSupervisor([sys.executable, "-c", "import time; time.sleep(60)"])
+    supervisor.start()
+    deadline = time.monotonic() + 10
+    while supervisor._process is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    process = supervisor._process
+    supervisor.stop()
+    assert process.returncode is not None
+    assert supervisor.restarts == 0
@@ -1,21 +1,27 @@
 """Tests for services.py module."""
 
-from unittest.mock import patch
+from dataclasses import replace
+from pathlib import Path
 
 import pytest
 
 from src.canned_info import canned_service_statuses
 from src.services import (
-    get_ci_status,
+    format_bytes,
+    format_cpu_time,
+    format_uptime,
     get_github_repo_name,
-    get_info_for_service,
-    get_service_status,
-    get_services,
+    parse_bytes,
     parse_cpu,
+    parse_duration_seconds,
     parse_last_error,
     parse_memory,
     parse_service_name,
+    parse_systemctl_show,
     parse_uptime,
+    service_state,
+    status_from_properties,
+    with_current_uptime,
 )
 
 
@@ -82,52 +88,178 @@ def test_parse_service_name(service):
     assert suffix == service.suffix
 
 
-@patch("src.services.subprocess.check_output")
-def test_get_services(mock_check_output):
-    """Parse systemctl list-units output and handle empty output."""
-    mock_check_output.return_value = (
-        "projects_test1.service       loaded active running   Test Service 1\n"
-        "projects_test2.service       loaded active running   Test Service 2\n"
-    )
-    assert get_services() == ["projects_test1.service", "projects_test2.service"]
+SHOW_FIXTURE = (Path(__file__).parent / "fixtures" / "systemctl_show.txt").read_text()
+
+
+def test_parse_systemctl_show():
+    """Split systemctl show output into one property dict per unit."""
+    units = parse_systemctl_show(SHOW_FIXTURE)
+    assert [unit["Id"] for unit in units] == [
+        "projects_energy-monitor.service",
+        "projects_energy-monitor_mqtt.service",
+        "projects_ios-health_data-backup-scheduler.service",
+        "projects_wordle-alarm.service",
+        "projects_trainspotter.service",
+    ]
+    assert units[0]["ActiveEnterTimestamp"] == "Sat 2026-10-17 08:02:11 CEST"
+    assert parse_systemctl_show("") == []
+
+
+def test_status_from_properties():
+    """Build ServiceStatus objects for active, failed, and inactive units."""
+    energy, mqtt, backup, wordle, trainspotter = [
+        status_from_properties(unit, now_monotonic=100_000) for unit in parse_systemctl_show(SHOW_FIXTURE)
+    ]
+    assert energy.is_active and not energy.is_failed
+    assert (energy.uptime, energy.memory, energy.cpu) == ("1h 46min", "123.4M", "7min 52.884s")
+    assert (energy.project_group, energy.suffix) == ("energy-monitor", None)
+    assert (energy.memory_bytes, energy.cpu_nsec) == (129394278, 472884000000)
+    assert energy.uptime_seconds == pytest.approx(6400, abs=1)
+
+    assert mqtt.memory is None and mqtt.cpu == "5.185s" and mqtt.suffix == "mqtt"
+    assert backup.uptime == "1 day 2h" and backup.cpu == "309ms"
+
+    assert wordle.is_failed and not wordle.is_active and wordle.uptime is None
+    assert wordle.last_error == "Failed with result 'exit-code' (status=1)"
+
+    assert not trainspotter.is_active and not trainspotter.is_failed
+    assert trainspotter.cpu is None and trainspotter.last_error is None
+
+
+def test_uptime_is_not_part_of_change_detection():
+    """Later collections of an unchanged unit compare equal; uptime is recomputed from active_since."""
+    unit = parse_systemctl_show(SHOW_FIXTURE)[0]
+    first = status_from_properties(unit, now_monotonic=100_000, now=1_760_000_000)
+    later = status_from_properties(unit, now_monotonic=100_030.0004, now=1_760_000_030)
+    assert first == later and first.uptime_seconds != later.uptime_seconds
+    assert first.active_since == 1_760_000_000 - 6400
+
+    current = with_current_uptime(first, now=1_760_000_000 + 3600)
+    assert (current.uptime, current.uptime_seconds) == ("2h 46min", 10000)
+    stopped = replace(first, is_active=False, uptime=None, uptime_seconds=None, active_since=None)
+    assert with_current_uptime(stopped) is stopped
+
+
+@pytest.mark.parametrize(
+    "text,expected",
+    [("512B", 512), ("2.0K", 2048), ("123.4M", 129394278), ("1.2G (peak: 2.0G)", 1288490189), ("N/A", None)],
+)
+def test_parse_bytes(text, expected):
+    """Parse systemd sizes into bytes."""
+    assert parse_bytes(text) == expected
+
+
+@pytest.mark.parametrize(
+    "text,expected",
+    [
+        ("309ms", 0.309),
+        ("7min 52.884s", 472.884),
+        ("1h 23min 45.678s", 5025.678),
+        ("1 day 2h", 93600),
+        ("4 days", 345600),
+    ],
+)
+def test_parse_duration_seconds(text, expected):
+    """Parse systemd timespans into seconds."""
+    assert parse_duration_seconds(text) == pytest.approx(expected)
+    assert parse_duration_seconds("soon") is None
 
-    mock_check_output.return_value = ""
-    assert get_services() == []
 
+def test_service_status_numeric_fields_from_strings():
+    """Statuses built from display strings (canned data) get numeric fields too."""
+    status = replace(canned_service_statuses[1], memory="123.4M", memory_bytes=None)
+    assert (status.memory_bytes, status.cpu_nsec, status.uptime_seconds) == (129394278, 472884000000, 7080)
 
-@patch("src.services.subprocess.run")
-def test_get_info_for_service(mock_run):
-    """Return stdout on success, stdout+stderr on failure."""
-    mock_run.return_value.returncode = 0
-    mock_run.return_value.stdout = "Service is running"
-    mock_run.return_value.stderr = ""
-    assert get_info_for_service("test.service") == "Service is running"
 
-    mock_run.return_value.returncode = 3
-    mock_run.return_value.stdout = "Unit not found"
-    mock_run.return_value.stderr = "Failed"
-    assert get_info_for_service("test.service") == "Unit not found\nFailed"
+@pytest.mark.parametrize(
+    "num_bytes,expected",
+    [(512, "512B"), (2048, "2.0K"), (129394278, "123.4M"), (1288490188, "1.2G")],
+)
+def test_format_bytes(num_bytes, expected):
+    """Format byte counts like systemctl status."""
+    assert format_bytes(num_bytes) == expected
 
 
-@patch("src.services.get_info_for_service")
-def test_get_service_status(mock_get_info):
+@pytest.mark.parametrize(
+    "nsec,expected",
+    [
+        (309_000_000, "309ms"),
+        (29_406_000_000, "29.406s"),
+        (66_171_000_000, "1min 6.171s"),
+        (420_000_000_000, "7min"),
+        (5_025_678_000_000, "1h 23min 45.678s"),
+    ],
+)
+def test_format_cpu_time(nsec, expected):
+    """Format CPU nanoseconds like systemctl status."""
+    assert format_cpu_time(nsec) == expected
+
+
+@pytest.mark.parametrize(
+    "seconds,expected",
+    [
+        (42, "42s"),
+        (150, "2min 30s"),
+        (360, "6min"),
+        (7080, "1h 58min"),
+        (8 * 3600, "8h"),
+        (26 * 3600, "1 day 2h"),
+        (4 * 86400, "4 days"),
+    ],
+)
+def test_format_uptime(seconds, expected):
+    """Format elapsed time like the 'X ago' part of systemctl status."""
+    assert format_uptime(seconds) == expected
+
+
+def test_service_state():
+    """Collection errors make the state unknown; otherwise active, failed or inactive."""
+    status = canned_service_statuses[0]
+    assert service_state(status) == "active"
+    assert service_state(replace(status, is_active=False, is_failed=True)) == "failed"
+    assert service_state(replace(status, is_active=False)) == "inactive"
+    assert service_state(replace(status, collection_error="timed out")) == "unknown"
+
+
+def test_status_from_properties_states():
     """Parse service status for active, failed, and inactive services."""
-    mock_get_info.return_value = (
-        "Active: active (running) since Mon; 4 days ago\n" "Memory: 123.4M\n" "CPU: 2min 15.678s\n"
+    status = status_from_properties(
+        {
+            "Id": "projects_test_worker.service",
+            "ActiveState": "active",
+            "SubState": "running",
+            "Result": "success",
+            "MemoryCurrent": "129394278",
+            "CPUUsageNSec": "135678000000",
+        }
     )
-    status = get_service_status("projects_test.service")
     assert status.is_active and not status.is_failed
-    assert status.uptime == "4 days" and status.memory == "123.4M"
+    assert status.memory == "123.4M" and status.cpu == "2min 15.678s"
     assert status.project_group == "test"
 
-    mock_get_info.return_value = "Active: failed (Result: exit-code)\nError: Connection refused\n"
-    status = get_service_status("projects_test.service")
+    status = status_from_properties(
+        {
+            "Id": "projects_test_worker.service",
+            "ActiveState": "failed",
+            "SubState": "failed",
+            "Result": "exit-code",
+        }
+    )
     assert not status.is_active and status.is_failed
-    assert status.last_error == "Connection refused"
-
-    mock_get_info.return_value = "Active: inactive (dead)\n"
-    status = get_service_status("projects_test.service")
+    assert status.last_error == "Failed with result 'exit-code'"
+
+    status = status_from_properties(
+        {
+            "Id": "projects_test_worker.service",
+            "ActiveState": "inactive",
+            "SubState": "dead",
+            "UnitFileState": "disabled",
+            "LoadState": "loaded",
+        }
+    )
     assert not status.is_active and not status.is_failed
+    assert status.unit_file_state == "disabled"
+    assert status.load_state == "loaded"
 
 
 @pytest.mark.parametrize(
@@ -142,94 +274,3 @@ def test_get_service_status(mock_get_info):
 def test_get_github_repo_name(project_group, expected):
     """Map project_group to GitHub repo name (1:1 mapping)."""
     assert get_github_repo_name(project_group) == expected
-
-
-@patch("src.services.requests.get")
-def test_get_ci_status_success(mock_get):
-    """Return success when latest workflow run succeeded."""
-    mock_response = mock_get.return_value
-    mock_response.raise_for_status.return_value = None
-    mock_response.json.return_value = {"workflow_runs": [{"conclusion": "success"}]}
-    assert get_ci_status("test-repo") == "success"
-
-
-@patch("src.services.requests.get")
-def test_get_ci_status_failure(mock_get):
-    """Return failure when latest workflow run failed."""
-    mock_response = mock_get.return_value
-    mock_response.raise_for_status.return_value = None
-    mock_response.json.return_value = {"workflow_runs": [{"conclusion": "failure"}]}
-    assert get_ci_status("test-repo") == "failure"
-
-
-@patch("src.services.requests.get")
-def test_get_ci_status_no_runs(mock_get):
-    """Return error when no workflow runs found."""
-    mock_response = mock_get.return_value
-    mock_response.raise_for_status.return_value = None
-    mock_response.json.return_value = {"workflow_runs": []}
-    assert get_ci_status("test-repo") == "error"
-
-
-@patch("src.services.requests.get")
-def test_get_ci_status_other_conclusion(mock_get):
-    """Return error for other conclusion values."""
-    mock_response = mock_get.return_value
-    mock_response.raise_for_status.return_value = None
-    mock_response.json.return_value = {"workflow_runs": [{"conclusion": "cancelled"}]}
-    assert get_ci_status("test-repo") == "error"
-
-
-@patch("src.services.requests.get")
-def test_get_ci_status_request_exception(mock_get):
-    """Return error on request exceptions."""
-    import requests
-
-    mock_get.side_effect = requests.RequestException("Connection error")
-    assert get_ci_status("test-repo") == "error"
-
-
-@patch("src.services.requests.get")
-def test_get_ci_status_key_error(mock_get):
-    """Return error on KeyError (missing workflow_runs key)."""
-    mock_response = mock_get.return_value
-    mock_response.raise_for_status.return_value = None
-    mock_response.json.return_value = {}
-    assert get_ci_status("test-repo") == "error"
-
-
-@patch("src.services.requests.get")
-def test_get_ci_status_with_token(mock_get):
-    """Include Authorization header when token is available."""
-    with patch("src.services.GITHUB_TOKEN", "ghp_test_token"):
-        mock_response = mock_get.return_value
-        mock_response.raise_for_status.return_value = None
-        mock_response.json.return_value = {"workflow_runs": [{"conclusion": "success"}]}
-        get_ci_status("test-repo")
-        mock_get.assert_called_once()
-        call_kwargs = mock_get.call_args.kwargs
-        assert call_kwargs["headers"]["Authorization"] == "token ghp_test_token"
-
-
-@patch("src.services.requests.get")
-def test_get_ci_status_without_token(mock_get):
-    """No Authorization header when token is None."""
-    with patch("src.services.GITHUB_TOKEN", None):
-        mock_response = mock_get.return_value
-        mock_response.raise_for_status.return_value = None
-        mock_response.json.return_value = {"workflow_runs": [{"conclusion": "success"}]}
-        get_ci_status("test-repo")
-        mock_get.assert_called_once()
-        call_kwargs = mock_get.call_args.kwargs
-        assert call_kwargs["headers"] == {}
-
-
-@patch("src.services.get_info_for_service")
-@patch("src.services.get_ci_status")
-def test_get_service_status_includes_ci(mock_get_ci, mock_get_info):
-    """ServiceStatus includes CI status from API."""
-    mock_get_info.return_value = "Active: active (running) since Mon; 4 days ago\n"
-    mock_get_ci.return_value = "success"
-    status = get_service_status("projects_test.service")
-    assert status.ci_status == "success"
-    mock_get_ci.assert_called_once_with("test")
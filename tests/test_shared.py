@@ -0,0 +1,97 @@
+"""Tests for shared.py module."""
+
+from src.canned_info import canned_service_statuses
+from src.collector import Snapshot, StatusCollector
+from src.shared import (
+    HEADER,
+    INITIAL_SIZE,
+    SnapshotFollower,
+    SnapshotPublisher,
+    SnapshotReader,
+    SnapshotWriter,
+    decode_snapshot,
+    encode_snapshot,
+)
+
+
+def _snapshot(count: int = 3, version: int = 1) -> Snapshot:
+    services = tuple(canned_service_statuses[:count])
+    return Snapshot(
+        version=version,
+        services=services,
+        collected_at=1_760_000_000.0,
+        service_versions={status.name: version for status in services},
+    )
+
+
+def test_encode_decode_round_trip():
+    """A decoded snapshot equals the original, including numeric fields and versions."""
+    snapshot = _snapshot()
+    assert decode_snapshot(encode_snapshot(snapshot, "abc")) == (snapshot, "abc")
+
+
+def test_reader_sees_each_write_once(tmp_path):
+    """Readers decode a new snapshot once and skip unchanged ones."""
+    path = tmp_path / "snapshot"
+    reader = SnapshotReader(path)
+    assert reader.read() is None  # No writer yet
+
+    writer = SnapshotWriter(path)
+    assert reader.read() is None  # Nothing written yet
+    writer.write(_snapshot(version=1), "abc")
+    assert reader.read() == (_snapshot(version=1), "abc")
+    assert reader.read() is None
+
+    writer.write(_snapshot(version=2), "abc")
+    assert reader.read()[0].version == 2
+
+
+def test_writer_grows_file(tmp_path):
+    """Snapshots larger than the mapped file grow it and are still read completely."""
+    path = tmp_path / "snapshot"
+    writer = SnapshotWriter(path)
+    reader = SnapshotReader(path)
+    writer.write(_snapshot(version=1), "abc")
+    reader.read()
+
+    big = _snapshot(count=len(canned_service_statuses), version=2)
+    big = Snapshot(2, big.services * 600, big.collected_at, big.service_versions)
+    writer.write(big, "abc")
+
+    assert path.stat().st_size > INITIAL_SIZE
+    assert reader.read() == (big, "abc")
+
+
+def test_reader_skips_torn_write(tmp_path):
+    """A payload that does not match its checksum is ignored until the next complete write."""
+    path = tmp_path / "snapshot"
+    writer = SnapshotWriter(path)
+    writer.write(_snapshot(version=1), "abc")
+    with path.open("r+b") as f:
+        f.seek(HEADER.size + 5)
+        f.write(b"#")
+
+    reader = SnapshotReader(path)
+    assert reader.read() is None
+    writer.write(_snapshot(version=2), "abc")
+    assert reader.read()[0].version == 2
+
+
+def test_publisher_and_follower(tmp_path):
+    """The follower's collector serves exactly what the publishing collector collected."""
+    path = tmp_path / "snapshot"
+    source = StatusCollector(collect_fn=lambda: canned_service_statuses[:4])
+    publisher = SnapshotPublisher(source, SnapshotWriter(path))
+    follower_collector = StatusCollector(collect_fn=list)
+    follower = SnapshotFollower(follower_collector, SnapshotReader(path), poll_interval=0.01)
+
+    assert not publisher.poll()  # Nothing collected yet
+    assert not follower.poll()
+    source.refresh()
+    assert publisher.poll()
+    assert not publisher.poll()
+    assert follower.poll()
+
+    assert follower_collector.follower
+    assert follower_collector.get_snapshot() == source.get_snapshot()
+    assert follower_collector.epoch == source.epoch
@@ -0,0 +1,50 @@
+"""Tests for startup.py module."""
+
+from src.startup import StartupProfile, parse_import_times, process_age
+
+IMPORTTIME = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:       900 |     150000 |     flask.app
+import time:      1000 |     160000 |   flask
+import time:       500 |        500 |     src.config
+import time:      2000 |      40000 |   src.engine
+import time:      3000 |     210000 | src.app
+INFO:src.assets:Fingerprinted 3 static files
+"""
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_parse_import_times():
+    """The module's total and its direct imports, slowest first; nested imports are left out."""
+    total, imports = parse_import_times(IMPORTTIME, "src.app")
+    assert total == 210.0
+    assert imports == [("flask", 160.0), ("src.engine", 40.0), ("_io", 0.12)]
+
+
+def test_profile_report():
+    """Phases are reported as time since process start, with the time each one took."""
+    clock = Clock()
+    profile = StartupProfile(clock=clock, age=0.4)
+    clock.now += 0.005
+    profile.mark("port bound")
+    clock.now += 0.5
+    profile.mark("first snapshot")
+
+    assert [phase for phase, _ in profile.phases] == ["imports", "port bound", "first snapshot"]
+    lines = profile.report().splitlines()
+    assert lines[1].split() == ["imports", "400.0", "(+400.0)"]
+    assert lines[3].split() == ["first", "snapshot", "905.0", "(+500.0)"]
+
+
+def test_process_age():
+    """The process started before this test ran, and not in the future."""
+    age = process_age()
+    assert age is None or age >= 0
@@ -0,0 +1,214 @@
+"""Tests for telegram.py module against a local fake Telegram Bot API server."""
+
+import json
+import threading
+import time
+from dataclasses import replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from urllib.parse import parse_qs
+
+import pytest
+
+from src.canned_info import canned_service_statuses
+from src.telegram import (
+    ALERT_LOG_LINES,
+    MAX_MESSAGE_LENGTH,
+    TelegramDispatcher,
+    report_error_to_telegram,
+    report_threshold_to_telegram,
+)
+
+
+class FakeTelegram:
+    """Records sendMessage calls and answers with queued (status, body) responses, then 200."""
+
+    def __init__(self):
+        self.messages: list[dict] = []
+        self.responses: list[tuple[int, dict]] = []
+        self.delay = 0.0
+        self.lock = threading.Lock()
+
+    def handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                form = parse_qs(self.rfile.read(int(self.headers["Content-Length"])).decode())
+                with fake.lock:
+                    fake.messages.append({key: values[0] for key, values in form.items()})
+                    status, body = fake.responses.pop(0) if fake.responses else (200, {"ok": True})
+                time.sleep(fake.delay)
+                data = json.dumps(body).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    self.end_headers()
+                    self.wfile.write(data)
+                except BrokenPipeError:
+                    pass  # Client timed out
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+@pytest.fixture
+def telegram():
+    """Run a fake Telegram Bot API on a free local port."""
+    fake = FakeTelegram()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), fake.handler())
+    thread = threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    fake.url = f"http://127.0.0.1:{server.server_port}"
+    yield fake
+    server.shutdown()
+    server.server_close()
+
+
+def _dispatcher(telegram, **kwargs) -> TelegramDispatcher:
+    options = {"backoff": 0.01, "batch_window": 0.05, "timeout": 1.0} | kwargs
+    return TelegramDispatcher("token", "chat", base_url=telegram.url, **options)
+
+
+def test_unconfigured_dispatcher_drops_messages():
+    """Without src/values.py credentials alerts are dropped instead of failing at import."""
+    dispatcher = TelegramDispatcher(None, None)
+    assert not dispatcher.configured
+    assert not dispatcher.submit("alert")
+    assert dispatcher.queue_depth == 0
+
+
+def test_dispatcher_coalesces_batch_into_digest(telegram):
+    """Messages queued together are delivered as one digest message."""
+    dispatcher = _dispatcher(telegram)
+    for i in range(3):
+        assert dispatcher.submit(f"alert {i}")
+    assert dispatcher.flush(timeout=5)
+    dispatcher.stop()
+
+    (message,) = telegram.messages
+    assert message["chat_id"] == "chat" and message["parse_mode"] == "Markdown"
+    assert message["text"].startswith("*3 alerts*")
+    assert all(f"alert {i}" in message["text"] for i in range(3))
+
+
+def test_dispatcher_splits_digests_at_length_limit(telegram):
+    """A digest never exceeds Telegram's message length limit."""
+    dispatcher = _dispatcher(telegram)
+    for _ in range(3):
+        dispatcher.submit("x" * (MAX_MESSAGE_LENGTH // 2))
+    assert dispatcher.flush(timeout=5)
+    dispatcher.stop()
+
+    assert len(telegram.messages) == 3
+    assert all(len(message["text"]) <= MAX_MESSAGE_LENGTH for message in telegram.messages)
+
+
+def test_dispatcher_retries_server_errors_and_rate_limits(telegram):
+    """5xx responses are retried with backoff and 429s wait for retry_after."""
+    telegram.responses = [
+        (500, {"ok": False}),
+        (429, {"ok": False, "error_code": 429, "parameters": {"retry_after": 0.2}}),
+    ]
+    dispatcher = _dispatcher(telegram)
+    start = time.monotonic()
+    dispatcher.submit("alert")
+    assert dispatcher.flush(timeout=5)
+    dispatcher.stop()
+
+    assert len(telegram.messages) == 3
+    assert time.monotonic() - start >= 0.2
+
+
+def test_dispatcher_gives_up(telegram):
+    """Client errors are not retried; persistent failures stop after max_retries."""
+    telegram.responses = [(400, {"ok": False})] + [(502, {"ok": False})] * 3
+    dispatcher = _dispatcher(telegram, max_retries=2)
+    dispatcher.submit("bad markdown")
+    assert dispatcher.flush(timeout=5)
+    time.sleep(0.1)  # Next batch
+    dispatcher.submit("alert")
+    assert dispatcher.flush(timeout=5)
+    dispatcher.stop()
+
+    assert [message["text"] for message in telegram.messages] == ["bad markdown"] + ["alert"] * 3
+
+
+def test_dispatcher_times_out_hung_requests(telegram):
+    """A hung API costs at most the request timeout per attempt, never blocks the caller."""
+    telegram.delay = 0.5
+    dispatcher = _dispatcher(telegram, timeout=0.1, max_retries=1)
+    start = time.monotonic()
+    dispatcher.submit("alert")
+    assert time.monotonic() - start < 0.1
+    assert dispatcher.flush(timeout=5)
+    assert time.monotonic() - start < 0.5
+    dispatcher.stop()
+    assert len(telegram.messages) == 2
+
+
+def test_dispatcher_drops_when_queue_full(telegram):
+    """Submitting to a full queue drops the message instead of blocking."""
+    telegram.delay = 0.2
+    dispatcher = _dispatcher(telegram, queue_size=1, batch_window=0)
+    assert dispatcher.submit("first")
+    time.sleep(0.1)  # Worker picked up "first" and is sending it
+    assert dispatcher.submit("second")
+    assert not dispatcher.submit("third")
+    assert dispatcher.flush(timeout=5)
+    dispatcher.stop()
+
+
+@patch("src.telegram.dispatcher")
+@patch("src.telegram.get_info_for_service")
+def test_report_error_defers_status_to_dispatcher(mock_get_info, mock_dispatcher):
+    """Reporting a failure never runs systemctl; the dispatcher attaches the status when sending."""
+    service_status = canned_service_statuses[0]
+
+    report_error_to_telegram(service_status)
+
+    mock_get_info.assert_not_called()
+    assert mock_dispatcher.submit.call_args.kwargs == {"status_of": service_status.name}
+    assert service_status.name in mock_dispatcher.submit.call_args.args[0]
+
+
+@patch("src.telegram.dispatcher")
+def test_report_error_of_remote_unit(mock_dispatcher):
+    """Units of other nodes are reported without a local systemctl status."""
+    status = replace(canned_service_statuses[0], name="pi2/projects_api.service", node="pi2")
+
+    report_error_to_telegram(status)
+
+    assert mock_dispatcher.submit.call_args.kwargs == {"status_of": None}
+
+
+@patch("src.telegram.get_info_for_service")
+def test_digest_shares_status_budget(mock_get_info, telegram):
+    """Failures of one check arrive as one digest, each with the end of its truncated status output."""
+    mock_get_info.side_effect = lambda service, lines: "x" * 5000 + f"Error in {service}"
+    dispatcher = _dispatcher(telegram)
+    names = [status.name for status in canned_service_statuses[:3]]
+    for name in names:
+        dispatcher.submit(f"*Service:* {name}", status_of=name)
+    assert dispatcher.flush(timeout=5)
+    dispatcher.stop()
+
+    (message,) = telegram.messages
+    text = message["text"]
+    assert text.startswith("*3 alerts*") and len(text) <= MAX_MESSAGE_LENGTH
+    assert text.count("(truncated)...") == 3
+    assert all(f"Error in {name}" in text for name in names)
+    assert {call.kwargs["lines"] for call in mock_get_info.call_args_list} == {ALERT_LOG_LINES}
+
+
+@patch("src.telegram.dispatcher")
+def test_report_threshold_to_telegram(mock_dispatcher):
+    """Threshold alerts include the rule and the offending value without fetching logs."""
+    report_threshold_to_telegram(canned_service_statuses[0], "memory above 1.0G for 600s", "1.2G")
+
+    text = mock_dispatcher.submit.call_args.args[0]
+    assert "memory above 1.0G for 600s" in text
+    assert "*Value:* `1.2G`" in text
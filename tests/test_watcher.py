@@ -0,0 +1,104 @@
+"""Tests for watcher.py module."""
+
+import json
+import queue
+import sys
+import threading
+from dataclasses import replace
+from itertools import islice
+from unittest.mock import patch
+
+from src.canned_info import canned_service_statuses
+from src.collector import StatusCollector
+from src.watcher import JournalEventSource, UnitEvent, UnitWatcher
+
+
+class FakeEventSource:
+    """Event source fed from a queue by the test."""
+
+    def __init__(self):
+        self._events: queue.Queue[UnitEvent | None] = queue.Queue()
+
+    def emit(self, unit: str, message: str = "") -> None:
+        self._events.put(UnitEvent(unit=unit, message=message))
+
+    def events(self):
+        while (event := self._events.get()) is not None:
+            yield event
+
+    def close(self) -> None:
+        self._events.put(None)
+
+
+def test_journal_event_source_filters_units():
+    """Only PID 1 messages about monitored units become events."""
+    lines = [
+        json.dumps({"UNIT": "projects_energy-monitor.service", "MESSAGE": "Stopped energy monitor."}),
+        json.dumps({"UNIT": "cron.service", "MESSAGE": "Started cron."}),
+        json.dumps({"MESSAGE": "Reached target Multi-User System."}),
+        "not json",
+        json.dumps({"UNIT": "projects_pingpong.service", "MESSAGE": "Failed with result 'exit-code'."}),
+    ]
+    with patch("src.watcher.subprocess.Popen") as mock_popen:
+        mock_popen.return_value.stdout = iter(line + "\n" for line in lines)
+        events = list(islice(JournalEventSource().events(), 2))
+
+    assert mock_popen.call_args.args[0][:2] == ["journalctl", "--follow"]
+    assert events == [
+        UnitEvent("projects_energy-monitor.service", "Stopped energy monitor."),
+        UnitEvent("projects_pingpong.service", "Failed with result 'exit-code'."),
+    ]
+
+
+def test_journal_event_source_restarts_exited_follower():
+    """A follower that exits is started again after the backoff, and events resume."""
+    script = (
+        "import json, os, time\n"
+        "print(json.dumps({'UNIT': 'projects_pingpong.service', 'MESSAGE': str(os.getpid())}), flush=True)\n"
+        "time.sleep(60)\n"
+    )
+    source = JournalEventSource([sys.executable, "-c", script], backoff=0.01)
+    received: queue.Queue[UnitEvent] = queue.Queue()
+    reader = threading.Thread(target=lambda: [received.put(event) for event in source.events()], daemon=True)
+    reader.start()
+
+    first = received.get(timeout=10)
+    source._process.kill()
+    second = received.get(timeout=10)
+    source.close()
+    reader.join(timeout=10)
+
+    assert first.unit == second.unit == "projects_pingpong.service"
+    assert first.message != second.message  # Logged by a new follower process
+    assert source.restarts == 1
+    assert not reader.is_alive()
+
+
+def test_watcher_refreshes_only_changed_units():
+    """Events are debounced and only the affected units are re-collected."""
+    services = canned_service_statuses[:3]
+    failed = replace(services[1], is_active=False, is_failed=True)
+    refreshed = threading.Event()
+    requested = []
+
+    def collect_units(units):
+        requested.append(units)
+        refreshed.set()
+        return [failed]
+
+    collector = StatusCollector(collect_fn=lambda: services, collect_units_fn=collect_units)
+    collector.refresh()
+    transitions = []
+    collector.add_listener(lambda previous, current: transitions.append(current.version))
+
+    source = FakeEventSource()
+    watcher = UnitWatcher(source, collector, debounce=0.1)
+    watcher.start()
+    source.emit(services[1].name, "Stopping...")
+    source.emit(services[1].name, "Failed with result 'exit-code'.")
+    assert refreshed.wait(timeout=5)
+    watcher.stop()
+
+    assert requested == [[services[1].name]]
+    assert collector.get_snapshot().services == (services[0], failed, services[2])
+    assert transitions == [2]